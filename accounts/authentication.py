@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .blacklist import CachedBlacklistMixin
+from .cache import is_deactivated
+from .models import TokenUser
+
+# User fields copied into tokens; enough for permission checks and for
+# filtering by user without loading the row.
+USER_CLAIMS = ("email", "is_active", "is_staff")
+
+
+class UserClaimsRefreshToken(CachedBlacklistMixin, RefreshToken):
+    # Access tokens minted from it inherit the claims.
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        for claim in USER_CLAIMS:
+            token[claim] = getattr(user, claim)
+        return token
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    # Trusts the signed claims instead of loading the user on every request.
+    # Tokens issued before the claims existed fall back to the database, and
+    # so does everything when the cache isn't shared: the deactivation marker
+    # would only reach the worker that handled the deactivation.
+
+    def get_user(self, validated_token):
+        if (api_settings.CHECK_REVOKE_TOKEN or not settings.SHARED_CACHE
+                or any(claim not in validated_token for claim in USER_CLAIMS)):
+            return super().get_user(validated_token)
+
+        try:
+            user_id = TokenUser._meta.pk.to_python(validated_token[api_settings.USER_ID_CLAIM])
+        except (KeyError, ValueError) as e:
+            raise InvalidToken("Token contained no recognizable user identification") from e
+
+        if not validated_token["is_active"] or is_deactivated(user_id):
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+
+        claims = {TokenUser._meta.pk.attname: user_id, **{claim: validated_token[claim] for claim in USER_CLAIMS}}
+        names = [field.attname for field in TokenUser._meta.concrete_fields if field.attname in claims]
+        return TokenUser.from_db(DEFAULT_DB_ALIAS, names, [claims[name] for name in names])
@@ -0,0 +1,48 @@
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+BLACKLIST_KEY = "accounts:blacklist:{}"
+
+
+def _timeout(exp):
+    # Nothing needs remembering about a token once it has expired.
+    return max(1, int(exp - time.time()))
+
+
+def is_blacklisted(jti, exp):
+    key = BLACKLIST_KEY.format(jti)
+    blacklisted = cache.get(key)
+    if blacklisted is None:
+        blacklisted = BlacklistedToken.objects.filter(token__jti=jti).exists()
+        # A blacklisted token stays blacklisted, so that answer is always
+        # safe to keep. "Not blacklisted" is only kept in a shared cache,
+        # where the logout's mark_blacklisted() overwrites it for every
+        # worker. add(), not set(): a concurrent blacklist() must win.
+        if blacklisted or settings.SHARED_CACHE:
+            cache.add(key, blacklisted, _timeout(exp))
+    return blacklisted
+
+
+def mark_blacklisted(jti, exp):
+    cache.set(BLACKLIST_KEY.format(jti), True, _timeout(exp))
+
+
+class CachedBlacklistMixin:
+    # For RefreshToken subclasses: answers "is this token blacklisted?" from
+    # the cache, asking the database once per token (every time, for tokens
+    # that aren't blacklisted, unless settings.SHARED_CACHE). An evicted
+    # entry only costs another lookup, never a wrong answer.
+
+    def check_blacklist(self):
+        if is_blacklisted(self.payload[api_settings.JTI_CLAIM], self.payload["exp"]):
+            raise TokenError("Token is blacklisted")
+
+    def blacklist(self):
+        result = super().blacklist()
+        mark_blacklisted(self.payload[api_settings.JTI_CLAIM], self.payload["exp"])
+        return result
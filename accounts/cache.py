@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.core.cache import cache
+
+USER_KEY = "accounts:user:{}"
+INACTIVE_KEY = "accounts:user:{}:inactive"
+
+# The password hash stays out of the cache.
+UNCACHED_FIELDS = {"password"}
+
+
+def get_user_fields(pk):
+    from .models import User
+
+    if not settings.SHARED_CACHE:
+        # Another worker's save wouldn't invalidate our copy.
+        return None
+    key = USER_KEY.format(pk)
+    fields = cache.get(key)
+    if fields is None:
+        names = [field.attname for field in User._meta.concrete_fields if field.attname not in UNCACHED_FIELDS]
+        fields = User.objects.filter(pk=pk).values(*names).first()
+        if fields is None:
+            return None
+        cache.set(key, fields, settings.USER_CACHE_TIMEOUT)
+    return fields
+
+
+def is_deactivated(pk):
+    return cache.get(INACTIVE_KEY.format(pk)) is not None
+
+
+def invalidate_user(pk, active=True):
+    cache.delete(USER_KEY.format(pk))
+    if active:
+        cache.delete(INACTIVE_KEY.format(pk))
+    else:
+        # Outstanding access tokens still claim is_active; remember otherwise
+        # until the last of them has expired.
+        timeout = settings.SIMPLE_JWT["ACCESS_TOKEN_LIFETIME"].total_seconds()
+        cache.set(INACTIVE_KEY.format(pk), True, timeout)
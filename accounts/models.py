@@ -35,4 +35,23 @@ class User(AbstractBaseUser, PermissionsMixin):
     REQUIRED_FIELDS = ["name"]
 
     def __str__(self):
-        return self.email
\ No newline at end of file
+        return self.email
+
+class TokenUser(User):
+    # A User rebuilt from access token claims by ClaimsJWTAuthentication. Only
+    # the claimed fields are loaded; touching any other field fills them all
+    # in from the user cache, or the database on a cache miss.
+    class Meta:
+        proxy = True
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        from .cache import get_user_fields
+
+        deferred = self.get_deferred_fields()
+        if fields and from_queryset is None and deferred.issuperset(fields):
+            cached = get_user_fields(self.pk)
+            if cached is not None and cached.keys() >= set(fields):
+                for attname in deferred.intersection(cached):
+                    setattr(self, attname, cached[attname])
+                return
+        super().refresh_from_db(using, fields, from_queryset)
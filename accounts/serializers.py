@@ -1,6 +1,10 @@
 from django.contrib.auth import authenticate
 from rest_framework import serializers
+from rest_framework_simplejwt import serializers as jwt_serializers
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
 
+from .authentication import USER_CLAIMS, UserClaimsRefreshToken
 from .models import User
 
 class RegisterSerializer(serializers.ModelSerializer):
@@ -40,4 +44,33 @@ class ProfileSerializer(serializers.Serializer):
     class Meta:
         model = User
         fields = ["id", "name", "email", "phone"]
-        read_only_fields = ["email"]
\ No newline at end of file
+        read_only_fields = ["email"]
+
+
+class TokenRefreshSerializer(jwt_serializers.TokenRefreshSerializer):
+    token_class = UserClaimsRefreshToken
+
+    def validate(self, attrs):
+        # The claims are re-read on every refresh, so a demotion or an email
+        # change reaches new access tokens instead of lasting until the
+        # refresh token expires.
+        refresh = self.token_class(attrs["refresh"])
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM)
+        user = User.objects.filter(**{api_settings.USER_ID_FIELD: user_id}).first() if user_id else None
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages["no_active_account"], "no_active_account")
+        for claim in USER_CLAIMS:
+            refresh[claim] = getattr(user, claim)
+
+        data = {"access": str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+            data["refresh"] = str(refresh)
+
+        return data
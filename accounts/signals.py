@@ -0,0 +1,17 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import invalidate_user
+from .models import TokenUser, User
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=TokenUser)
+def invalidate_cached_user(sender, instance, **kwargs):
+    invalidate_user(instance.pk, active=instance.is_active)
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=TokenUser)
+def revoke_deleted_user(sender, instance, **kwargs):
+    invalidate_user(instance.pk, active=False)
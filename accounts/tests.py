@@ -1,3 +1,189 @@
-from django.test import TestCase
+import io
+from datetime import timedelta
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .authentication import ClaimsJWTAuthentication, UserClaimsRefreshToken
+from .management.commands.prune_tokens import prune_expired_tokens
+from .models import TokenUser, User
+
+
+@override_settings(SHARED_CACHE=True)
+class ClaimsJWTAuthenticationTests(TestCase):
+    url = "/api/orders/my-orders/"
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="buyer@example.com", password="password123", name="Buyer")
+        self.client = APIClient()
+
+    def authenticate(self, token):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def claims_token(self):
+        return UserClaimsRefreshToken.for_user(self.user).access_token
+
+    def test_login_issues_claims(self):
+        response = self.client.post("/api/accounts/login/", {"email": "buyer@example.com", "password": "password123"})
+
+        access = AccessToken(response.data["tokens"]["access"])
+        self.assertEqual(access["email"], "buyer@example.com")
+        self.assertIs(access["is_active"], True)
+        self.assertIs(access["is_staff"], False)
+
+    def test_claims_save_the_user_query(self):
+        self.authenticate(AccessToken.for_user(self.user))
+        with CaptureQueriesContext(connection) as legacy:
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+
+        self.authenticate(self.claims_token())
+        with CaptureQueriesContext(connection) as claims:
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+
+        self.assertEqual(len(claims), len(legacy) - 1)
+        self.assertFalse([q for q in claims.captured_queries if "accounts_user" in q["sql"]])
+
+    def test_other_fields_load_lazily_through_the_cache(self):
+        user = ClaimsJWTAuthentication().get_user(self.claims_token())
+
+        self.assertIsInstance(user, User)
+        self.assertEqual(user.pk, self.user.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(user.email, "buyer@example.com")
+            self.assertTrue(user.is_authenticated)
+        with self.assertNumQueries(1):
+            self.assertEqual(user.name, "Buyer")
+
+        again = ClaimsJWTAuthentication().get_user(self.claims_token())
+        with self.assertNumQueries(0):
+            self.assertEqual(again.phone, "")
+
+    def test_saving_a_user_invalidates_the_cache(self):
+        ClaimsJWTAuthentication().get_user(self.claims_token()).name
+        self.user.name = "Renamed"
+        self.user.save()
+
+        self.assertEqual(ClaimsJWTAuthentication().get_user(self.claims_token()).name, "Renamed")
+
+    def test_deactivated_user_is_rejected_before_token_expiry(self):
+        self.authenticate(self.claims_token())
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+        self.user.is_active = True
+        self.user.save()
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    @override_settings(SHARED_CACHE=False)
+    def test_per_process_cache_checks_the_database(self):
+        self.authenticate(self.claims_token())
+        # As if another worker had deactivated the user: no marker here.
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+        User.objects.filter(pk=self.user.pk).update(is_active=True, name="Renamed")
+        user = ClaimsJWTAuthentication().get_user(self.claims_token())
+        self.assertNotIsInstance(user, TokenUser)
+        self.assertEqual(user.name, "Renamed")
+
+    def test_saving_token_user_only_writes_loaded_fields(self):
+        user = ClaimsJWTAuthentication().get_user(self.claims_token())
+        user.is_staff = True
+        user.save()
+
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.is_staff)
+        self.assertTrue(self.user.check_password("password123"))
+        self.assertIsInstance(user, TokenUser)
+
+
+class TokenBlacklistTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="buyer@example.com", password="password123", name="Buyer")
+        self.refresh = UserClaimsRefreshToken.for_user(self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.refresh.access_token}")
+
+    def refresh_access(self):
+        return self.client.post("/api/accounts/token/refresh/", {"refresh": str(self.refresh)})
+
+    def test_refresh_keeps_user_claims(self):
+        response = self.refresh_access()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(AccessToken(response.data["access"])["email"], "buyer@example.com")
+
+    def test_refresh_reloads_user_claims(self):
+        User.objects.filter(pk=self.user.pk).update(email="moved@example.com", is_staff=True)
+        access = AccessToken(self.refresh_access().data["access"])
+        self.assertEqual((access["email"], access["is_staff"]), ("moved@example.com", True))
+
+        User.objects.filter(pk=self.user.pk).update(is_staff=False)
+        self.assertFalse(AccessToken(self.refresh_access().data["access"])["is_staff"])
+
+    def test_refresh_rejects_inactive_or_deleted_user(self):
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.refresh_access().status_code, 401)
+
+        self.user.delete()
+        self.assertEqual(self.refresh_access().status_code, 401)
+
+    @override_settings(SHARED_CACHE=True)
+    def test_blacklist_check_is_cached(self):
+        self.refresh_access()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.refresh_access().status_code, 200)
+
+        self.assertFalse([q for q in queries.captured_queries if "token_blacklist" in q["sql"]])
+
+    def test_logout_blacklists_despite_cached_check(self):
+        self.refresh_access()
+
+        response = self.client.post("/api/accounts/logout/", {"refresh": str(self.refresh)})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(BlacklistedToken.objects.filter(token__jti=self.refresh["jti"]).exists())
+        self.assertEqual(self.refresh_access().status_code, 401)
+        cache.clear()
+        self.assertEqual(self.refresh_access().status_code, 401)
+
+    @override_settings(SHARED_CACHE=False)
+    def test_per_process_cache_sees_other_workers_logouts(self):
+        self.refresh_access()
+        # As if another worker, with its own cache, had handled the logout.
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=self.refresh["jti"]))
+
+        self.assertEqual(self.refresh_access().status_code, 401)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.refresh_access().status_code, 401)
+
+    def test_prune_deletes_only_expired_tokens_in_batches(self):
+        now = timezone.now()
+        for i in range(5):
+            token = OutstandingToken.objects.create(
+                user=self.user, jti=f"old{i}", token="", expires_at=now - timedelta(hours=1),
+            )
+            if i % 2:
+                BlacklistedToken.objects.create(token=token)
+
+        self.assertEqual(prune_expired_tokens(batch_size=2, now=now), 5)
+
+        self.assertEqual(list(OutstandingToken.objects.values_list("jti", flat=True)), [self.refresh["jti"]])
+        self.assertFalse(BlacklistedToken.objects.exists())
+
+    def test_prune_command(self):
+        out = io.StringIO()
+        call_command("prune_tokens", stdout=out)
+        self.assertIn("Deleted 0 expired token(s)", out.getvalue())
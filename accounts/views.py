@@ -2,8 +2,8 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from rest_framework import status
-from rest_framework_simplejwt.tokens import RefreshToken
 
+from .authentication import UserClaimsRefreshToken
 from .serializers import RegisterSerializer, LoginSerializer, ProfileSerializer
 
 # Create your views here.
@@ -25,7 +25,7 @@ class LoginView(APIView):
         serializer = LoginSerializer(data=request.data)
         if serializer.is_valid():
             user = serializer.validated_data["user"]
-            refresh = RefreshToken.for_user(user)
+            refresh = UserClaimsRefreshToken.for_user(user)
 
             return Response({
                 "message": "Login successful",
@@ -50,7 +50,7 @@ class LogoutView(APIView):
     def post(self, request):
         try:
             refresh = request.data["refresh"]
-            token = RefreshToken(refresh)
+            token = UserClaimsRefreshToken(refresh)
             token.blacklist()
 
             return Response({
@@ -0,0 +1,182 @@
+"""
+Load test: gunicorn + sync views (WSGI) versus uvicorn + async views (ASGI).
+
+    python -m benchmarks.asgi --concurrency 50 --requests 500 --gateway-latency 0.2
+
+Builds a throwaway SQLite database, then serves it from a subprocess twice:
+gunicorn running ebazaar.wsgi, and uvicorn running ebazaar.asgi with
+ASYNC_API=True, each with --workers worker processes. Checkout calls a
+FakeRazorpay that answers after --gateway-latency seconds; that wait is where
+a sync worker sits idle and the event loop keeps serving.
+
+Requires gunicorn, uvicorn and httpx. SQLite serializes writes, so concurrent
+checkouts hit "database is locked"; pass --database-url with an empty Postgres
+database (it is migrated and seeded) for meaningful checkout numbers.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from decimal import Decimal
+from pathlib import Path
+
+from . import percentile, print_table
+
+ROOT = Path(__file__).resolve().parent.parent
+SERVERS = {
+    "wsgi": lambda port, workers: [
+        sys.executable, "-m", "gunicorn", "ebazaar.wsgi",
+        "--bind", f"127.0.0.1:{port}", "--workers", str(workers), "--log-level", "warning",
+    ],
+    "asgi": lambda port, workers: [
+        sys.executable, "-m", "uvicorn", "ebazaar.asgi:application",
+        "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers),
+        "--log-level", "warning", "--no-access-log",
+    ],
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def seed(users, products):
+    import django
+    django.setup()
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from rest_framework_simplejwt.tokens import AccessToken
+    from store.models import Product
+
+    call_command("migrate", verbosity=0)
+    product_ids = [
+        product.pk for product in Product.objects.bulk_create([
+            Product(
+                title=f"Product {i}",
+                description="Your perfect pack for everyday use and walks in the forest.",
+                price=Decimal("109.95"),
+                image=f"https://fakestoreapi.com/img/{i}.png",
+                stock=10 ** 9,
+            )
+            for i in range(products)
+        ])
+    ]
+    User = get_user_model()
+    tokens = [
+        str(AccessToken.for_user(User.objects.create_user(
+            email=f"load{i}@example.com", password="password123", name=f"Load {i}",
+        )))
+        for i in range(users)
+    ]
+    return product_ids, tokens
+
+
+async def load(base_url, scenario, requests, concurrency, product_ids, tokens):
+    import httpx
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    results = []
+    counter = iter(range(requests))
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        async def send(i):
+            headers = {"Authorization": f"Bearer {tokens[i % len(tokens)]}"}
+            if scenario == "products":
+                return await client.get("/api/store/", params={"page": 1 + i % 10})
+            if scenario == "my-orders":
+                return await client.get("/api/orders/my-orders/", headers=headers)
+            # Alternate quantities so every checkout needs a new Razorpay order.
+            return await client.post("/api/orders/payment/create/", headers=headers, json={
+                "items": [{"product": product_ids[i % len(product_ids)], "quantity": 1 + (i // len(tokens)) % 2}],
+                "delivery_charges": "0.00",
+                "tax": "0.00",
+            })
+
+        async def worker():
+            for i in counter:
+                start = time.perf_counter()
+                try:
+                    ok = (await send(i)).status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                results.append((ok, time.perf_counter() - start))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies = [latency for _, latency in results]
+    return (
+        f"{sum(ok for ok, _ in results)}/{requests}",
+        f"{requests / elapsed:,.0f}",
+        f"{percentile(latencies, 50) * 1000:.1f}",
+        f"{percentile(latencies, 99) * 1000:.1f}",
+    )
+
+
+def wait_for(port, process, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("server exited during startup")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.2).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("server did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--gateway-latency", type=float, default=0.2)
+    parser.add_argument("--database-url")
+    parser.add_argument("--servers", nargs="+", default=list(SERVERS), choices=list(SERVERS))
+    parser.add_argument(
+        "--scenarios", nargs="+", default=["products", "my-orders", "checkout"],
+        choices=["products", "my-orders", "checkout"],
+    )
+    args = parser.parse_args()
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "ebazaar.settings")
+    from orders.testing import FakeRazorpay
+
+    with tempfile.TemporaryDirectory() as tmp, FakeRazorpay(latency=args.gateway_latency) as fake:
+        os.environ["DATABASE_URL"] = args.database_url or f"sqlite:///{tmp}/load.sqlite3"
+        os.environ["RAZORPAY_BASE_URL"] = fake.url
+        os.environ.setdefault("RAZORPAY_KEY_ID", "rzp_test_load")
+        os.environ.setdefault("RAZORPAY_KEY_SECRET", "secret")
+        product_ids, tokens = seed(args.users, 120)
+
+        rows = []
+        for server in args.servers:
+            port = free_port()
+            env = dict(os.environ, ASYNC_API=str(server == "asgi"))
+            process = subprocess.Popen(SERVERS[server](port, args.workers), cwd=ROOT, env=env)
+            try:
+                wait_for(port, process)
+                for scenario in args.scenarios:
+                    result = asyncio.run(load(
+                        f"http://127.0.0.1:{port}", scenario, args.requests,
+                        args.concurrency, product_ids, tokens,
+                    ))
+                    rows.append((server, scenario, *result))
+            finally:
+                process.terminate()
+                process.wait()
+
+    print_table(("server", "scenario", "ok", "req/s", "p50 ms", "p99 ms"), rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Queries and latency per authenticated request: user loaded from the database
+versus rebuilt from access token claims.
+
+    python -m benchmarks.auth --requests 500
+
+Calls my-orders/ with a plain simplejwt access token (no user claims, so
+ClaimsJWTAuthentication falls back to loading the user like JWTAuthentication
+did) and with a token from UserClaimsRefreshToken, as login now issues. Runs
+with SHARED_CACHE, which the claims path needs.
+"""
+import argparse
+from decimal import Decimal
+
+from . import measure, print_table, setup, summarize, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--orders", type=int, default=10)
+    args = parser.parse_args()
+
+    setup()
+    from django.contrib.auth import get_user_model
+    from django.db import connection, reset_queries
+    from django.test import override_settings
+    from django.test.utils import CaptureQueriesContext
+    from rest_framework.test import APIClient
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from accounts.authentication import UserClaimsRefreshToken
+    from orders.models import Order
+
+    # One process, so even the local-memory cache is shared; without
+    # SHARED_CACHE the claims path falls back to the database too.
+    with test_database(), override_settings(SHARED_CACHE=True):
+        user = get_user_model().objects.create_user(email="bench@example.com", password="x" * 8, name="Bench")
+        Order.objects.bulk_create([
+            Order(user=user, total=Decimal("10.00"), delivery_charges=0, tax=0, grand_total=Decimal("10.00"))
+            for _ in range(args.orders)
+        ])
+        tokens = {
+            "database user": AccessToken.for_user(user),
+            "token claims": UserClaimsRefreshToken.for_user(user).access_token,
+        }
+
+        rows = []
+        for name, token in tokens.items():
+            client = APIClient()
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+            reset_queries()  # request_started clears the log mid-capture otherwise
+            with CaptureQueriesContext(connection) as queries:
+                assert client.get("/api/orders/my-orders/").status_code == 200
+            # Read now: measure()'s requests clear connection.queries_log.
+            query_count = len(queries)
+            stats = summarize(measure(lambda: client.get("/api/orders/my-orders/"), args.requests))
+            rows.append((
+                name,
+                query_count,
+                f"{stats['mean_ms']:.2f}",
+                f"{stats['p50_ms']:.2f}",
+                f"{stats['p99_ms']:.2f}",
+            ))
+
+    print_table(("user from", "queries/request", "mean ms", "p50 ms", "p99 ms"), rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Catalogue import throughput and memory: loaddata of a Django fixture versus
+import_products streaming NDJSON/CSV/JSON and upserting by SKU.
+
+    python -m benchmarks.catalog_import --products 1000000 --loaddata-products 50000
+    python -m benchmarks.catalog_import --trace-memory
+
+loaddata parses the whole fixture and saves one object at a time, so it gets
+its own (smaller) --loaddata-products count; compare rows/s, not totals.
+import_products runs twice per format: once inserting into an empty table
+and once updating every row. --trace-memory reports peak Python allocations
+with tracemalloc, which slows everything down several times over.
+"""
+import argparse
+import csv
+import json
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+from . import print_table, setup, test_database
+
+FIELDS = ("sku", "title", "description", "price", "image", "stock")
+
+
+def product(i):
+    return {
+        "sku": f"BENCH-{i:08d}",
+        "title": f"Product {i}",
+        "description": f"Description of product {i} for the catalogue import benchmark.",
+        "price": f"{10 + i % 500}.{i % 100:02d}",
+        "image": f"https://example.com/img/{i}.png",
+        "stock": i % 50,
+    }
+
+
+def write_files(directory, count, fixture_count):
+    paths = {name: Path(directory) / f"products.{name}" for name in ("ndjson", "csv", "json")}
+    with open(paths["ndjson"], "w") as ndjson, open(paths["csv"], "w", newline="") as csv_file, \
+            open(paths["json"], "w") as array:
+        writer = csv.DictWriter(csv_file, FIELDS)
+        writer.writeheader()
+        array.write("[\n")
+        for i in range(count):
+            row = product(i)
+            ndjson.write(json.dumps(row) + "\n")
+            writer.writerow(row)
+            array.write(("," if i else "") + json.dumps(row) + "\n")
+        array.write("]\n")
+
+    now = datetime.now(timezone.utc).isoformat()
+    fixture = Path(directory) / "fixture.json"
+    with open(fixture, "w") as f:
+        json.dump([
+            {"model": "store.product", "pk": i + 1, "fields": {**product(i), "created_at": now, "updated_at": now}}
+            for i in range(fixture_count)
+        ], f)
+    return paths, fixture
+
+
+def timed(fn, trace):
+    if trace:
+        tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] if trace else None
+    if trace:
+        tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=200_000)
+    parser.add_argument("--loaddata-products", type=int, default=20_000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--trace-memory", action="store_true")
+    args = parser.parse_args()
+
+    setup()
+    from django.core.management import call_command
+
+    from store.importers import import_products, read_rows
+    from store.models import Product
+
+    def row(name, count, elapsed, peak):
+        memory = f"{peak / 2**20:.1f}" if peak is not None else "-"
+        return (name, f"{count:,}", f"{elapsed:.1f}", f"{count / elapsed:,.0f}", memory)
+
+    with tempfile.TemporaryDirectory() as directory, test_database():
+        start = time.perf_counter()
+        paths, fixture = write_files(directory, args.products, args.loaddata_products)
+        print(f"wrote {args.products:,} products per format in {time.perf_counter() - start:.1f}s")
+
+        rows = []
+        elapsed, peak = timed(lambda: call_command("loaddata", fixture, verbosity=0), args.trace_memory)
+        rows.append(row("loaddata fixture", args.loaddata_products, elapsed, peak))
+        Product.objects.all().delete()
+
+        for format, path in paths.items():
+            def run():
+                with open(path, newline="") as stream:
+                    import_products(read_rows(stream, format), args.batch_size)
+
+            for phase in ("insert", "update"):
+                elapsed, peak = timed(run, args.trace_memory)
+                rows.append(row(f"import_products {format} ({phase})", args.products, elapsed, peak))
+            Product.objects.all().delete()
+
+    print_table(("method", "rows", "seconds", "rows/s", "peak MiB"), rows)
+
+
+if __name__ == "__main__":
+    main()
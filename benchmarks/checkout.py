@@ -0,0 +1,106 @@
+"""
+Checkout latency versus cart size.
+
+    python -m benchmarks.checkout --sizes 1 10 50 100
+
+"before" replays the old per-line Product.objects.get + OrderItem.objects.create
+loop; "after" is the in_bulk + bulk_create path used by CreateOrderPaymentView.
+Both run inside a transaction, like the view. The full POST is timed as
+well, with the Razorpay client stubbed out.
+"""
+import argparse
+from decimal import Decimal
+from unittest import mock
+
+from . import measure, print_table, setup, summarize, test_database
+
+
+def legacy_write_items(order, items):
+    from orders.models import OrderItem
+    from store.models import Product
+
+    OrderItem.objects.filter(order=order).delete()
+    for item in items:
+        product = Product.objects.get(id=item["product"])
+        OrderItem.objects.create(
+            order=order,
+            product=product,
+            quantity=item["quantity"],
+            price=product.price,
+        )
+
+
+def bulk_write_items(order, items):
+    from orders.checkout import resolve_cart, write_order_items
+
+    lines, _ = resolve_cart(items)
+    write_order_items(order, lines)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 50, 100])
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    setup()
+    from django.contrib.auth import get_user_model
+    from django.db import transaction
+    from rest_framework.test import APIClient
+    from orders.models import Order
+    from store.models import Product
+
+    with test_database():
+        user = get_user_model().objects.create_user(
+            email="bench@example.com", password="benchmark", name="Bench",
+        )
+        products = Product.objects.bulk_create([
+            Product(title=f"P{i}", description="", price=Decimal("10.00"),
+                    image="https://example.com/p.png", stock=10**6)
+            for i in range(max(args.sizes))
+        ])
+        order = Order.objects.create(
+            user=user, total=0, delivery_charges=0, tax=0, grand_total=0,
+        )
+
+        client = APIClient()
+        client.force_authenticate(user)
+
+        rows = []
+        with mock.patch("orders.views.client") as gateway:
+            gateway.order.create.return_value = {"id": "order_bench"}
+            for size in args.sizes:
+                items = [{"product": p.pk, "quantity": 1} for p in products[:size]]
+
+                def before():
+                    with transaction.atomic():
+                        legacy_write_items(order, items)
+
+                def after():
+                    with transaction.atomic():
+                        bulk_write_items(order, items)
+
+                payload = {"items": items, "delivery_charges": "0.00", "tax": "0.00"}
+                view = summarize(measure(
+                    lambda: client.post("/api/orders/payment/create/", payload, format="json"),
+                    args.repeat,
+                ))
+                before_stats = summarize(measure(before, args.repeat))
+                after_stats = summarize(measure(after, args.repeat))
+                rows.append((
+                    size,
+                    f"{before_stats['p50_ms']:.2f}",
+                    f"{after_stats['p50_ms']:.2f}",
+                    f"{before_stats['p50_ms'] / after_stats['p50_ms']:.1f}x",
+                    f"{view['p50_ms']:.2f}",
+                    f"{view['p95_ms']:.2f}",
+                ))
+
+        print_table(
+            ("lines", "before p50 ms", "after p50 ms", "speedup", "POST p50 ms", "POST p95 ms"),
+            rows,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Request latency with a new database connection per request versus persistent
+(CONN_MAX_AGE) connections, and Django's psycopg pool on PostgreSQL.
+
+    python -m benchmarks.db_connections --requests 500
+    python -m benchmarks.db_connections --connect-latency 0.03
+    DATABASE_URL=postgres://... python -m benchmarks.db_connections --pool
+
+Requests go through the full WSGI handler, so Django opens and closes
+connections exactly as it does behind gunicorn. A SQLite connection is
+nearly free; --connect-latency adds that many seconds to every new
+connection to stand in for the TCP/TLS/auth round trips of a hosted
+PostgreSQL. --pool needs PostgreSQL with psycopg[pool] installed.
+"""
+import argparse
+import io
+import sys
+import tempfile
+import time
+from decimal import Decimal
+from pathlib import Path
+
+from . import print_table, setup, summarize, test_database
+
+
+def call(app, path, token):
+    environ = {
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": path,
+        "QUERY_STRING": "",
+        "SERVER_NAME": "localhost",
+        "SERVER_PORT": "80",
+        "HTTP_HOST": "localhost",
+        "HTTP_AUTHORIZATION": f"Bearer {token}",
+        "wsgi.url_scheme": "http",
+        "wsgi.input": io.BytesIO(),
+        "wsgi.errors": sys.stderr,
+    }
+    status = []
+    response = app(environ, lambda code, headers: status.append(code))
+    try:
+        b"".join(response)
+    finally:
+        response.close()  # sends request_finished, which closes old connections
+    return status[0]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--orders", type=int, default=20)
+    parser.add_argument("--connect-latency", type=float, default=0.0)
+    parser.add_argument("--pool", action="store_true")
+    args = parser.parse_args()
+
+    setup()
+    from django.contrib.auth import get_user_model
+    from django.core.wsgi import get_wsgi_application
+    from django.db import connection
+    from django.db.backends.signals import connection_created
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from ebazaar import db_metrics
+    from orders.models import Order
+
+    if connection.vendor == "sqlite":
+        # The default in-memory test database can't be closed and reopened.
+        tmp = tempfile.TemporaryDirectory()
+        connection.settings_dict["TEST"]["NAME"] = str(Path(tmp.name) / "connections.sqlite3")
+
+    modes = {"per request": {"CONN_MAX_AGE": 0}, "persistent": {"CONN_MAX_AGE": 600}}
+    if args.pool:
+        if connection.vendor != "postgresql":
+            parser.error("--pool needs a PostgreSQL DATABASE_URL")
+        modes["pool"] = {"CONN_MAX_AGE": 0, "OPTIONS": {**connection.settings_dict["OPTIONS"], "pool": True}}
+
+    if args.connect_latency:
+        connection_created.connect(lambda **kwargs: time.sleep(args.connect_latency), weak=False)
+
+    with test_database():
+        user = get_user_model().objects.create_user(email="bench@example.com", password="x" * 8, name="Bench")
+        Order.objects.bulk_create([
+            Order(user=user, total=Decimal("10.00"), delivery_charges=0, tax=0, grand_total=Decimal("10.00"))
+            for _ in range(args.orders)
+        ])
+        token = str(AccessToken.for_user(user))
+        app = get_wsgi_application()
+        original = dict(connection.settings_dict)
+
+        rows = []
+        for name, overrides in modes.items():
+            connection.close()
+            connection.settings_dict.update(original, **overrides)
+            call(app, "/api/orders/my-orders/", token)
+            db_metrics.reset()
+
+            samples = []
+            for _ in range(args.requests):
+                start = time.perf_counter()
+                assert call(app, "/api/orders/my-orders/", token).startswith("200")
+                samples.append(time.perf_counter() - start)
+
+            stats = summarize(samples)
+            opened = db_metrics.snapshot()["default"]["connections_opened"]
+            rows.append((
+                name,
+                args.requests,
+                opened,
+                f"{stats['mean_ms']:.2f}",
+                f"{stats['p50_ms']:.2f}",
+                f"{stats['p99_ms']:.2f}",
+            ))
+        connection.close()
+        connection.settings_dict.update(original)
+
+    print_table(("connections", "requests", "opened", "mean ms", "p50 ms", "p99 ms"), rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+"""
+End-to-end API benchmark with a committed baseline.
+
+    python -m benchmarks.e2e
+    python -m benchmarks.e2e --endpoints checkout verify --requests 500
+    python -m benchmarks.e2e --update-baseline
+
+Seeds a test database with seed_load_data, then drives register, login,
+product list/detail, checkout (payment/create/), payment verification and
+the Razorpay webhook through the full Django stack. Razorpay is
+orders.testing.FakeRazorpay on a local port. Every endpoint reports
+throughput, p50/p95/p99 latency and queries per request, and is compared
+with benchmarks/e2e_baseline.json. The run exits non-zero when an endpoint
+issues more queries than the baseline (beyond --query-slack) or its p95
+is more than --tolerance slower.
+
+Latency depends on the machine: refresh the baseline with --update-baseline
+on the machine that enforces it. Query counts are the portable signal.
+Password hashing dominates register and login, so they run --auth-requests
+times instead of --requests.
+"""
+import argparse
+import hashlib
+import hmac
+import io
+import itertools
+import json
+import sys
+import time
+from contextlib import ExitStack
+from pathlib import Path
+from unittest import mock
+
+from . import print_table, setup, summarize, test_database
+
+BASELINE = Path(__file__).with_name("e2e_baseline.json")
+ENDPOINTS = ("register", "login", "product list", "product detail", "checkout", "verify", "webhook")
+PASSWORD = "loadtest-password"
+KEY_SECRET = "bench-key-secret"
+WEBHOOK_SECRET = "bench-webhook-secret"
+
+
+def sign(secret, message):
+    return hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Scenario:
+    # Runs each endpoint's request and records latency and query counts.
+
+    def __init__(self):
+        from rest_framework.test import APIClient
+
+        from accounts.authentication import UserClaimsRefreshToken
+        from accounts.models import User
+        from orders.models import Order
+        from store.models import Product
+
+        self.counter = QueryCounter()
+        self.samples = {name: [] for name in ENDPOINTS}
+        self.queries = dict.fromkeys(ENDPOINTS, 0)
+        self.client = APIClient()
+        users = list(User.objects.order_by("pk")[:500])
+        self.emails = itertools.cycle(user.email for user in users)
+        # Buyers get tokens minted directly; logging each one in would mostly time the password hasher.
+        self.tokens = itertools.cycle(str(UserClaimsRefreshToken.for_user(user).access_token) for user in users[:50])
+        self.products = list(Product.objects.filter(stock__gte=100).values_list("pk", flat=True)[:500])
+        self.product_ids = itertools.cycle(self.products)
+        self.pending = itertools.cycle(
+            Order.objects.filter(status="PENDING_PAYMENT").values_list("payment__razorpay_order_id", flat=True)[:1000]
+        )
+        self.sequence = itertools.count()
+
+    def call(self, name, method, path, expected, **kwargs):
+        start_queries = self.counter.count
+        start = time.perf_counter()
+        response = getattr(self.client, method)(path, **kwargs)
+        self.samples[name].append(time.perf_counter() - start)
+        self.queries[name] += self.counter.count - start_queries
+        assert response.status_code == expected, (name, response.status_code, response.content[:500])
+        return response
+
+    def register(self):
+        n = next(self.sequence)
+        self.client.credentials()
+        self.call("register", "post", "/api/accounts/register/", 201, data={
+            "email": f"bench{n}@example.com", "name": "Bench", "password": PASSWORD,
+        })
+
+    def login(self):
+        self.client.credentials()
+        self.call("login", "post", "/api/accounts/login/", 200, data={"email": next(self.emails), "password": PASSWORD})
+
+    def product_list(self):
+        page = next(self.sequence) % 5 + 1
+        self.call("product list", "get", "/api/store/", 200, data={"page": page})
+
+    def product_detail(self):
+        self.call("product detail", "get", f"/api/store/{next(self.product_ids)}/", 200)
+
+    def checkout_and_verify(self):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {next(self.tokens)}")
+        items = [{"product": next(self.product_ids), "quantity": 1} for _ in range(next(self.sequence) % 3 + 1)]
+        response = self.call("checkout", "post", "/api/orders/payment/create/", 200, format="json", data={
+            "items": items, "delivery_charges": "40.00", "tax": "5.00",
+        })
+        order_id = response.data["razorpay_order_id"]
+        payment_id = f"pay_bench{next(self.sequence)}"
+        self.call("verify", "post", "/api/orders/payment/verify/", 200, format="json", data={
+            "razorpay_order_id": order_id,
+            "razorpay_payment_id": payment_id,
+            "razorpay_signature": sign(KEY_SECRET, f"{order_id}|{payment_id}".encode()),
+        })
+
+    def webhook(self):
+        n = next(self.sequence)
+        body = json.dumps({
+            "event": "payment.captured",
+            "payload": {"payment": {"entity": {"id": f"pay_hook{n}", "order_id": next(self.pending)}}},
+        }).encode()
+        self.client.credentials()
+        self.call(
+            "webhook", "post", "/api/orders/payment/webhook/", 200,
+            data=body, content_type="application/json",
+            HTTP_X_RAZORPAY_SIGNATURE=sign(WEBHOOK_SECRET, body), HTTP_X_RAZORPAY_EVENT_ID=f"evt_bench{n}",
+        )
+
+    def run(self, endpoints, requests, auth_requests, warmup):
+        steps = [
+            ("register", self.register, auth_requests),
+            ("login", self.login, auth_requests),
+            ("product list", self.product_list, requests),
+            ("product detail", self.product_detail, requests),
+            ("checkout", self.checkout_and_verify, requests),
+            ("webhook", self.webhook, requests),
+        ]
+        from django.db import connections
+
+        # Every alias, so reads routed to the replica are counted too.
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(self.counter))
+            for name, step, count in steps:
+                if name not in endpoints and not (name == "checkout" and "verify" in endpoints):
+                    continue
+                for _ in range(warmup):
+                    step()
+                for samples in self.samples.values():
+                    samples.clear()
+                self.queries = dict.fromkeys(ENDPOINTS, 0)
+                start = time.perf_counter()
+                for _ in range(count):
+                    step()
+                yield from self.results(name, time.perf_counter() - start, endpoints)
+
+    def results(self, name, elapsed, endpoints):
+        for endpoint in (name, "verify") if name == "checkout" else (name,):
+            samples = self.samples[endpoint]
+            if endpoint not in endpoints or not samples:
+                continue
+            stats = summarize(samples)
+            yield endpoint, {
+                "requests": len(samples),
+                # checkout and verify share the wall clock, so use their own latency.
+                "rps": round(len(samples) / (sum(samples) if name == "checkout" else elapsed), 1),
+                "p50_ms": round(stats["p50_ms"], 2),
+                "p95_ms": round(stats["p95_ms"], 2),
+                "p99_ms": round(stats["p99_ms"], 2),
+                "queries": round(self.queries[endpoint] / len(samples), 2),
+            }
+
+
+def compare(results, baseline, tolerance, query_slack):
+    verdicts = {}
+    for endpoint, current in results.items():
+        previous = baseline.get(endpoint)
+        if previous is None:
+            verdicts[endpoint] = "new"
+            continue
+        problems = []
+        if current["queries"] > previous["queries"] + query_slack:
+            problems.append(f"queries {previous['queries']} -> {current['queries']}")
+        if current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            problems.append(f"p95 {previous['p95_ms']} -> {current['p95_ms']} ms")
+        verdicts[endpoint] = "; ".join(problems) or "ok"
+    return verdicts
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=list(ENDPOINTS))
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--auth-requests", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--users", type=int, default=500)
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--orders", type=int, default=10000)
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Allowed p95 slowdown, 0.5 = 50%%.")
+    parser.add_argument("--query-slack", type=float, default=0.5, help="Allowed extra queries per request.")
+    parser.add_argument("--update-baseline", action="store_true")
+    args = parser.parse_args()
+
+    setup()
+    from django.core.cache import cache
+    from django.core.management import call_command
+    from django.test import override_settings
+
+    from orders.gateway import build_client
+    from orders.testing import FakeRazorpay
+
+    # One process, so even the local-memory cache is shared: measure the
+    # SHARED_CACHE configuration production runs with.
+    settings = override_settings(
+        RAZORPAY_KEY_ID="rzp_bench", RAZORPAY_KEY_SECRET=KEY_SECRET, RAZORPAY_WEBHOOK_SECRET=WEBHOOK_SECRET,
+        SHARED_CACHE=True,
+    )
+    with test_database(), settings, FakeRazorpay() as fake:
+        call_command(
+            "seed_load_data", "--users", str(args.users), "--products", str(args.products),
+            "--orders", str(args.orders), "--password", PASSWORD, stdout=io.StringIO(),
+        )
+        cache.clear()
+        with override_settings(RAZORPAY_BASE_URL=fake.url), mock.patch("orders.views.client", build_client()):
+            scenario = Scenario()
+            results = dict(scenario.run(args.endpoints, args.requests, args.auth_requests, args.warmup))
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    verdicts = compare(results, baseline, args.tolerance, args.query_slack)
+    print_table(
+        ("endpoint", "requests", "req/s", "p50 ms", "p95 ms", "p99 ms", "queries/req", "vs baseline"),
+        [
+            (name, r["requests"], r["rps"], r["p50_ms"], r["p95_ms"], r["p99_ms"], r["queries"], verdicts[name])
+            for name, r in results.items()
+        ],
+    )
+
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps({**baseline, **results}, indent=4) + "\n")
+        print(f"Wrote {args.baseline}")
+        return
+    regressions = [name for name, verdict in verdicts.items() if verdict not in ("ok", "new")]
+    if regressions:
+        sys.exit(f"Regressed against {args.baseline.name}: {', '.join(regressions)}")
+
+
+if __name__ == "__main__":
+    main()
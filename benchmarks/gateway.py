@@ -0,0 +1,88 @@
+"""
+Razorpay order creation under a healthy, slow, flaky and failing gateway.
+
+    python -m benchmarks.gateway --calls 400 --concurrency 16
+
+Runs concurrent order.create calls against orders.testing.FakeRazorpay,
+comparing a stock razorpay.Client (no timeouts, no breaker) with the
+GatewayClient used by the checkout. A slow gateway is slower than the read
+timeout, so GatewayClient gives up and the circuit breaker starts failing fast.
+"""
+import argparse
+import contextlib
+import io
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from . import percentile, print_table, setup
+
+SCENARIOS = {
+    "healthy": {"latency": 0.02},
+    "slow": {"latency": 1.0},
+    "flaky": {"latency": 0.02, "error_rate": 0.3},
+    "down": {"latency": 0.02, "error_rate": 1.0},
+}
+
+
+def run(client, calls, concurrency):
+    def call(_):
+        start = time.perf_counter()
+        try:
+            client.order.create({"amount": 10000, "currency": "INR", "payment_capture": 1})
+            ok = True
+        except Exception:
+            ok = False
+        return ok, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(call, range(calls)))
+    elapsed = time.perf_counter() - start
+    latencies = [latency for _, latency in results]
+    return (
+        sum(ok for ok, _ in results),
+        f"{calls / elapsed:,.0f}",
+        f"{percentile(latencies, 50) * 1000:.1f}",
+        f"{percentile(latencies, 99) * 1000:.1f}",
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--calls", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--read-timeout", type=float, default=0.5)
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    args = parser.parse_args()
+
+    setup()
+    logging.disable(logging.WARNING)
+    import razorpay
+    from orders.gateway import CircuitBreaker, GatewayClient
+    from orders.testing import FakeRazorpay
+
+    rows = []
+    for scenario in args.scenarios:
+        clients = {
+            "razorpay.Client": lambda url: razorpay.Client(auth=("key", "secret"), base_url=url),
+            "GatewayClient": lambda url: GatewayClient(
+                auth=("key", "secret"),
+                base_url=url,
+                timeout=(1, args.read_timeout),
+                pool_size=args.concurrency,
+                breaker=CircuitBreaker(failure_threshold=5, reset_timeout=30),
+            ),
+        }
+        for name, build in clients.items():
+            with FakeRazorpay(**SCENARIOS[scenario]) as fake:
+                # The stock client prints every failure.
+                with contextlib.redirect_stdout(io.StringIO()):
+                    ok, rate, p50, p99 = run(build(fake.url), args.calls, args.concurrency)
+                rows.append((scenario, name, f"{ok}/{args.calls}", fake.requests, rate, p50, p99))
+
+    print_table(("gateway", "client", "ok", "upstream calls", "calls/s", "p50 ms", "p99 ms"), rows)
+
+
+if __name__ == "__main__":
+    main()
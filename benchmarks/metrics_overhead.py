@@ -0,0 +1,94 @@
+"""
+Cost of the request metrics middleware (ebazaar.metrics).
+
+    python -m benchmarks.metrics_overhead --requests 2000
+
+Times a cached product detail (the cheapest request the API serves, so the
+overhead is most visible), the product list and my-orders with the
+middleware and query wrapper installed and removed. Rounds alternate
+between the two so drift hits both equally. The difference in p50 is what
+every request pays for Server-Timing and the /metrics histograms.
+"""
+import argparse
+from decimal import Decimal
+
+from . import measure, print_table, setup, summarize, test_database
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    setup()
+    from django.conf import settings
+    from django.contrib.auth import get_user_model
+    from django.db import connection
+    from django.test import override_settings
+    from rest_framework.test import APIClient
+
+    from ebazaar import metrics
+    from orders.models import Order
+    from store.models import Product
+
+    middleware = "ebazaar.metrics.request_metrics_middleware"
+    without = [name for name in settings.MIDDLEWARE if name != middleware]
+
+    with test_database():
+        user = get_user_model().objects.create_user(email="bench@example.com", password="x" * 8, name="Bench")
+        Order.objects.bulk_create([
+            Order(user=user, total=Decimal("10.00"), delivery_charges=0, tax=0, grand_total=Decimal("10.00"))
+            for _ in range(20)
+        ])
+        product, *_ = Product.objects.bulk_create([
+            Product(title=f"P{i}", description="D", price=Decimal(10 + i), image="https://example.com/p.png", stock=1)
+            for i in range(30)
+        ])
+        paths = {
+            "product detail (cached)": f"/api/store/{product.pk}/",
+            "product list": "/api/store/?sort=price&page=2",
+            "my-orders": "/api/orders/my-orders/",
+        }
+
+        def get(api, path):
+            assert api.get(path).status_code == 200
+
+        def client():
+            client = APIClient()
+            client.force_authenticate(user)
+            return client
+
+        on = client()
+        with override_settings(MIDDLEWARE=without):
+            off = client()
+            get(off, "/api/store/")  # loads the handler while the override is active
+
+        samples = {(name, mode): [] for name in paths for mode in ("on", "off")}
+        per_round = max(1, args.requests // args.rounds)
+        for _ in range(args.rounds):
+            for mode, api in (("on", on), ("off", off)):
+                if mode == "off":
+                    connection.execute_wrappers.remove(metrics._time_query)
+                for name, path in paths.items():
+                    samples[name, mode] += measure(lambda: get(api, path), per_round, warmup=5)
+                if mode == "off":
+                    metrics._install(connection)
+
+        rows = []
+        for name in paths:
+            with_stats, without_stats = summarize(samples[name, "on"]), summarize(samples[name, "off"])
+            delta = with_stats["p50_ms"] - without_stats["p50_ms"]
+            rows.append((
+                name,
+                f"{without_stats['p50_ms']:.3f}",
+                f"{with_stats['p50_ms']:.3f}",
+                f"{delta * 1000:+.0f} us",
+                f"{delta / without_stats['p50_ms'] * 100:+.1f}%",
+            ))
+
+    print_table(("request", "off p50 ms", "on p50 ms", "overhead", "relative"), rows)
+
+
+if __name__ == "__main__":
+    main()
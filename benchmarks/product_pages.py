@@ -0,0 +1,101 @@
+"""
+Product list latency by page depth, page-number vs keyset pagination.
+
+    python -m benchmarks.product_pages --pages 10000
+
+Seeds ``pages * 12`` products and times a request for pages spread between
+the first and the last one in both modes, clearing the catalog cache before
+each request. Keyset latency should stay flat while page-number latency grows
+with the OFFSET.
+"""
+import argparse
+from decimal import Decimal
+from urllib.parse import unquote
+
+from . import measure, print_table, setup, summarize, test_database
+
+PAGE_SIZE = 12
+
+
+def seed(count):
+    from store.models import Product
+
+    # Rows in a batch share created_at, so the id tie-breaker is exercised.
+    batch = []
+    for i in range(count):
+        batch.append(Product(
+            title=f"Product {i}",
+            description="Lorem ipsum dolor sit amet " * 8,
+            price=Decimal(i % 5000) + Decimal("0.99"),
+            image=f"https://example.com/{i}.png",
+            stock=i % 40,
+        ))
+        if len(batch) == 5000:
+            Product.objects.bulk_create(batch)
+            batch = []
+    Product.objects.bulk_create(batch)
+
+
+def cursor_for_page(page):
+    from store.models import Product
+    from store.pagination import KeysetPagination
+
+    if page == 1:
+        return None
+    row = Product.objects.order_by("-created_at", "-id")[(page - 1) * PAGE_SIZE - 1]
+    paginator = KeysetPagination()
+    paginator.base_url = "http://testserver/api/store/"
+    url = paginator.encode_cursor(row, reverse=False)
+    return unquote(url.split("cursor=", 1)[1])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    setup()
+    from django.core.cache import cache
+    from rest_framework.test import APIClient
+
+    with test_database():
+        seed(args.pages * PAGE_SIZE)
+        client = APIClient()
+
+        def uncached_get(params):
+            # Otherwise every timed request is a catalog cache hit.
+            cache.clear()
+            return client.get("/api/store/", params)
+
+        depths = sorted({1, 10, 100, 1000, args.pages // 2, args.pages})
+        rows = []
+        for page in depths:
+            if page > args.pages:
+                continue
+            assert client.get("/api/store/", {"page": page}).status_code == 200
+            number = summarize(measure(
+                lambda: uncached_get({"page": page}), args.repeat,
+            ))
+            cursor = cursor_for_page(page)
+            params = {"cursor": cursor} if cursor else {"pagination": "cursor"}
+            assert client.get("/api/store/", params).status_code == 200
+            keyset = summarize(measure(
+                lambda: uncached_get(params), args.repeat,
+            ))
+            rows.append((
+                page,
+                f"{number['p50_ms']:.2f}",
+                f"{number['p95_ms']:.2f}",
+                f"{keyset['p50_ms']:.2f}",
+                f"{keyset['p95_ms']:.2f}",
+            ))
+
+        print_table(
+            ("page", "page# p50 ms", "page# p95 ms", "cursor p50 ms", "cursor p95 ms"),
+            rows,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Payload size and serialization cost of the product list, full vs sparse.
+
+    python -m benchmarks.product_payload
+
+Compares the default representation with ?view=compact and ?fields=...
+on a page of 12 products with realistic description lengths.
+"""
+import argparse
+from decimal import Decimal
+
+from . import measure, print_table, setup, summarize, test_database
+
+VARIANTS = {
+    "full (default)": {},
+    "view=compact": {"view": "compact"},
+    "fields=id,title,price,image": {"fields": "id,title,price,image"},
+}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    setup()
+    from django.core.cache import cache
+    from rest_framework.renderers import JSONRenderer
+    from rest_framework.request import Request
+    from rest_framework.test import APIClient, APIRequestFactory
+    from store.models import Product
+    from store.serializers import ProductListSerializer, ProductSerializer
+
+    with test_database():
+        Product.objects.bulk_create([
+            Product(
+                title=f"Product {i}",
+                description="Your perfect pack for everyday use and walks in the forest. " * 12,
+                price=Decimal("109.95"),
+                image=f"https://fakestoreapi.com/img/{i}.png",
+                stock=50,
+            )
+            for i in range(args.products)
+        ])
+
+        client = APIClient()
+        factory = APIRequestFactory()
+        renderer = JSONRenderer()
+        rows = []
+        for name, params in VARIANTS.items():
+            request = Request(factory.get("/api/store/", params))
+            serializer_class = ProductListSerializer if params.get("view") else ProductSerializer
+            fields = serializer_class.requested_fields(request)
+            page = list(
+                Product.objects.only(*serializer_class.only_columns(fields))
+                .order_by("-created_at", "-id")[:12]
+            )
+
+            def serialize():
+                return renderer.render(serializer_class(page, many=True, fields=fields).data)
+
+            payload = len(client.get("/api/store/", params).content)
+
+            def uncached_request():
+                cache.clear()
+                client.get("/api/store/", params)
+
+            rows.append((
+                name,
+                payload,
+                f"{summarize(measure(serialize, args.repeat))['p50_ms']:.3f}",
+                f"{summarize(measure(uncached_request, args.repeat // 4))['p50_ms']:.2f}",
+            ))
+
+        print_table(("variant", "bytes", "serialize p50 ms", "request p50 ms"), rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Product search latency on a large synthetic catalogue.
+
+    python -m benchmarks.search --products 100000
+
+Seeds products with titles and descriptions drawn from a fixed vocabulary,
+then times the search endpoint against a naive ``icontains`` scan. On
+SQLite the endpoint uses the in-process inverted index (its build time is
+reported separately); on Postgres it uses the GIN-indexed tsvector.
+"""
+import argparse
+import random
+import time
+from decimal import Decimal
+
+from . import measure, print_table, setup, summarize, test_database
+
+ADJECTIVES = [
+    "red", "blue", "green", "black", "white", "slim", "classic", "vintage",
+    "waterproof", "lightweight", "premium", "cotton", "leather", "wool",
+    "silver", "golden", "casual", "formal", "sports", "outdoor",
+]
+NOUNS = [
+    "jacket", "shirt", "backpack", "bracelet", "ring", "monitor", "drive",
+    "laptop", "sneakers", "boots", "dress", "scarf", "hat", "watch", "wallet",
+    "belt", "gloves", "headphones", "keyboard", "mouse",
+]
+FILLER = [f"word{i}" for i in range(5000)]
+
+QUERIES = {
+    "common word": "jacket",
+    "two words": "waterproof jacket",
+    "prefix": "headph",
+    "rare word": "word4321",
+    "no match": "zzzz",
+}
+
+
+def seed(count, rng):
+    from store.models import Product
+
+    batch = []
+    for i in range(count):
+        title = f"{rng.choice(ADJECTIVES)} {rng.choice(ADJECTIVES)} {rng.choice(NOUNS)}"
+        description = " ".join(rng.choices(ADJECTIVES + NOUNS + FILLER, k=25))
+        batch.append(Product(
+            title=title, description=description, price=Decimal("9.99"),
+            image="https://example.com/p.png", stock=1,
+        ))
+        if len(batch) == 5000:
+            Product.objects.bulk_create(batch)
+            batch = []
+    Product.objects.bulk_create(batch)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    setup()
+    from django.db.models import Q
+    from rest_framework.test import APIClient
+    from store.models import Product
+    from store.search import product_index, uses_postgres
+
+    with test_database():
+        seed(args.products, random.Random(args.seed))
+
+        if not uses_postgres():
+            start = time.perf_counter()
+            product_index.reset()
+            product_index.ensure_built()
+            print(f"inverted index built over {args.products} products "
+                  f"in {time.perf_counter() - start:.2f}s")
+
+        client = APIClient()
+        rows = []
+        for name, query in QUERIES.items():
+            hits = client.get("/api/store/search/", {"q": query}).data["count"]
+            indexed = summarize(measure(
+                lambda: client.get("/api/store/search/", {"q": query}), args.repeat,
+            ))
+
+            condition = Q()
+            for token in query.split():
+                condition &= Q(title__icontains=token) | Q(description__icontains=token)
+            matches = Product.objects.filter(condition)
+            # Count plus first page: what a paginated (if unranked) scan would cost.
+            scan = summarize(measure(
+                lambda: (matches.count(), list(matches.order_by("id")[:12])),
+                max(3, args.repeat // 4),
+            ))
+            rows.append((
+                name, hits,
+                f"{indexed['p50_ms']:.2f}", f"{indexed['p95_ms']:.2f}",
+                f"{scan['p50_ms']:.2f}",
+            ))
+
+        print_table(("query", "hits", "search p50 ms", "search p95 ms", "icontains p50 ms"), rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Serializer throughput, DRF ModelSerializer versus the .values() fast path.
+
+    python -m benchmarks.serializers --products 1000 --orders 200
+
+"serialize" times formatting rows that are already loaded (for orders the
+fast path still runs its one query per nested relation); "query+serialize"
+includes fetching the rows, with prefetch_related for DRF. Results are rows/sec.
+"""
+import argparse
+from decimal import Decimal
+
+from . import measure, print_table, setup, summarize, test_database
+
+
+def rows_per_second(samples, rows):
+    return f"{rows / (summarize(samples)['p50_ms'] / 1000):,.0f}"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=1000)
+    parser.add_argument("--orders", type=int, default=200)
+    parser.add_argument("--items", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=30)
+    args = parser.parse_args()
+
+    setup()
+    from django.contrib.auth import get_user_model
+    from orders.models import Order, OrderItem, OrderTracking
+    from orders.serializers import OrderSerializer
+    from store.models import Product
+    from store.serializers import ProductSerializer
+
+    with test_database():
+        products = Product.objects.bulk_create([
+            Product(
+                title=f"Product {i}",
+                description="Your perfect pack for everyday use and walks in the forest. " * 4,
+                price=Decimal("109.95"),
+                image=f"https://fakestoreapi.com/img/{i}.png",
+                stock=50,
+            )
+            for i in range(args.products)
+        ])
+        user = get_user_model().objects.create_user(
+            email="bench@example.com", password="password123", name="Bench",
+        )
+        orders = Order.objects.bulk_create([
+            Order(
+                user=user,
+                total=Decimal("100.00"),
+                delivery_charges=Decimal("40.00"),
+                tax=Decimal("18.00"),
+                grand_total=Decimal("158.00"),
+            )
+            for _ in range(args.orders)
+        ])
+        OrderItem.objects.bulk_create([
+            OrderItem(order=order, product=products[j % len(products)], quantity=1, price=Decimal("109.95"))
+            for order in orders
+            for j in range(args.items)
+        ])
+        OrderTracking.objects.bulk_create([
+            OrderTracking(order=order, status="Pending Payment") for order in orders
+        ])
+
+        cases = [
+            (
+                "products",
+                args.products,
+                ProductSerializer,
+                Product.objects.order_by("-created_at", "-id"),
+                (),
+            ),
+            (
+                "orders",
+                args.orders,
+                OrderSerializer,
+                Order.objects.filter(user=user).order_by("-id"),
+                ("items", "tracking_updates"),
+            ),
+        ]
+
+        rows = []
+        for name, count, serializer_class, queryset, prefetch in cases:
+            fast = serializer_class.values_serializer()
+            instances = list(queryset.prefetch_related(*prefetch))
+            values = list(queryset.values(*fast.columns))
+
+            def drf_serialize():
+                return serializer_class(instances, many=True).data
+
+            def fast_serialize():
+                return fast.serialize(values)
+
+            def drf_query():
+                return serializer_class(queryset.prefetch_related(*prefetch), many=True).data
+
+            def fast_query():
+                return fast.serialize(queryset.values(*fast.columns))
+
+            for path, serialize, query in (
+                ("DRF", drf_serialize, drf_query),
+                ("values", fast_serialize, fast_query),
+            ):
+                rows.append((
+                    name,
+                    path,
+                    rows_per_second(measure(serialize, args.repeat), count),
+                    rows_per_second(measure(query, args.repeat), count),
+                ))
+
+        print_table(("rows", "path", "serialize rows/s", "query+serialize rows/s"), rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Throughput of concurrent stock reservations on a single hot product.
+
+    python -m benchmarks.stock_contention --threads 1 4 8 --orders 1000
+
+Every thread reserves one unit per order until the stock runs out. The run
+reports reservations per second, how many lock retries SQLite needed (it
+raises instead of waiting) and checks that exactly ``stock`` units sold.
+Point DATABASE_URL at Postgres to measure real row-lock contention.
+"""
+import argparse
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from . import print_table, setup, test_database
+
+
+def run(threads, orders, stock):
+    from django.contrib.auth import get_user_model
+    from django.db import OperationalError, connection
+    from orders.models import Order, StockReservation
+    from orders.reservations import OutOfStock, reserve_stock
+    from store.models import Product
+
+    StockReservation.objects.all().delete()
+    Order.objects.all().delete()
+    Product.objects.all().delete()
+
+    user = get_user_model().objects.get_or_create(email="bench@example.com", defaults={"name": "B"})[0]
+    product = Product.objects.create(
+        title="Hot", description="", price=Decimal("1.00"),
+        image="https://example.com/p.png", stock=stock,
+    )
+    pending = Order.objects.bulk_create([
+        Order(user=user, total=1, delivery_charges=0, tax=0, grand_total=1)
+        for _ in range(orders)
+    ])
+
+    lock = threading.Lock()
+    counts = {"sold": 0, "sold_out": 0, "retries": 0}
+
+    def buy(order):
+        try:
+            while True:
+                try:
+                    reserve_stock(order, [(product, 1)])
+                    outcome = "sold"
+                    break
+                except OutOfStock:
+                    outcome = "sold_out"
+                    break
+                except OperationalError:
+                    with lock:
+                        counts["retries"] += 1
+                    time.sleep(0.001)
+            with lock:
+                counts[outcome] += 1
+        finally:
+            connection.close()
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(buy, pending))
+    elapsed = time.perf_counter() - start
+
+    product.refresh_from_db()
+    assert counts["sold"] == stock, counts
+    assert product.stock == 0, product.stock
+    return counts, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--orders", type=int, default=1000)
+    parser.add_argument("--stock", type=int, default=500)
+    args = parser.parse_args()
+
+    setup()
+    with test_database():
+        rows = []
+        for threads in args.threads:
+            counts, elapsed = run(threads, args.orders, args.stock)
+            rows.append((
+                threads,
+                counts["sold"],
+                counts["sold_out"],
+                counts["retries"],
+                f"{args.orders / elapsed:.0f}",
+            ))
+        print_table(("threads", "sold", "sold out", "lock retries", "attempts/s"), rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Refresh-token blacklist checks and expired-token pruning at millions of rows.
+
+    python -m benchmarks.token_blacklist --tokens 1000000
+
+Seeds OutstandingToken (a tenth of them blacklisted, half of them expired),
+then times:
+
+* the blacklist check simplejwt runs on every refresh/logout (a join
+  against BlacklistedToken) versus accounts.blacklist.is_blacklisted with a
+  warm cache;
+* deleting the expired half with simplejwt's flushexpiredtokens (one
+  statement) versus prune_tokens (batches of --batch-size).
+
+The default LocMemCache holds 300 entries, so keep --lookups below that
+unless CACHE_BACKEND points at Redis or memcached.
+"""
+import argparse
+import random
+import time
+import uuid
+from datetime import timedelta
+
+from . import measure, print_table, setup, summarize, test_database
+
+
+def seed(count, expired_share=0.5, blacklisted_share=0.1):
+    from django.utils import timezone
+    from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+    now = timezone.now()
+    expired = int(count * expired_share)
+    jtis = []
+    for start in range(0, count, 10000):
+        batch = [
+            OutstandingToken(
+                jti=uuid.uuid4().hex,
+                token="",
+                created_at=now,
+                # Older ids expire first, as they do in production.
+                expires_at=now + timedelta(seconds=i - expired),
+            )
+            for i in range(start, min(count, start + 10000))
+        ]
+        OutstandingToken.objects.bulk_create(batch)
+        jtis.extend(token.jti for token in batch)
+
+    ids = OutstandingToken.objects.order_by("id").values_list("id", flat=True)
+    BlacklistedToken.objects.bulk_create(
+        [BlacklistedToken(token_id=pk) for pk in ids.iterator() if random.random() < blacklisted_share],
+        batch_size=10000,
+    )
+    return jtis, now
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tokens", type=int, default=1_000_000)
+    parser.add_argument("--lookups", type=int, default=250)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    setup()
+    from django.core.cache import cache
+    from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+    from accounts.blacklist import is_blacklisted
+    from accounts.management.commands.prune_tokens import prune_expired_tokens
+
+    random.seed(0)
+    with test_database():
+        start = time.perf_counter()
+        jtis, now = seed(args.tokens)
+        print(f"seeded {args.tokens:,} tokens in {time.perf_counter() - start:.1f}s")
+
+        sample = random.sample(jtis, min(args.lookups, len(jtis)))
+        exp = time.time() + 3600
+        lookups = iter(sample * 10)
+
+        def database():
+            BlacklistedToken.objects.filter(token__jti=next(lookups)).exists()
+
+        def cached():
+            is_blacklisted(next(lookups), exp)
+
+        cache.clear()
+        for jti in sample:
+            is_blacklisted(jti, exp)
+
+        rows = []
+        for name, fn in (("database", database), ("cache", cached)):
+            stats = summarize(measure(fn, repeat=len(sample)))
+            rows.append((f"check: {name}", f"{stats['mean_ms'] * 1000:.1f} us", f"{stats['p99_ms'] * 1000:.1f} us"))
+
+        start = time.perf_counter()
+        deleted = prune_expired_tokens(batch_size=args.batch_size, now=now)
+        elapsed = time.perf_counter() - start
+        batches = -(-deleted // args.batch_size)
+        rows.append((f"prune_tokens ({deleted:,} rows)", f"{elapsed:.2f} s", f"{elapsed / batches * 1000:.1f} ms/batch"))
+
+        OutstandingToken.objects.all().delete()
+        seed(args.tokens)
+        start = time.perf_counter()
+        OutstandingToken.objects.filter(expires_at__lte=now).delete()
+        elapsed = time.perf_counter() - start
+        rows.append(("flushexpiredtokens", f"{elapsed:.2f} s", "one statement"))
+
+    print_table(("operation", "mean / total", "p99 / lock held"), rows)
+
+
+if __name__ == "__main__":
+    main()
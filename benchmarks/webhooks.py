@@ -0,0 +1,174 @@
+"""
+Razorpay webhook acceptance throughput: inline handling versus the inbox.
+
+    python -m benchmarks.webhooks --events 5000 --duplicates 0.2
+    python -m benchmarks.webhooks --url http://127.0.0.1:8000/api/orders/payment/webhook/ \\
+        --secret $RAZORPAY_WEBHOOK_SECRET --concurrency 32
+
+Replays signed payment.captured / payment.failed payloads, a share of them
+redelivered with the same X-Razorpay-Event-Id the way Razorpay retries.
+"inline" verifies and applies each event inside the request, as the view used
+to; "inbox" is the current view (verify, store, return 200), followed by the
+time the process_webhooks drain takes to apply the backlog.
+
+On SQLite pass --workers 1: its test database reports lock contention
+instead of waiting, so parallel drains just retry.
+
+With --url the payloads are fired at a running server instead and only
+acceptance is measured; the server's own database is used.
+"""
+import argparse
+import hashlib
+import hmac
+import json
+import random
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from . import percentile, print_table, setup, test_database
+
+
+def build_payloads(events, duplicates, orders, seed=0):
+    rng = random.Random(seed)
+    payloads = []
+    for i in range(events):
+        if payloads and rng.random() < duplicates:
+            payloads.append(rng.choice(payloads))
+            continue
+        event = "payment.captured" if rng.random() < 0.8 else "payment.failed"
+        body = json.dumps({
+            "event": event,
+            "payload": {"payment": {"entity": {"order_id": f"order_{rng.randrange(orders)}"}}},
+        }).encode()
+        payloads.append((f"evt_{i}", body))
+    return payloads
+
+
+def sign(body, secret):
+    return hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def report(name, latencies, elapsed):
+    return (
+        name,
+        len(latencies),
+        f"{len(latencies) / elapsed:,.0f}",
+        f"{percentile(latencies, 50) * 1000:.2f}",
+        f"{percentile(latencies, 99) * 1000:.2f}",
+    )
+
+
+def replay_http(url, payloads, secret, concurrency):
+    def send(item):
+        event_id, body = item
+        request = urllib.request.Request(url, data=body, method="POST", headers={
+            "Content-Type": "application/json",
+            "X-Razorpay-Signature": sign(body, secret),
+            "X-Razorpay-Event-Id": event_id,
+        })
+        start = time.perf_counter()
+        with urllib.request.urlopen(request, timeout=30) as response:
+            response.read()
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(send, payloads))
+    return report(f"http x{concurrency}", latencies, time.perf_counter() - start)
+
+
+def replay_client(client, payloads, secret, apply=None):
+    latencies = []
+    start = time.perf_counter()
+    for event_id, body in payloads:
+        began = time.perf_counter()
+        response = client.generic(
+            "POST", "/api/orders/payment/webhook/", body,
+            content_type="application/json",
+            HTTP_X_RAZORPAY_SIGNATURE=sign(body, secret),
+            HTTP_X_RAZORPAY_EVENT_ID=event_id,
+        )
+        if apply:
+            apply(body)
+        latencies.append(time.perf_counter() - began)
+        assert response.status_code == 200, response.content
+    return latencies, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=5000)
+    parser.add_argument("--duplicates", type=float, default=0.2)
+    parser.add_argument("--orders", type=int, default=500)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--url")
+    parser.add_argument("--secret", default="whsec")
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    payloads = build_payloads(args.events, args.duplicates, args.orders)
+    headers = ("path", "events", "events/s", "p50 ms", "p99 ms")
+
+    if args.url:
+        print_table(headers, [replay_http(args.url, payloads, args.secret, args.concurrency)])
+        return
+
+    setup()
+    from django.contrib.auth import get_user_model
+    from django.test import Client, override_settings
+    from orders.models import Order, Payment, WebhookEvent
+    from orders.webhooks import handle_event, process_pending
+
+    with test_database(), override_settings(RAZORPAY_WEBHOOK_SECRET=args.secret):
+        user = get_user_model().objects.create_user(
+            email="bench@example.com", password="password123", name="Bench",
+        )
+
+        def reset():
+            Order.objects.all().delete()
+            WebhookEvent.objects.all().delete()
+            orders = Order.objects.bulk_create([
+                Order(
+                    user=user,
+                    total=Decimal("100.00"),
+                    delivery_charges=Decimal("0.00"),
+                    tax=Decimal("18.00"),
+                    grand_total=Decimal("118.00"),
+                )
+                for _ in range(args.orders)
+            ])
+            Payment.objects.bulk_create([
+                Payment(order=order, razorpay_order_id=f"order_{i}", amount=order.grand_total)
+                for i, order in enumerate(orders)
+            ])
+
+        client = Client()
+        rows = []
+
+        # Inline: the inbox insert plus applying the event in the same request.
+        reset()
+        latencies, elapsed = replay_client(
+            client, payloads, args.secret,
+            apply=lambda body: handle_event(json.loads(body)),
+        )
+        rows.append(report("inline", latencies, elapsed))
+
+        reset()
+        latencies, elapsed = replay_client(client, payloads, args.secret)
+        rows.append(report("inbox", latencies, elapsed))
+
+        queued = WebhookEvent.objects.count()
+        start = time.perf_counter()
+        while process_pending(batch_size=200, workers=args.workers):
+            pass
+        drained = time.perf_counter() - start
+        rows.append(("drain", queued, f"{queued / drained:,.0f}", "-", "-"))
+
+        print_table(headers, rows)
+        print(f"{args.events - queued} redelivered event(s) were deduplicated")
+
+
+if __name__ == "__main__":
+    main()
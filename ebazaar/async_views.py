@@ -0,0 +1,60 @@
+from functools import wraps
+from inspect import isawaitable
+
+from asgiref.sync import sync_to_async
+from django.views.decorators.http import condition
+from rest_framework.views import APIView
+
+
+class AsyncAPIView(APIView):
+    # APIView whose handlers are coroutines. Authentication, permission checks
+    # and the rest of DRF's initial() may hit the database, so they run in a
+    # worker thread; the handler itself runs on the event loop and uses the
+    # async ORM, so a single ASGI worker can keep many requests in flight.
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if isawaitable(response):
+                response = await response
+
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+def async_condition(etag_func=None, last_modified_func=None):
+    # django.views.decorators.http.condition() calls its callbacks inline,
+    # which can't touch the ORM from the event loop. Compute them in a thread
+    # and hand the results to condition().
+    def decorator(func):
+        @wraps(func)
+        async def inner(request, *args, **kwargs):
+            def compute():
+                etag = etag_func(request, *args, **kwargs) if etag_func else None
+                last_modified = last_modified_func(request, *args, **kwargs) if last_modified_func else None
+                return etag, last_modified
+
+            etag, last_modified = await sync_to_async(compute)()
+            view = condition(
+                etag_func=lambda *args, **kwargs: etag,
+                last_modified_func=lambda *args, **kwargs: last_modified,
+            )(func)
+            return await view(request, *args, **kwargs)
+        return inner
+    return decorator
@@ -0,0 +1,121 @@
+import time
+from contextvars import ContextVar
+from inspect import iscoroutinefunction
+
+from django.db import DatabaseError, connections
+from django.db.backends.signals import connection_created
+from django.utils.decorators import sync_and_async_middleware
+
+from .metrics import Counter, Gauge
+
+CONNECTIONS_OPENED = Counter("ebazaar_db_connections_opened_total", "Database connections opened.", ("alias",))
+REQUESTS_REUSING_CONNECTION = Counter(
+    "ebazaar_db_requests_reusing_connection_total", "Requests served on an already open connection.", ("alias",),
+)
+# Summed over the live workers in multiprocess mode; updated as each request
+# finishes, so an idle worker reports its pool as of its last request.
+POOL_GAUGES = {
+    key: Gauge(f"ebazaar_db_pool_{key}", help, ("alias",))
+    for key, help in (
+        ("size", "Connections held by the pool."),
+        ("available", "Idle connections in the pool."),
+        ("requests_waiting", "Requests waiting for a pooled connection."),
+    )
+}
+METRICS = [CONNECTIONS_OPENED, REQUESTS_REUSING_CONNECTION, *POOL_GAUGES.values()]
+# Aliases opened during the current request; a ContextVar rather than a
+# thread local so async views' sync_to_async threads report into it too.
+_opened = ContextVar("db_connections_opened", default=None)
+
+
+def _connection_created(sender, connection, **kwargs):
+    CONNECTIONS_OPENED.inc(connection.alias)
+    opened = _opened.get()
+    if opened is not None:
+        opened.add(connection.alias)
+
+
+connection_created.connect(_connection_created)
+
+
+def _record(opened):
+    for alias in connections:
+        connection = connections[alias]
+        if connection.connection is None:
+            continue
+        if alias not in opened:
+            REQUESTS_REUSING_CONNECTION.inc(alias)
+        pool = _pool_stats(connection)
+        if pool:
+            for key, gauge in POOL_GAUGES.items():
+                gauge.set(pool[key], alias)
+
+
+@sync_and_async_middleware
+def connection_metrics_middleware(get_response):
+    # A request either opened a connection or found one already open; the
+    # latter is what CONN_MAX_AGE buys.
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            token = _opened.set(opened := set())
+            try:
+                return await get_response(request)
+            finally:
+                _opened.reset(token)
+                _record(opened)
+    else:
+        def middleware(request):
+            token = _opened.set(opened := set())
+            try:
+                return get_response(request)
+            finally:
+                _opened.reset(token)
+                _record(opened)
+    return middleware
+
+
+def _pool_stats(connection):
+    if not connection.settings_dict.get("OPTIONS", {}).get("pool"):
+        return None
+    stats = connection.pool.get_stats()
+    return {
+        "size": stats.get("pool_size", 0),
+        "available": stats.get("pool_available", 0),
+        "requests": stats.get("requests_num", 0),
+        "requests_waiting": stats.get("requests_waiting", 0),
+        "requests_queued": stats.get("requests_queued", 0),
+        "wait_ms": stats.get("requests_wait_ms", 0),
+        "timeouts": stats.get("requests_errors", 0),
+    }
+
+
+def snapshot():
+    metrics = {}
+    for alias in connections:
+        connection = connections[alias]
+        opened, reused = int(CONNECTIONS_OPENED.value(alias)), int(REQUESTS_REUSING_CONNECTION.value(alias))
+        metrics[alias] = {
+            "vendor": connection.vendor,
+            "conn_max_age": connection.settings_dict["CONN_MAX_AGE"],
+            "health_checks": connection.settings_dict["CONN_HEALTH_CHECKS"],
+            "connections_opened": opened,
+            "requests_reusing_connection": reused,
+            "reuse_rate": round(reused / (opened + reused), 3) if opened + reused else None,
+            "pool": _pool_stats(connection),
+        }
+    return metrics
+
+
+def check(alias):
+    start = time.perf_counter()
+    try:
+        with connections[alias].cursor() as cursor:
+            cursor.execute("SELECT 1")
+    except DatabaseError:
+        return {"status": "error"}
+    return {"status": "ok", "latency_ms": round((time.perf_counter() - start) * 1000, 2)}
+
+
+def reset():
+    for metric in METRICS:
+        metric.clear()
@@ -0,0 +1,112 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from inspect import isawaitable, iscoroutinefunction
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.decorators import sync_and_async_middleware
+from rest_framework.permissions import SAFE_METHODS
+
+REPLICA_DB_ALIAS = "replica"
+
+# Catalogue and order history tolerate a little replication lag; payments,
+# reservations, webhooks, idempotency keys and accounts never do. Views that
+# cache what they read are wrapped in read_from_primary.
+REPLICA_APPS = {"store"}
+REPLICA_MODELS = {("orders", "order"), ("orders", "orderitem"), ("orders", "ordertracking")}
+
+# One mutable state per request (set by ReplicaPinningMiddleware), so a write
+# made in a sync_to_async thread still pins the rest of the request.
+_state = ContextVar("db_routing_state", default=None)
+
+
+def _pin():
+    state = _state.get()
+    if state is not None:
+        state["pinned"] = True
+
+
+def is_pinned():
+    state = _state.get()
+    if state is None:
+        return False
+    if callable(state["pinned"]):
+        # Decided on the first read that needs it (see read_from_primary).
+        state["pinned"] = bool(state["pinned"]())
+    return state["pinned"]
+
+
+@contextmanager
+def routing_scope(pinned=False):
+    token = _state.set({"pinned": pinned})
+    try:
+        yield
+    finally:
+        _state.reset(token)
+
+
+def read_from_primary(when):
+    # For reads whose result outlives the request, like the catalogue cache
+    # and ETags: while when() says the replica may still lag behind a write
+    # (right after one), they come from the primary so old rows aren't stored
+    # as current; otherwise they go wherever the router sends them. when() is
+    # only called once the view reads something the replica could serve.
+    # method_decorator hides coroutine functions, so check the result.
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            with routing_scope(pinned=when):
+                result = view(*args, **kwargs)
+            return _in_scope(result, when) if isawaitable(result) else result
+        return wrapper
+    return decorator
+
+
+async def _in_scope(awaitable, pinned):
+    with routing_scope(pinned=pinned):
+        return await awaitable
+
+
+class ReplicaRouter:
+    # Sends catalogue and order-history reads to the "replica" database when
+    # one is configured (REPLICA_DATABASE_URL). Once a request writes, or
+    # inside a transaction on the primary, its reads stay on the primary so
+    # it always sees its own writes.
+
+    def db_for_read(self, model, **hints):
+        if REPLICA_DB_ALIAS not in settings.DATABASES:
+            return DEFAULT_DB_ALIAS
+        if (model._meta.app_label not in REPLICA_APPS
+                and (model._meta.app_label, model._meta.model_name) not in REPLICA_MODELS):
+            return DEFAULT_DB_ALIAS
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block or is_pinned():
+            return DEFAULT_DB_ALIAS
+        return REPLICA_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        _pin()
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # The replica gets its schema through replication.
+        return db != REPLICA_DB_ALIAS
+
+
+@sync_and_async_middleware
+def replica_pinning_middleware(get_response):
+    # Requests that may write (POST, PUT, ...) read from the primary
+    # throughout; safe requests only move there once they write.
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            with routing_scope(pinned=request.method not in SAFE_METHODS):
+                return await get_response(request)
+    else:
+        def middleware(request):
+            with routing_scope(pinned=request.method not in SAFE_METHODS):
+                return get_response(request)
+    return middleware
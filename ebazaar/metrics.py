@@ -0,0 +1,213 @@
+import os
+import time
+from contextvars import ContextVar
+from inspect import iscoroutinefunction
+
+import prometheus_client
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils.decorators import sync_and_async_middleware
+from prometheus_client import REGISTRY, CollectorRegistry, generate_latest, multiprocess
+from rest_framework.renderers import JSONRenderer
+
+# Kept by prometheus_client. With PROMETHEUS_MULTIPROC_DIR set (to the same
+# empty directory for every gunicorn/uvicorn worker and process_webhooks,
+# before they start) each process writes its samples there and /metrics,
+# whichever worker serves it, reports all of them; gunicorn.conf.py cleans up
+# after dead workers. Without it, each process only reports its own numbers.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+def collect_registry(registry=REGISTRY):
+    # What a scrape sees: every process's samples in multiprocess mode.
+    if registry is not REGISTRY or "PROMETHEUS_MULTIPROC_DIR" not in os.environ:
+        return registry
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+class _Metric:
+    # Takes label values positionally: WEBHOOK_EVENTS.inc("received", "accepted").
+    metric_class = None
+
+    def __init__(self, name, help, labels=(), registry=REGISTRY, **options):
+        self.name = name
+        self.labels = labels
+        self.registry = registry
+        self.metric = self.metric_class(name, help, labels, registry=registry, **options)
+
+    def child(self, labels):
+        return self.metric.labels(*labels) if self.labels else self.metric
+
+    def sample(self, name, labels):
+        labels = {label: str(value) for label, value in zip(self.labels, labels)}
+        return collect_registry(self.registry).get_sample_value(name, labels) or 0
+
+    def clear(self):
+        self.metric.clear()
+
+
+class Counter(_Metric):
+    metric_class = prometheus_client.Counter
+
+    def __init__(self, name, help, labels=(), registry=REGISTRY):
+        # prometheus_client adds the _total suffix itself.
+        super().__init__(name.removesuffix("_total"), help, labels, registry)
+
+    def inc(self, *labels, amount=1):
+        self.child(labels).inc(amount)
+
+    def value(self, *labels):
+        return self.sample(f"{self.name}_total", labels)
+
+
+class Gauge(_Metric):
+    metric_class = prometheus_client.Gauge
+
+    def __init__(self, name, help, labels=(), registry=REGISTRY, multiprocess_mode="livesum"):
+        super().__init__(name, help, labels, registry, multiprocess_mode=multiprocess_mode)
+
+    def set(self, value, *labels):
+        self.child(labels).set(value)
+
+    def value(self, *labels):
+        return self.sample(self.name, labels)
+
+
+class Histogram(_Metric):
+    metric_class = prometheus_client.Histogram
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS, registry=REGISTRY):
+        super().__init__(name, help, labels, registry, buckets=buckets)
+
+    def observe(self, value, *labels):
+        self.child(labels).observe(value)
+
+    def value(self, *labels):
+        return {"count": self.sample(f"{self.name}_count", labels), "sum": self.sample(f"{self.name}_sum", labels)}
+
+
+REQUEST_LATENCY = Histogram(
+    "ebazaar_http_request_duration_seconds", "Time spent handling a request.", ("method", "view", "status"),
+)
+REQUEST_QUERIES = Histogram(
+    "ebazaar_http_request_db_queries", "Database queries per request.", ("view",), QUERY_BUCKETS,
+)
+REQUEST_DB_TIME = Histogram(
+    "ebazaar_http_request_db_duration_seconds", "Time spent in database queries per request.", ("view",),
+)
+REQUEST_SERIALIZE_TIME = Histogram(
+    "ebazaar_http_request_serialize_duration_seconds", "Time spent rendering the response body.", ("view",),
+)
+RAZORPAY_LATENCY = Histogram(
+    "ebazaar_razorpay_request_duration_seconds", "Razorpay API call attempts.", ("resource", "outcome"),
+)
+WEBHOOK_EVENTS = Counter(
+    "ebazaar_webhook_events_total", "Razorpay webhooks received and processed.", ("stage", "outcome"),
+)
+CATALOG_CACHE_REQUESTS = Counter(
+    "ebazaar_catalog_cache_requests_total", "Catalogue cache lookups.", ("result",),
+)
+METRICS = [
+    REQUEST_LATENCY, REQUEST_QUERIES, REQUEST_DB_TIME, REQUEST_SERIALIZE_TIME, RAZORPAY_LATENCY, WEBHOOK_EVENTS,
+    CATALOG_CACHE_REQUESTS,
+]
+
+
+class RequestTimings:
+    __slots__ = ("queries", "db", "serialize")
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.serialize = 0.0
+
+
+# One mutable RequestTimings per request; sync_to_async threads share it.
+_timings = ContextVar("request_timings", default=None)
+
+
+def _time_query(execute, sql, params, many, context):
+    timings = _timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.db += time.perf_counter() - start
+        timings.queries += 1
+
+
+def _install(connection):
+    # First in the list: connection.execute_wrapper() blocks pop() the last
+    # wrapper on exit, so one opened around a new connection can't remove ours.
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _time_query)
+
+
+connection_created.connect(lambda sender, connection, **kwargs: _install(connection), weak=False)
+
+
+class TimedJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        start = time.perf_counter()
+        try:
+            return super().render(data, accepted_media_type, renderer_context)
+        finally:
+            timings = _timings.get()
+            if timings is not None:
+                timings.serialize += time.perf_counter() - start
+
+
+def _start():
+    for connection in connections.all():
+        _install(connection)
+    return _timings.set(RequestTimings()), time.perf_counter()
+
+
+def _finish(request, response, token, start):
+    total = time.perf_counter() - start
+    timings = _timings.get()
+    _timings.reset(token)
+
+    match = request.resolver_match
+    view = match.route if match else "<unmatched>"
+    REQUEST_LATENCY.observe(total, request.method, view, response.status_code)
+    REQUEST_QUERIES.observe(timings.queries, view)
+    REQUEST_DB_TIME.observe(timings.db, view)
+    REQUEST_SERIALIZE_TIME.observe(timings.serialize, view)
+
+    if settings.SERVER_TIMING:
+        response["Server-Timing"] = (
+            f'db;dur={timings.db * 1000:.2f};desc="{timings.queries} queries", '
+            f"serialize;dur={timings.serialize * 1000:.2f}, "
+            f"total;dur={total * 1000:.2f}"
+        )
+    return response
+
+
+@sync_and_async_middleware
+def request_metrics_middleware(get_response):
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            token, start = _start()
+            return _finish(request, await get_response(request), token, start)
+    else:
+        def middleware(request):
+            token, start = _start()
+            return _finish(request, get_response(request), token, start)
+    return middleware
+
+
+def render():
+    return generate_latest(collect_registry()).decode()
+
+
+def reset():
+    for metric in METRICS:
+        metric.clear()
@@ -0,0 +1,203 @@
+import decimal
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import ISO_8601, serializers
+from rest_framework.settings import api_settings
+
+
+class SparseFieldsetMixin:
+    # Serializers shared by the store and orders APIs accept ?fields=a,b,c to
+    # return only those fields; only_columns() maps them onto .only().
+    fields_query_param = "fields"
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop("fields", None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+    @classmethod
+    def field_names(cls):
+        # Building the fields is the expensive part of a ModelSerializer; do it once per class.
+        if "_field_names" not in cls.__dict__:
+            cls._field_names = tuple(cls().fields)
+        return cls._field_names
+
+    @classmethod
+    def requested_fields(cls, request):
+        raw = request.query_params.get(cls.fields_query_param)
+        if not raw:
+            return None
+
+        fields = list(dict.fromkeys(name.strip() for name in raw.split(",") if name.strip()))
+        unknown = [name for name in fields if name not in cls.field_names()]
+        if unknown:
+            raise serializers.ValidationError({
+                cls.fields_query_param: [f"Unknown field '{name}'" for name in unknown],
+            })
+        return fields
+
+    @classmethod
+    def only_columns(cls, fields=None):
+        model = cls.Meta.model
+        columns = ["pk"]
+        for name in fields if fields is not None else cls.field_names():
+            try:
+                field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                continue
+            if field.concrete:
+                columns.append(name)
+        return columns
+
+    @classmethod
+    def values_serializer(cls, fields=None):
+        return values_serializer(cls, tuple(fields) if fields is not None else None)
+
+
+class ValuesSerializer:
+    # Read-only twin of a ModelSerializer for hot list endpoints. Rows come
+    # straight from .values() and are formatted in one pass instead of going
+    # through DRF's per-field get_attribute()/to_representation() dispatch.
+    # The output matches the DRF serializer key for key; field types without
+    # a fast converter fall back to the DRF field itself.
+
+    def __init__(self, serializer):
+        self.model = serializer.Meta.model
+        self.pk = self.model._meta.pk.attname
+        self.columns = [self.pk]
+        self.fields = []
+        self.nested = []
+
+        for name, field in serializer.fields.items():
+            if isinstance(field, serializers.ListSerializer):
+                related = self.model._meta.get_field(field.source)
+                self.fields.append((name, None, None))
+                self.nested.append((name, related.field.attname, ValuesSerializer(field.child)))
+                continue
+
+            column = self.model._meta.get_field(field.source).attname
+            if column not in self.columns:
+                self.columns.append(column)
+            self.fields.append((name, column, _converter(field)))
+
+    def serialize(self, rows):
+        rows = list(rows)
+        children = {
+            name: self._children(fk, child, [row[self.pk] for row in rows])
+            for name, fk, child in self.nested
+        }
+        return self._format(rows, children)
+
+    async def aserialize(self, rows):
+        rows = list(rows)
+        children = {
+            name: await self._achildren(fk, child, [row[self.pk] for row in rows])
+            for name, fk, child in self.nested
+        }
+        return self._format(rows, children)
+
+    def _format(self, rows, children):
+        # Converters are bound per call so the active timezone is looked up
+        # once rather than once per datetime value.
+        fields = [(name, column, bind and bind()) for name, column, bind in self.fields]
+
+        data = []
+        for row in rows:
+            item = {}
+            for name, column, convert in fields:
+                if column is None:
+                    item[name] = children[name].get(row[self.pk], [])
+                    continue
+                value = row[column]
+                item[name] = value if value is None or convert is None else convert(value)
+            data.append(item)
+        return data
+
+    @staticmethod
+    def _children_queryset(fk, child, pks):
+        columns = child.columns if fk in child.columns else [*child.columns, fk]
+        return child.model._default_manager.filter(**{f"{fk}__in": pks}).values(*columns)
+
+    @classmethod
+    def _children(cls, fk, child, pks):
+        if not pks:
+            return {}
+        rows = list(cls._children_queryset(fk, child, pks))
+        return cls._group(fk, rows, child.serialize(rows))
+
+    @classmethod
+    async def _achildren(cls, fk, child, pks):
+        if not pks:
+            return {}
+        rows = [row async for row in cls._children_queryset(fk, child, pks)]
+        return cls._group(fk, rows, await child.aserialize(rows))
+
+    @staticmethod
+    def _group(fk, rows, items):
+        grouped = {}
+        for row, item in zip(rows, items):
+            grouped.setdefault(row[fk], []).append(item)
+        return grouped
+
+
+def _converter(field):
+    if isinstance(field, serializers.DecimalField):
+        convert = _decimal_converter(field)
+    elif isinstance(field, serializers.DateTimeField):
+        return _datetime_converter(field)
+    elif isinstance(field, (serializers.CharField, serializers.IntegerField, serializers.BooleanField)):
+        return None
+    elif isinstance(field, serializers.ChoiceField) and all(isinstance(key, str) for key in field.choices):
+        return None
+    elif isinstance(field, serializers.PrimaryKeyRelatedField) and field.pk_field is None:
+        return None
+    else:
+        convert = field.to_representation
+    return lambda: convert
+
+
+def _decimal_converter(field):
+    coerce = getattr(field, "coerce_to_string", api_settings.COERCE_DECIMAL_TO_STRING)
+    if field.decimal_places is None or not coerce or field.localize or field.normalize_output:
+        return field.to_representation
+
+    quantum = decimal.Decimal(".1") ** field.decimal_places
+    context = decimal.getcontext().copy()
+    if field.max_digits is not None:
+        context.prec = field.max_digits
+    rounding = field.rounding
+
+    def convert(value):
+        return f"{value.quantize(quantum, rounding=rounding, context=context):f}"
+    return convert
+
+
+def _datetime_converter(field):
+    output_format = getattr(field, "format", api_settings.DATETIME_FORMAT)
+    if output_format is None or output_format.lower() != ISO_8601:
+        return lambda: field.to_representation
+
+    def bind():
+        tz = field.timezone if hasattr(field, "timezone") else field.default_timezone()
+
+        def convert(value):
+            # Aware values in an aware setup are the common case; anything
+            # else goes through DRF's own timezone handling.
+            if tz is not None and value.tzinfo is not None:
+                value = value.astimezone(tz)
+            else:
+                value = field.enforce_timezone(value)
+            value = value.isoformat()
+            return value[:-6] + "Z" if value.endswith("+00:00") else value
+        return convert
+    return bind
+
+
+@lru_cache(maxsize=128)
+def values_serializer(serializer_class, fields=None):
+    if fields is None:
+        return ValuesSerializer(serializer_class())
+    return ValuesSerializer(serializer_class(fields=fields))
@@ -47,18 +47,23 @@ INSTALLED_APPS = [
     'accounts',
     'store',
     'orders',
+    'profiling',
 ]
 
 MIDDLEWARE = [
+    'ebazaar.metrics.request_metrics_middleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'ebazaar.db_routers.replica_pinning_middleware',
+    'ebazaar.db_metrics.connection_metrics_middleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'profiling.middleware.request_profiling_middleware',
 ]
 
 CORS_ALLOWED_ORIGINS = [
@@ -89,12 +94,80 @@ WSGI_APPLICATION = 'ebazaar.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
+# Each worker keeps its connection open for DATABASE_CONN_MAX_AGE seconds
+# (0 closes it after every request) and checks it is alive before reusing it.
+# Under ASGI (ASYNC_API) connections belong to each request's context and
+# are never reused, so Django advises against persistent ones: the default
+# there is 0, and DATABASE_POOL is the way to reuse connections.
+# DATABASE_POOL=True uses Django's psycopg 3 connection pool on PostgreSQL
+# instead (needs psycopg[pool]; the pool replaces persistent connections).
+DATABASE_CONN_MAX_AGE = int(os.environ.get(
+    "DATABASE_CONN_MAX_AGE", 0 if os.environ.get("ASYNC_API", "False") == "True" else 60,
+))
+DATABASE_POOL = os.environ.get("DATABASE_POOL", "False") == "True"
+DATABASE_POOL_OPTIONS = {
+    "min_size": int(os.environ.get("DATABASE_POOL_MIN_SIZE", 2)),
+    "max_size": int(os.environ.get("DATABASE_POOL_MAX_SIZE", 10)),
+    "timeout": float(os.environ.get("DATABASE_POOL_TIMEOUT", 10)),
+}
+
+
+def database_config(config):
+    if DATABASE_POOL and config.get("ENGINE") == "django.db.backends.postgresql":
+        config["CONN_MAX_AGE"] = 0
+        config.setdefault("OPTIONS", {})["pool"] = DATABASE_POOL_OPTIONS
+    return config
+
+
 DATABASES = {
-    'default': dj_database_url.config(
-        default=os.environ.get("DATABASE_URL")
-    )
+    'default': database_config(dj_database_url.config(
+        default=os.environ.get("DATABASE_URL"),
+        conn_max_age=DATABASE_CONN_MAX_AGE,
+        conn_health_checks=True,
+    ))
+}
+
+# Optional read replica for catalogue and order-history reads; without it
+# everything uses 'default'. See ebazaar.db_routers.
+if os.environ.get("REPLICA_DATABASE_URL"):
+    DATABASES['replica'] = database_config(dj_database_url.parse(
+        os.environ["REPLICA_DATABASE_URL"],
+        conn_max_age=DATABASE_CONN_MAX_AGE,
+        conn_health_checks=True,
+    ))
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+
+DATABASE_ROUTERS = ['ebazaar.db_routers.ReplicaRouter']
+
+
+# Cache
+# https://docs.djangoproject.com/en/6.0/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get("CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"),
+        'LOCATION': os.environ.get("CACHE_LOCATION", ""),
+    }
 }
 
+CATALOG_CACHE_TIMEOUT = int(os.environ.get("CATALOG_CACHE_TIMEOUT", 300))
+# Seconds after a catalogue change during which catalogue views read from the
+# primary rather than the replica; keep it above the replication lag.
+CATALOG_REPLICA_LAG = int(os.environ.get("CATALOG_REPLICA_LAG", 5))
+
+# Whether every worker sees the same cache. Account state kept there
+# (deactivation markers, cached users, refresh-token blacklist answers) is
+# only trusted when it is: a per-process cache never hears about a logout or
+# deactivation handled by another worker, so authentication asks the
+# database instead. Set SHARED_CACHE=True for a single-process LocMemCache.
+PROCESS_LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+SHARED_CACHE = os.environ.get(
+    "SHARED_CACHE", str(CACHES["default"]["BACKEND"] not in PROCESS_LOCAL_CACHES),
+) == "True"
+
 
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
@@ -142,13 +215,19 @@ from datetime import timedelta
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "accounts.authentication.ClaimsJWTAuthentication",
     ),
 
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.AllowAny",  # default open
     ),
     
+    # TimedJSONRenderer is JSONRenderer plus the serialize timing in Server-Timing and /metrics.
+    "DEFAULT_RENDERER_CLASSES": (
+        "ebazaar.metrics.TimedJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+
     "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
     "PAGE_SIZE": 12,   # how many products per page
 }
@@ -157,11 +236,41 @@ SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=60),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
     "AUTH_HEADER_TYPES": ("Bearer",),
+    "TOKEN_REFRESH_SERIALIZER": "accounts.serializers.TokenRefreshSerializer",
 }
 
+# How long ClaimsJWTAuthentication keeps a user's non-claim fields cached.
+USER_CACHE_TIMEOUT = int(os.environ.get("USER_CACHE_TIMEOUT", 300))
+
 SECRET_KEY = os.environ.get("SECRET_KEY")
 DEBUG = os.environ.get("DEBUG", "False") == "True"
 
+# Route the catalogue and order read views and checkout to their async
+# versions; only worth it when served by an ASGI server (ebazaar.asgi).
+ASYNC_API = os.environ.get("ASYNC_API", "False") == "True"
+
+# Add a Server-Timing header (db, serialize, total) to every response.
+SERVER_TIMING = os.environ.get("SERVER_TIMING", "True") == "True"
+
+# Let staff users profile a request with an X-Profile header or ?profile=
+# (profiling.middleware); the sampler reads the stack every interval seconds.
+PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "True") == "True"
+PROFILING_SAMPLE_INTERVAL = float(os.environ.get("PROFILING_SAMPLE_INTERVAL", 0.001))
+# `manage.py prune_request_profiles` deletes profiles older than this.
+PROFILING_RETENTION = timedelta(days=int(os.environ.get("PROFILING_RETENTION_DAYS", 7)))
+
+STOCK_RESERVATION_TTL = timedelta(minutes=int(os.environ.get("STOCK_RESERVATION_TTL_MINUTES", 15)))
+
+# How long a stored Idempotency-Key response is replayed to retries.
+IDEMPOTENCY_KEY_TTL = timedelta(hours=int(os.environ.get("IDEMPOTENCY_KEY_TTL_HOURS", 24)))
+
 RAZORPAY_KEY_ID = os.environ.get("RAZORPAY_KEY_ID")
 RAZORPAY_KEY_SECRET = os.environ.get("RAZORPAY_KEY_SECRET")
-RAZORPAY_WEBHOOK_SECRET = os.environ.get("RAZORPAY_WEBHOOK_SECRET")
\ No newline at end of file
+RAZORPAY_WEBHOOK_SECRET = os.environ.get("RAZORPAY_WEBHOOK_SECRET")
+RAZORPAY_BASE_URL = os.environ.get("RAZORPAY_BASE_URL", "https://api.razorpay.com")
+RAZORPAY_CONNECT_TIMEOUT = float(os.environ.get("RAZORPAY_CONNECT_TIMEOUT", 3.05))
+RAZORPAY_READ_TIMEOUT = float(os.environ.get("RAZORPAY_READ_TIMEOUT", 10))
+RAZORPAY_MAX_RETRIES = int(os.environ.get("RAZORPAY_MAX_RETRIES", 2))
+RAZORPAY_POOL_SIZE = int(os.environ.get("RAZORPAY_POOL_SIZE", 10))
+RAZORPAY_BREAKER_THRESHOLD = int(os.environ.get("RAZORPAY_BREAKER_THRESHOLD", 5))
+RAZORPAY_BREAKER_RESET_SECONDS = float(os.environ.get("RAZORPAY_BREAKER_RESET_SECONDS", 30))
@@ -0,0 +1,183 @@
+import os
+import subprocess
+import sys
+import tempfile
+from inspect import iscoroutinefunction
+from unittest import mock
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth import get_user_model
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from prometheus_client import CollectorRegistry, generate_latest
+from rest_framework.test import APITestCase
+
+from . import db_metrics, metrics, settings as project_settings
+
+User = get_user_model()
+
+
+class HealthViewTests(APITestCase):
+    def test_healthy(self):
+        response = self.client.get("/api/health/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["databases"]["default"]["status"], "ok")
+
+    @mock.patch("ebazaar.db_metrics.check", return_value={"status": "error"})
+    def test_unreachable_database_is_503(self, check):
+        response = self.client.get("/api/health/")
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.data["status"], "error")
+
+
+class DatabaseMetricsViewTests(APITestCase):
+    url = "/api/health/db/"
+
+    def test_staff_only(self):
+        self.client.force_authenticate(User.objects.create_user(email="u@example.com", password="x" * 8, name="U"))
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_counts_reused_connections(self):
+        self.client.force_authenticate(User.objects.create_superuser(email="a@example.com", password="x" * 8, name="A"))
+        db_metrics.reset()
+
+        self.client.get("/api/store/")
+        response = self.client.get(self.url)
+
+        default = response.data["default"]
+        self.assertEqual(default["connections_opened"], 0)
+        self.assertGreaterEqual(default["requests_reusing_connection"], 1)
+        self.assertEqual(default["reuse_rate"], 1.0)
+        self.assertIsNone(default["pool"])
+
+
+class ConnectionMetricsMiddlewareTests(SimpleTestCase):
+    databases = ["default"]
+
+    def test_async_requests_stay_async(self):
+        async def view(request):
+            # Async views reach the ORM through sync_to_async threads.
+            await sync_to_async(connection_created.send)(sender=None, connection=connections["default"])
+            return HttpResponse()
+
+        middleware = db_metrics.connection_metrics_middleware(view)
+        db_metrics.reset()
+        connections["default"].ensure_connection()
+
+        self.assertTrue(iscoroutinefunction(middleware))
+        async_to_sync(middleware)(RequestFactory().get("/"))
+
+        default = db_metrics.snapshot()["default"]
+        self.assertEqual(default["connections_opened"], 1)
+        self.assertEqual(default["requests_reusing_connection"], 0)
+
+
+class DatabaseConfigTests(SimpleTestCase):
+    def test_pool_replaces_persistent_connections_on_postgres(self):
+        config = {"ENGINE": "django.db.backends.postgresql", "CONN_MAX_AGE": 60}
+
+        with mock.patch.object(project_settings, "DATABASE_POOL", True):
+            config = project_settings.database_config(config)
+
+        self.assertEqual(config["CONN_MAX_AGE"], 0)
+        self.assertEqual(config["OPTIONS"]["pool"], project_settings.DATABASE_POOL_OPTIONS)
+
+    def test_pool_is_ignored_elsewhere(self):
+        config = {"ENGINE": "django.db.backends.sqlite3", "CONN_MAX_AGE": 60}
+
+        with mock.patch.object(project_settings, "DATABASE_POOL", True):
+            self.assertNotIn("OPTIONS", project_settings.database_config(config))
+
+
+class RequestMetricsTests(APITestCase):
+    def setUp(self):
+        metrics.reset()
+        cache.clear()
+
+    def test_server_timing_header(self):
+        response = self.client.get("/api/store/")
+
+        self.assertRegex(response["Server-Timing"], r'^db;dur=[\d.]+;desc="\d+ queries", serialize;dur=[\d.]+, total;dur=[\d.]+$')
+
+    @override_settings(SERVER_TIMING=False)
+    def test_server_timing_can_be_disabled(self):
+        self.assertNotIn("Server-Timing", self.client.get("/api/store/"))
+
+    def test_requests_are_recorded_per_route(self):
+        self.client.get("/api/store/")
+        self.client.get("/api/store/0/")
+        self.client.get("/nowhere/")
+
+        self.assertEqual(metrics.REQUEST_LATENCY.value("GET", "api/store/", 200)["count"], 1)
+        self.assertEqual(metrics.REQUEST_LATENCY.value("GET", "api/store/<int:pk>/", 404)["count"], 1)
+        self.assertEqual(metrics.REQUEST_LATENCY.value("GET", "<unmatched>", 404)["count"], 1)
+        self.assertGreater(metrics.REQUEST_QUERIES.value("api/store/")["sum"], 0)
+        self.assertGreater(metrics.REQUEST_SERIALIZE_TIME.value("api/store/")["sum"], 0)
+
+    def test_query_timing_survives_other_execute_wrappers(self):
+        self.client.get("/api/store/")
+        with connection.execute_wrapper(lambda execute, *args: execute(*args)):
+            pass
+
+        self.assertIn(metrics._time_query, connection.execute_wrappers)
+
+    def test_metrics_endpoint_is_staff_only(self):
+        self.client.force_authenticate(User.objects.create_user(email="u@example.com", password="x" * 8, name="U"))
+        self.assertEqual(self.client.get("/metrics").status_code, 403)
+
+    def test_prometheus_exposition(self):
+        self.client.force_authenticate(User.objects.create_superuser(email="a@example.com", password="x" * 8, name="A"))
+        self.client.get("/api/store/")
+
+        response = self.client.get("/metrics")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        body = response.content.decode()
+        self.assertIn("# TYPE ebazaar_http_request_duration_seconds histogram", body)
+        self.assertIn(
+            'ebazaar_http_request_duration_seconds_bucket{le="+Inf",method="GET",status="200",view="api/store/"} 1.0',
+            body,
+        )
+        self.assertIn("# TYPE ebazaar_db_connections_opened_total counter", body)
+
+
+class HistogramTests(SimpleTestCase):
+    def test_buckets_are_cumulative(self):
+        registry = CollectorRegistry()
+        histogram = metrics.Histogram("h", "Help.", ("path",), buckets=(1, 5), registry=registry)
+        for value in (0.5, 1, 3, 10):
+            histogram.observe(value, 'a"b')
+
+        self.assertEqual(histogram.value('a"b'), {"count": 4, "sum": 14.5})
+        body = generate_latest(registry).decode()
+        for line in (
+            'h_bucket{le="1.0",path="a\\"b"} 2.0',
+            'h_bucket{le="5.0",path="a\\"b"} 3.0',
+            'h_bucket{le="+Inf",path="a\\"b"} 4.0',
+            'h_count{path="a\\"b"} 4.0',
+        ):
+            self.assertIn(line, body)
+
+
+class MultiprocessMetricsTests(SimpleTestCase):
+    def test_reports_other_processes(self):
+        # As process_webhooks would: another process counts, this one serves /metrics.
+        script = (
+            "import django; django.setup(); from ebazaar.metrics import WEBHOOK_EVENTS; "
+            "WEBHOOK_EVENTS.inc('processed', 'ok')"
+        )
+        with tempfile.TemporaryDirectory() as directory:
+            env = {**os.environ, "PROMETHEUS_MULTIPROC_DIR": directory}
+            for _ in range(2):
+                subprocess.run([sys.executable, "-c", script], env=env, cwd=settings.BASE_DIR, check=True)
+
+            with mock.patch.dict(os.environ, {"PROMETHEUS_MULTIPROC_DIR": directory}):
+                self.assertEqual(metrics.WEBHOOK_EVENTS.value("processed", "ok"), 2)
+                self.assertIn('ebazaar_webhook_events_total{outcome="ok",stage="processed"} 2.0', metrics.render())
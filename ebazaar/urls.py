@@ -17,9 +17,14 @@ Including another URLconf
 from django.contrib import admin
 from django.urls import path, include
 
+from .views import DatabaseMetricsView, HealthView, MetricsView
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/accounts/', include("accounts.urls")),
     path('api/store/', include("store.urls")),
     path('api/orders/', include("orders.urls")),
+    path('api/health/', HealthView.as_view(), name="health"),
+    path('api/health/db/', DatabaseMetricsView.as_view(), name="health-db"),
+    path('metrics', MetricsView.as_view(), name="metrics"),
 ]
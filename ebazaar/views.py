@@ -0,0 +1,38 @@
+from django.db import connections
+from django.http import HttpResponse
+from rest_framework import status
+from rest_framework.permissions import AllowAny, IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from . import db_metrics, metrics
+
+
+class HealthView(APIView):
+    # Load balancer probe: 503 when any configured database is unreachable.
+    permission_classes = [AllowAny]
+    authentication_classes = []
+
+    def get(self, request):
+        databases = {alias: db_metrics.check(alias) for alias in connections}
+        healthy = all(result["status"] == "ok" for result in databases.values())
+        return Response(
+            {"status": "ok" if healthy else "error", "databases": databases},
+            status=status.HTTP_200_OK if healthy else status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+
+
+class DatabaseMetricsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(db_metrics.snapshot())
+
+
+class MetricsView(APIView):
+    # Prometheus text exposition of the request, gateway, webhook and
+    # connection metrics; every process's in multiprocess mode.
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return HttpResponse(metrics.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
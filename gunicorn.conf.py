@@ -0,0 +1,10 @@
+import os
+
+from prometheus_client import multiprocess
+
+
+def child_exit(server, worker):
+    # A dead worker's pool gauges would otherwise keep counting towards
+    # /metrics in multiprocess mode (see ebazaar/metrics.py).
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(worker.pid)
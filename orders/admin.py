@@ -1,7 +1,37 @@
 from django.contrib import admin
 
-from .models import Order, OrderItem, OrderTracking, Payment
+from .models import IdempotencyKey, Order, OrderItem, OrderTracking, Payment, WebhookEvent
 
 # Register your models here.
 
-admin.site.register([Order, OrderItem, OrderTracking, Payment])
\ No newline at end of file
+@admin.register(Order)
+class OrderAdmin(admin.ModelAdmin):
+    list_select_related = ["user"]
+
+
+@admin.register(OrderItem)
+class OrderItemAdmin(admin.ModelAdmin):
+    list_select_related = ["product"]
+
+
+@admin.register(OrderTracking)
+class OrderTrackingAdmin(admin.ModelAdmin):
+    list_select_related = ["order__user"]
+
+
+admin.site.register(Payment)
+
+
+@admin.register(WebhookEvent)
+class WebhookEventAdmin(admin.ModelAdmin):
+    list_display = ["event_id", "event", "status", "attempts", "received_at"]
+    list_filter = ["status", "event"]
+    search_fields = ["event_id", "razorpay_order_id"]
+
+
+@admin.register(IdempotencyKey)
+class IdempotencyKeyAdmin(admin.ModelAdmin):
+    list_display = ["key", "endpoint", "user", "response_status", "created_at", "expires_at"]
+    list_filter = ["endpoint"]
+    list_select_related = ["user"]
+    search_fields = ["key"]
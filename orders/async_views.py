@@ -0,0 +1,94 @@
+import logging
+
+from asgiref.sync import sync_to_async
+from django.shortcuts import aget_object_or_404
+from django.utils.decorators import method_decorator
+from razorpay.errors import BadRequestError
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from ebazaar.async_views import AsyncAPIView, async_condition
+from .checkout import place_order
+from .etags import (
+    order_detail_etag,
+    user_orders_etag,
+)
+from .gateway import AsyncGatewayClient, GatewayRejected, GatewayUnavailable
+from .idempotency import idempotent
+from .models import Order, Payment
+from .pagination import OrderPagination
+from .reservations import release_reservations
+from .serializers import CheckoutSerializer, OrderSerializer
+from .views import client, order_queryset, payment_response
+
+# Async twins of the order views, routed instead of them when
+# settings.ASYNC_API is on. Responses are identical.
+
+logger = logging.getLogger(__name__)
+
+async_client = AsyncGatewayClient(client)
+
+
+class AsyncUserOrdersView(AsyncAPIView):
+    permission_classes = [IsAuthenticated]
+
+    @method_decorator(async_condition(
+        etag_func=user_orders_etag,
+    ))
+    async def get(self, request):
+        fields = OrderSerializer.requested_fields(request)
+        serializer = OrderSerializer.values_serializer(fields)
+        orders = Order.objects.filter(user=request.user).order_by("-id").values(*serializer.columns)
+        paginator = OrderPagination()
+        result_page = await paginator.apaginate_queryset(orders, request)
+        return paginator.get_paginated_response(await serializer.aserialize(result_page))
+
+
+class AsyncOrderDetailView(AsyncAPIView):
+    permission_classes = [IsAuthenticated]
+
+    @method_decorator(async_condition(
+        etag_func=order_detail_etag,
+    ))
+    async def get(self, request, pk):
+        fields = OrderSerializer.requested_fields(request)
+        order = await aget_object_or_404(order_queryset(request, fields), pk=pk)
+        serializer = OrderSerializer(order, fields=fields)
+        return Response(serializer.data)
+
+
+class AsyncCreateOrderPaymentView(AsyncAPIView):
+    permission_classes = [IsAuthenticated]
+
+    @idempotent("payment-create")
+    async def post(self, request):
+        serializer = CheckoutSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        order, payment = await sync_to_async(place_order)(request.user, serializer.validated_data)
+
+        # The event loop keeps serving other requests while Razorpay answers.
+        if payment is None:
+            try:
+                razorpay_order = await async_client.create_order({
+                    "amount": int(order.grand_total * 100),
+                    "currency": "INR",
+                    "payment_capture": 1
+                })
+            except (GatewayUnavailable, BadRequestError) as exc:
+                await sync_to_async(release_reservations)(order)
+                if isinstance(exc, BadRequestError):
+                    logger.warning("Razorpay rejected order %s: %s", order.pk, exc)
+                    raise GatewayRejected() from exc
+                raise
+
+            payment, _ = await Payment.objects.aupdate_or_create(
+                order=order,
+                defaults={
+                    "razorpay_order_id": razorpay_order["id"],
+                    "amount": order.grand_total,
+                    "status": "CREATED",
+                },
+            )
+
+        return Response(payment_response(order, payment))
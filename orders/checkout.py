@@ -0,0 +1,73 @@
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from store.models import Product
+from .models import Order, OrderItem, Payment
+from .reservations import reserve_stock
+from .state import track
+
+
+def resolve_cart(items):
+    # Merge repeated lines, then price everything from a single product query.
+    quantities = {}
+    for item in items:
+        quantities[item["product"]] = quantities.get(item["product"], 0) + item["quantity"]
+
+    products = Product.objects.in_bulk(list(quantities))
+    missing = sorted(set(quantities) - set(products))
+    if missing:
+        raise ValidationError({"items": [f"Unknown product {pk}" for pk in missing]})
+
+    lines = [(products[pk], quantity) for pk, quantity in quantities.items()]
+    total = sum((product.price * quantity for product, quantity in lines), start=0)
+    return lines, total
+
+
+def write_order_items(order, lines):
+    OrderItem.objects.filter(order=order).delete()
+    OrderItem.objects.bulk_create([
+        OrderItem(order=order, product=product, quantity=quantity, price=product.price)
+        for product, quantity in lines
+    ])
+
+
+@transaction.atomic
+def place_order(user, data):
+    # Everything checkout does in the database before Razorpay is called;
+    # it commits on return so no locks are held during the gateway call.
+    lines, total = resolve_cart(data["items"])
+    grand_total = total + data["delivery_charges"] + data["tax"]
+
+    # Check for existing pending order
+    order = Order.objects.filter(
+        user=user,
+        status="PENDING_PAYMENT"
+    ).last()
+
+    if not order:
+        order = Order.objects.create(
+            user=user,
+            total=total,
+            delivery_charges=data["delivery_charges"],
+            tax=data["tax"],
+            grand_total=grand_total,
+        )
+    else:
+        #IMPORTANT: Update total on retry
+        order.total = total
+        order.delivery_charges = data["delivery_charges"]
+        order.tax = data["tax"]
+        order.grand_total = grand_total
+        order.save()
+
+    write_order_items(order, lines)
+    reserve_stock(order, lines)
+
+    # Add initial tracking update
+    track(order, "PENDING_PAYMENT")
+
+    # Reuse the pending Razorpay order only while the amount still matches
+    payment = Payment.objects.filter(order=order).first()
+    if payment and payment.status == "CREATED" and payment.amount == order.grand_total:
+        return order, payment
+    return order, None
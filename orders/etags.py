@@ -0,0 +1,34 @@
+from django.db.models import Count, Max
+
+from store.etags import make_etag
+from .models import Order
+
+
+# Validated by ETag only, as products are (see store.etags): a Last-Modified
+# in whole seconds would hide a second change within the same second.
+
+def _orders_etag(request, **filters):
+    state = Order.objects.filter(user=request.user, **filters).aggregate(
+        count=Count("id", distinct=True),
+        modified=Max("updated_at"),
+        tracking_count=Count("tracking_updates", distinct=True),
+        tracking_modified=Max("tracking_updates__time"),
+    )
+    if not state["count"]:
+        return None
+    return make_etag(
+        request,
+        request.user.pk,
+        state["count"],
+        state["modified"],
+        state["tracking_count"],
+        state["tracking_modified"],
+    )
+
+
+def user_orders_etag(request):
+    return _orders_etag(request)
+
+
+def order_detail_etag(request, pk):
+    return _orders_etag(request, pk=pk)
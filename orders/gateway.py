@@ -0,0 +1,257 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+import weakref
+
+import razorpay
+import requests
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from razorpay.constants import ERROR_CODE
+from razorpay.errors import BadRequestError, GatewayError, ServerError
+from requests.adapters import HTTPAdapter
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from ebazaar.metrics import RAZORPAY_LATENCY
+
+try:
+    import httpx
+except ImportError:  # Optional; only AsyncGatewayClient uses it.
+    httpx = None
+
+logger = logging.getLogger(__name__)
+
+
+class GatewayUnavailable(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = "Payment gateway unavailable, please retry shortly"
+    default_code = "gateway_unavailable"
+
+
+class GatewayRejected(APIException):
+    # Razorpay answered 4xx to a request we built; retrying won't help.
+    status_code = status.HTTP_502_BAD_GATEWAY
+    default_detail = "Payment gateway rejected the request"
+    default_code = "gateway_rejected"
+
+
+class CircuitBreaker:
+    # Opens after `failure_threshold` consecutive failures and fails fast for
+    # `reset_timeout` seconds, then lets a single trial request through
+    # (half-open) to decide whether to close again.
+
+    def __init__(self, failure_threshold=5, reset_timeout=30, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+
+    def allow(self):
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and self.clock() - self.opened_at >= self.reset_timeout:
+                self.state = "half-open"
+            if self.state == "half-open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.state == "half-open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    logger.warning("Razorpay circuit opened after %s failure(s)", self.failures)
+                self.state = "open"
+                self.opened_at = self.clock()
+
+
+# Connection problems, timeouts, 5xx and unparseable (proxy) error pages are
+# worth another attempt; a 4xx BadRequestError is the caller's problem.
+RETRYABLE = (requests.RequestException, ServerError, GatewayError, ValueError)
+
+
+class GatewayClient(razorpay.Client):
+    # razorpay.Client with a pooled session, (connect, read) timeouts on every
+    # call, bounded retries with full jitter and a circuit breaker. A retried
+    # order create can leave an unused Razorpay order behind; those expire
+    # unpaid on Razorpay's side.
+
+    def __init__(self, *, timeout, max_retries=2, retry_base_delay=0.1, retry_max_delay=1.0,
+                 pool_size=10, breaker=None, **options):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        super().__init__(session=session, **options)
+
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.gateway_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.breaker = breaker or CircuitBreaker()
+
+    def request(self, method, path, **options):
+        options.setdefault("timeout", self.timeout)
+        for attempt in range(self.gateway_retries + 1):
+            start = time.perf_counter()
+            if not self.breaker.allow():
+                _observe(path, "circuit_open", start)
+                raise GatewayUnavailable()
+            try:
+                response = self._send(method, path, **options)
+            except BadRequestError:
+                _observe(path, "bad_request", start)
+                self.breaker.record_success()
+                raise
+            except RETRYABLE as exc:
+                _observe(path, "error", start)
+                self.breaker.record_failure()
+                logger.warning("Razorpay %s %s failed (attempt %s): %r", method.upper(), path, attempt + 1, exc)
+                if attempt == self.gateway_retries:
+                    raise GatewayUnavailable() from exc
+                time.sleep(self.backoff(attempt))
+                continue
+            except BaseException:
+                # Anything else (an unexpected error body, a cancelled
+                # request) still has to end a half-open trial.
+                _observe(path, "error", start)
+                self.breaker.record_failure()
+                raise
+            _observe(path, "ok", start)
+            self.breaker.record_success()
+            return response
+
+    def _send(self, method, path, **options):
+        # The parent's request() retries with multi-second sleeps and prints to
+        # stdout; this is the same single attempt without either.
+        options = self._update_user_agent_header(options)
+        response = getattr(self.session, method)(
+            f"{self.base_url}{path}", auth=self.auth, verify=self.cert_path, **options,
+        )
+        return _parse(response)
+
+    def backoff(self, attempt):
+        delay = min(self.retry_max_delay, self.retry_base_delay * 2 ** attempt)
+        return random.uniform(0, delay)
+
+
+def _observe(path, outcome, start):
+    # Labelled by resource ("orders", "payments"), not the full path, which
+    # carries ids.
+    parts = path.strip("/").split("/")
+    RAZORPAY_LATENCY.observe(time.perf_counter() - start, parts[1] if len(parts) > 1 else parts[0], outcome)
+
+
+def _parse(response):
+    # Works for requests and httpx responses alike.
+    if 200 <= response.status_code < 300:
+        return {} if response.status_code == 204 else response.json()
+
+    error = response.json().get("error", {})
+    code = str(error.get("code", "")).upper()
+    message = error.get("description", "")
+    if code == ERROR_CODE.BAD_REQUEST_ERROR:
+        raise BadRequestError(message)
+    if code == ERROR_CODE.GATEWAY_ERROR:
+        raise GatewayError(message)
+    raise ServerError(message)
+
+
+class AsyncGatewayClient:
+    # Async counterpart of GatewayClient for the ASGI views, on httpx, so a
+    # single event loop can wait on many Razorpay calls. It reuses the sync
+    # client's credentials, timeouts, retry policy and circuit breaker, so both
+    # paths agree on gateway health. Without httpx installed, calls run the
+    # sync client on a worker thread instead.
+
+    def __init__(self, sync_client):
+        if httpx is None:
+            logger.warning("httpx is not installed; async checkout will call Razorpay from worker threads")
+        self.sync_client = sync_client
+        # httpx connection pools belong to the event loop that opened them.
+        self._clients = weakref.WeakKeyDictionary()
+
+    def _http(self):
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            connect, read = self.sync_client.timeout
+            pool_size = self.sync_client.pool_size
+            user_agent = self.sync_client._update_user_agent_header({})["headers"]["User-Agent"]
+            client = self._clients[loop] = httpx.AsyncClient(
+                base_url=self.sync_client.base_url,
+                auth=self.sync_client.auth,
+                timeout=httpx.Timeout(read, connect=connect),
+                limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+                headers={"User-Agent": user_agent.strip()},
+            )
+        return client
+
+    async def create_order(self, data):
+        if httpx is None:
+            return await sync_to_async(self.sync_client.order.create, thread_sensitive=False)(data)
+        return await self.request("POST", "/v1/orders", json=data)
+
+    async def request(self, method, path, **options):
+        sync_client = self.sync_client
+        breaker = sync_client.breaker
+        retryable = (httpx.TransportError, ServerError, GatewayError, ValueError)
+
+        for attempt in range(sync_client.gateway_retries + 1):
+            start = time.perf_counter()
+            if not breaker.allow():
+                _observe(path, "circuit_open", start)
+                raise GatewayUnavailable()
+            try:
+                response = _parse(await self._http().request(method, path, **options))
+            except BadRequestError:
+                _observe(path, "bad_request", start)
+                breaker.record_success()
+                raise
+            except retryable as exc:
+                _observe(path, "error", start)
+                breaker.record_failure()
+                logger.warning("Razorpay %s %s failed (attempt %s): %r", method, path, attempt + 1, exc)
+                if attempt == sync_client.gateway_retries:
+                    raise GatewayUnavailable() from exc
+                await asyncio.sleep(sync_client.backoff(attempt))
+                continue
+            except BaseException:
+                # Including CancelledError when the ASGI client disconnects.
+                _observe(path, "error", start)
+                breaker.record_failure()
+                raise
+            _observe(path, "ok", start)
+            breaker.record_success()
+            return response
+
+
+def build_client():
+    return GatewayClient(
+        auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET),
+        base_url=settings.RAZORPAY_BASE_URL,
+        timeout=(settings.RAZORPAY_CONNECT_TIMEOUT, settings.RAZORPAY_READ_TIMEOUT),
+        max_retries=settings.RAZORPAY_MAX_RETRIES,
+        pool_size=settings.RAZORPAY_POOL_SIZE,
+        breaker=CircuitBreaker(
+            failure_threshold=settings.RAZORPAY_BREAKER_THRESHOLD,
+            reset_timeout=settings.RAZORPAY_BREAKER_RESET_SECONDS,
+        ),
+    )
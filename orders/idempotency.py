@@ -0,0 +1,137 @@
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+from inspect import iscoroutinefunction
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+# A key held this long without a stored response belongs to a dead request.
+LOCK_TIMEOUT = timedelta(minutes=1)
+
+
+class RequestInProgress(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "A request with this Idempotency-Key is still in progress"
+    default_code = "idempotency_in_progress"
+
+
+class KeyReused(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = "This Idempotency-Key was already used for a different request"
+    default_code = "idempotency_key_reused"
+
+
+def fingerprint(request):
+    body = json.dumps(request.data, sort_keys=True, cls=DjangoJSONEncoder)
+    return hashlib.sha256(f"{request.method} {request.path}\n{body}".encode()).hexdigest()
+
+
+def begin(request, endpoint):
+    # Returns (record, None) when the view should run, holding the key, or
+    # (None, response) when a finished request's response should be replayed.
+    key = request.headers.get(HEADER)
+    if not key:
+        return None, None
+    if len(key) > MAX_KEY_LENGTH:
+        raise ValidationError({HEADER: [f"Ensure this header has no more than {MAX_KEY_LENGTH} characters."]})
+
+    request_hash = fingerprint(request)
+    lookup = {"user": request.user, "key": key, "endpoint": endpoint}
+    for _ in range(3):
+        now = timezone.now()
+        try:
+            # The unique constraint decides which of several racing requests
+            # gets to run.
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    **lookup, request_hash=request_hash, expires_at=now + settings.IDEMPOTENCY_KEY_TTL,
+                )
+            return record, None
+        except IntegrityError:
+            record = IdempotencyKey.objects.filter(**lookup).first()
+
+        if record is None:
+            continue
+        stale = record.response_status is None and record.created_at <= now - LOCK_TIMEOUT
+        if record.expires_at <= now or stale:
+            IdempotencyKey.objects.filter(pk=record.pk).delete()
+            continue
+        if record.request_hash != request_hash:
+            raise KeyReused()
+        if record.response_status is None:
+            raise RequestInProgress()
+        return None, replay(record)
+    raise RequestInProgress()
+
+
+def replay(record):
+    return Response(record.response_body, status=record.response_status, headers={"Idempotent-Replayed": "true"})
+
+
+def finish(record, response):
+    if record is None:
+        return
+    if response.status_code >= 500 or not hasattr(response, "data"):
+        abandon(record)
+        return
+    IdempotencyKey.objects.filter(pk=record.pk).update(
+        response_status=response.status_code, response_body=response.data,
+    )
+
+
+def abandon(record):
+    if record is not None:
+        IdempotencyKey.objects.filter(pk=record.pk).delete()
+
+
+def idempotent(endpoint):
+    # Decorates an APIView handler. Requests carrying an Idempotency-Key run
+    # once per (user, key, endpoint); retries get the stored response. Raised
+    # exceptions and 5xx responses free the key so the client can try again.
+    def decorator(handler):
+        if iscoroutinefunction(handler):
+            @wraps(handler)
+            async def inner(view, request, *args, **kwargs):
+                record, replayed = await sync_to_async(begin)(request, endpoint)
+                if replayed is not None:
+                    return replayed
+                try:
+                    response = await handler(view, request, *args, **kwargs)
+                except BaseException:
+                    await sync_to_async(abandon)(record)
+                    raise
+                await sync_to_async(finish)(record, response)
+                return response
+            return inner
+
+        @wraps(handler)
+        def inner(view, request, *args, **kwargs):
+            record, replayed = begin(request, endpoint)
+            if replayed is not None:
+                return replayed
+            try:
+                response = handler(view, request, *args, **kwargs)
+            except BaseException:
+                abandon(record)
+                raise
+            finish(record, response)
+            return response
+        return inner
+    return decorator
+
+
+def delete_expired(now=None):
+    deleted, _ = IdempotencyKey.objects.filter(expires_at__lte=now or timezone.now()).delete()
+    return deleted
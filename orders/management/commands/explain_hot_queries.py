@@ -0,0 +1,63 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from orders.models import IdempotencyKey, Order, OrderItem, OrderTracking, Payment, StockReservation, WebhookEvent
+
+# "Seq Scan on orders_order" (PostgreSQL), "SCAN orders_order" (SQLite).
+SEQUENTIAL_SCAN = re.compile(r"\bSeq Scan on (\w+)|\bSCAN (\w+)")
+
+
+def hot_queries():
+    # The lookups behind checkout, payment verification, webhooks and the
+    # order pages. Only the plan matters, so the ids are placeholders.
+    now = timezone.now()
+    return {
+        "checkout pending order": Order.objects.filter(user_id=1, status="PENDING_PAYMENT").order_by("-id")[:1],
+        "my-orders page": Order.objects.filter(user_id=1).order_by("-id")[:10],
+        "order detail": Order.objects.filter(user_id=1, pk=1),
+        "order items": OrderItem.objects.filter(order_id__in=[1, 2]),
+        "order tracking": OrderTracking.objects.filter(order_id__in=[1, 2]),
+        "payment by razorpay order": Payment.objects.filter(razorpay_order_id="order_1"),
+        "payment for order": Payment.objects.filter(order_id=1, status="CREATED"),
+        "held reservations": StockReservation.objects.filter(order_id=1, status="HELD"),
+        "expired reservations": StockReservation.objects.filter(status="HELD", expires_at__lte=now),
+        "webhook claim": WebhookEvent.objects.filter(
+            Q(status="PENDING", claimed_at__isnull=True) | Q(status="PROCESSING", claimed_at__lt=now),
+        ).order_by("pk")[:100],
+        "idempotency key": IdempotencyKey.objects.filter(user_id=1, key="k", endpoint="payment-create"),
+    }
+
+
+def sequential_scans(plan):
+    return sorted({next(filter(None, match.groups())) for match in SEQUENTIAL_SCAN.finditer(plan)})
+
+
+class Command(BaseCommand):
+    help = "EXPLAIN the order hot queries and fail if any of them needs a sequential scan."
+
+    def handle(self, *args, **options):
+        flagged = {}
+        with transaction.atomic():
+            if connection.vendor == "postgresql":
+                # Tiny tables are cheaper to scan; ask whether an index exists at all.
+                with connection.cursor() as cursor:
+                    cursor.execute("SET LOCAL enable_seqscan = off")
+
+            for name, queryset in hot_queries().items():
+                plan = queryset.explain()
+                scans = sequential_scans(plan)
+                if options["verbosity"] > 1:
+                    self.stdout.write(f"{name}:\n{plan}\n")
+                if scans:
+                    flagged[name] = scans
+                    self.stdout.write(self.style.ERROR(f"{name}: sequential scan on {', '.join(scans)}"))
+                else:
+                    self.stdout.write(f"{name}: ok")
+
+        if flagged:
+            raise CommandError(f"{len(flagged)} hot query(ies) need a sequential scan")
+        self.stdout.write(self.style.SUCCESS("All hot queries use an index"))
@@ -0,0 +1,42 @@
+import time
+
+import prometheus_client
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from orders.webhooks import process_pending
+
+
+class Command(BaseCommand):
+    help = "Apply queued Razorpay webhook events."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--workers", type=int, default=4)
+        parser.add_argument(
+            "--loop", action="store_true",
+            help="Keep polling the inbox instead of exiting once it is empty.",
+        )
+        parser.add_argument("--interval", type=float, default=1.0)
+        parser.add_argument(
+            "--metrics-port", type=int,
+            help="Serve this process's metrics for Prometheus to scrape; for when it doesn't share "
+                 "PROMETHEUS_MULTIPROC_DIR with the web workers, whose /metrics then covers it.",
+        )
+
+    def handle(self, *args, **options):
+        if options["metrics_port"]:
+            prometheus_client.start_http_server(options["metrics_port"])
+        total = 0
+        try:
+            while True:
+                close_old_connections()
+                claimed = process_pending(options["batch_size"], options["workers"])
+                total += claimed
+                if not claimed:
+                    if not options["loop"]:
+                        break
+                    time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            pass
+        self.stdout.write(self.style.SUCCESS(f"Handled {total} webhook event(s)"))
@@ -0,0 +1,307 @@
+import io
+import random
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from orders.models import Order, OrderItem, OrderTracking, Payment
+from orders.state import TRACKING_LABELS
+from store.cache import bump_catalog_version
+from store.models import Product
+from store.search import product_index
+
+DEFAULT_STATUSES = "DELIVERED=55,SHIPPED=10,CONFIRMED=10,PENDING_PAYMENT=20,CANCELLED=5"
+# Tracking rows an order in each status has accumulated, oldest first.
+TRACKING_PATHS = {
+    "PENDING_PAYMENT": ["PENDING_PAYMENT"],
+    "CONFIRMED": ["PENDING_PAYMENT", "CONFIRMED"],
+    "SHIPPED": ["PENDING_PAYMENT", "CONFIRMED", "SHIPPED"],
+    "DELIVERED": ["PENDING_PAYMENT", "CONFIRMED", "SHIPPED", "DELIVERED"],
+    "CANCELLED": ["PENDING_PAYMENT", "CANCELLED"],
+}
+PAYMENT_STATUSES = {"PENDING_PAYMENT": "CREATED", "CANCELLED": "FAILED"}
+# Gap before each tracking step, in minutes: (min, max).
+STEP_DELAYS = {
+    "CONFIRMED": (1, 30),
+    "SHIPPED": (60 * 12, 60 * 72),
+    "DELIVERED": (60 * 24, 60 * 120),
+    "CANCELLED": (5, 60 * 48),
+}
+FREE_DELIVERY_CENTS = 50000
+DELIVERY_CENTS = 4000
+TAX_RATE = 0.05
+
+ADJECTIVES = ("Classic", "Slim", "Organic", "Wireless", "Vintage", "Compact", "Premium", "Everyday", "Rugged", "Soft")
+NOUNS = ("Backpack", "T-Shirt", "Jacket", "Ring", "Monitor", "Hard Drive", "Bracelet", "Raincoat", "Kettle", "Lamp")
+FIRST_NAMES = ("Aarav", "Diya", "Ishaan", "Meera", "Kabir", "Ananya", "Rohan", "Saanvi", "Vivaan", "Zara")
+LAST_NAMES = ("Sharma", "Patel", "Reddy", "Iyer", "Khan", "Das", "Gupta", "Nair", "Singh", "Mehta")
+
+
+def parse_weights(text):
+    weights = {}
+    for part in filter(None, text.split(",")):
+        status, _, weight = part.partition("=")
+        if status not in TRACKING_PATHS:
+            raise CommandError(f"Unknown order status {status!r}; expected one of {', '.join(TRACKING_PATHS)}")
+        try:
+            weights[status] = float(weight)
+        except ValueError:
+            raise CommandError(f"Bad weight for {status}: {weight!r}") from None
+    if not weights or sum(weights.values()) <= 0:
+        raise CommandError("--statuses needs at least one positive weight")
+    return weights
+
+
+def skewed(rng, count, skew):
+    # skew 1 is uniform; higher values concentrate picks on the low indexes,
+    # giving a few heavy buyers and best-selling products.
+    return min(count - 1, int(count * rng.random() ** skew))
+
+
+def money(cents):
+    return Decimal(cents).scaleb(-2)
+
+
+def next_id(model):
+    return (model.objects.aggregate(top=Max("pk"))["top"] or 0) + 1
+
+
+class TableWriter:
+    # Writes rows given as tuples in `columns` order, with explicit ids so
+    # children can reference parents without reading anything back. Uses
+    # COPY on PostgreSQL and batched executemany() everywhere else.
+
+    def __init__(self, model, columns, use_copy):
+        fields = {field.attname: field for field in model._meta.concrete_fields}
+        quote = connection.ops.quote_name
+        self.model = model
+        self.table = quote(model._meta.db_table)
+        self.columns = ", ".join(quote(fields[name].column) for name in columns)
+        self.use_copy = use_copy
+        self.datetimes = [i for i, name in enumerate(columns) if fields[name].get_internal_type() == "DateTimeField"]
+        self.count = 0
+
+    def write(self, rows):
+        if not rows:
+            return
+        with connection.cursor() as cursor:
+            if self.use_copy:
+                self._copy(cursor, rows)
+            else:
+                self._insert(cursor, rows)
+        self.count += len(rows)
+
+    def _insert(self, cursor, rows):
+        placeholders = ", ".join(["%s"] * len(rows[0]))
+        adapt = connection.ops.adapt_datetimefield_value
+        if self.datetimes:
+            rows = [list(row) for row in rows]
+            for row in rows:
+                for i in self.datetimes:
+                    row[i] = adapt(row[i])
+        cursor.executemany(f"INSERT INTO {self.table} ({self.columns}) VALUES ({placeholders})", rows)
+
+    def _copy(self, cursor, rows):
+        buffer = io.StringIO()
+        for row in rows:
+            buffer.write("\t".join(map(copy_value, row)))
+            buffer.write("\n")
+        sql = f"COPY {self.table} ({self.columns}) FROM STDIN"
+        raw = cursor.cursor
+        if hasattr(raw, "copy_expert"):  # psycopg2
+            buffer.seek(0)
+            raw.copy_expert(sql, buffer)
+        else:  # psycopg 3
+            with raw.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+
+
+def copy_value(value):
+    # PostgreSQL COPY text format.
+    if value is None:
+        return r"\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    return str(value).replace("\\", "\\\\").replace("\t", "\\t").replace("\n", "\\n").replace("\r", "\\r")
+
+
+class Command(BaseCommand):
+    help = "Generate a large, deterministic set of users, products, orders, items, tracking rows and payments."
+    order_models = (Order, OrderItem, OrderTracking, Payment)
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--products", type=int, default=1000)
+        parser.add_argument("--orders", type=int, default=10000)
+        parser.add_argument("--items-per-order", type=float, default=2.5, help="Mean line items per order.")
+        parser.add_argument("--max-items", type=int, default=10)
+        parser.add_argument("--user-skew", type=float, default=2.0, help="1 spreads orders evenly over users.")
+        parser.add_argument("--product-skew", type=float, default=1.5, help="1 spreads sales evenly over products.")
+        parser.add_argument("--statuses", default=DEFAULT_STATUSES, help="Order status weights, STATUS=weight,...")
+        parser.add_argument("--days", type=int, default=365, help="Spread orders over this many past days.")
+        parser.add_argument("--password", default="loadtest-password", help="Hashed once and shared by every user.")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--no-copy", action="store_true", help="Use INSERTs even on PostgreSQL.")
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.options = options
+        self.use_copy = connection.vendor == "postgresql" and not options["no_copy"]
+        self.now = timezone.now().replace(microsecond=0)
+        self.start = self.now - timedelta(days=options["days"])
+        self.statuses = parse_weights(options["statuses"])
+        self.started = time.perf_counter()
+
+        user_ids = self.seed_users(options["users"])
+        products = self.seed_products(options["products"])
+        if options["orders"]:
+            if not user_ids or not products:
+                raise CommandError("Orders need users and products; seed some or keep existing ones.")
+            self.seed_orders(options["orders"], user_ids, products)
+
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), [get_user_model(), Product, *self.order_models]):
+                cursor.execute(sql)
+        if options["products"]:
+            bump_catalog_version()
+            product_index.reset()
+
+        elapsed = time.perf_counter() - self.started
+        self.stdout.write(self.style.SUCCESS(f"Done in {elapsed:.1f}s ({'COPY' if self.use_copy else 'INSERT'})"))
+
+    def moment(self):
+        return self.start + timedelta(seconds=self.rng.uniform(0, (self.now - self.start).total_seconds()))
+
+    def batches(self, count):
+        size = self.options["batch_size"]
+        for offset in range(0, count, size):
+            yield offset, min(size, count - offset)
+
+    def report(self, *writers):
+        rate = sum(writer.count for writer in writers) / (time.perf_counter() - self.started)
+        counts = ", ".join(f"{writer.count:,} {writer.model._meta.model_name}" for writer in writers)
+        self.stdout.write(f"{counts} ({rate:,.0f} rows/s)")
+
+    def seed_users(self, count):
+        User = get_user_model()
+        if not count:
+            return list(User.objects.order_by("pk").values_list("pk", flat=True))
+
+        first = next_id(User)
+        password = make_password(self.options["password"])
+        columns = ("id", "password", "is_superuser", "name", "email", "phone", "is_active", "is_staff", "created_at")
+        writer = TableWriter(User, columns, self.use_copy)
+        rng = self.rng
+        for offset, size in self.batches(count):
+            rows = []
+            for pk in range(first + offset, first + offset + size):
+                name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+                phone = f"9{rng.randrange(10 ** 9):09d}"
+                rows.append((pk, password, False, name, f"load{pk}@example.com", phone, True, False, self.moment()))
+            with transaction.atomic():
+                writer.write(rows)
+            self.report(writer)
+        return list(range(first, first + count))
+
+    def seed_products(self, count):
+        if not count:
+            return list(Product.objects.order_by("pk").values_list("pk", "price"))
+
+        first = next_id(Product)
+        columns = ("id", "sku", "title", "description", "price", "image", "stock", "created_at", "updated_at")
+        writer = TableWriter(Product, columns, self.use_copy)
+        rng = self.rng
+        products = []
+        for offset, size in self.batches(count):
+            rows = []
+            for pk in range(first + offset, first + offset + size):
+                title = f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {pk}"
+                # Long-tailed prices, mostly between 100 and 2,000.
+                price = money(min(9_999_999, max(100, int(rng.lognormvariate(11, 1)))))
+                stock = 0 if rng.random() < 0.05 else rng.randint(1, 500)
+                created = self.moment()
+                rows.append((
+                    pk, f"LOAD-{pk:08d}", title, f"{title}, generated for load testing.", price,
+                    f"https://example.com/img/{pk}.png", stock, created, created,
+                ))
+                products.append((pk, price))
+            with transaction.atomic():
+                writer.write(rows)
+            self.report(writer)
+        return products
+
+    def seed_orders(self, count, user_ids, products):
+        first = {model: next_id(model) for model in self.order_models}
+        orders = TableWriter(Order, (
+            "id", "user_id", "total", "delivery_charges", "tax", "grand_total", "status", "updated_at",
+        ), self.use_copy)
+        items = TableWriter(OrderItem, ("id", "order_id", "product_id", "quantity", "price"), self.use_copy)
+        tracking = TableWriter(OrderTracking, ("id", "order_id", "status", "time"), self.use_copy)
+        payments = TableWriter(Payment, (
+            "id", "order_id", "razorpay_order_id", "razorpay_payment_id", "razorpay_signature",
+            "amount", "currency", "status", "created_at",
+        ), self.use_copy)
+
+        rng = self.rng
+        options = self.options
+        statuses, weights = list(self.statuses), list(self.statuses.values())
+        extra_items = max(options["items_per_order"] - 1, 0)
+        span = (self.now - self.start).total_seconds()
+        item_id, tracking_id = first[OrderItem], first[OrderTracking]
+
+        for offset, size in self.batches(count):
+            order_rows, item_rows, tracking_rows, payment_rows = [], [], [], []
+            for n in range(offset, offset + size):
+                order_id = first[Order] + n
+                # Ids increase with time, as they do in production.
+                placed = self.start + timedelta(seconds=span * (n + rng.random()) / count)
+                status = rng.choices(statuses, weights)[0]
+
+                lines = 1 + (min(int(rng.expovariate(1 / extra_items)), options["max_items"] - 1) if extra_items else 0)
+                total = 0
+                picks = (products[skewed(rng, len(products), options["product_skew"])] for _ in range(lines))
+                for product_id, price in dict.fromkeys(picks):
+                    quantity = rng.choices((1, 2, 3), (80, 15, 5))[0]
+                    item_rows.append((item_id, order_id, product_id, quantity, price))
+                    item_id += 1
+                    total += int(price * 100) * quantity
+
+                moment = placed
+                for step in TRACKING_PATHS[status]:
+                    if step in STEP_DELAYS:
+                        moment += timedelta(minutes=rng.uniform(*STEP_DELAYS[step]))
+                    tracking_rows.append((tracking_id, order_id, TRACKING_LABELS[step], min(moment, self.now)))
+                    tracking_id += 1
+
+                delivery = 0 if total >= FREE_DELIVERY_CENTS else DELIVERY_CENTS
+                tax = round(total * TAX_RATE)
+                grand_total = money(total + delivery + tax)
+                order_rows.append((
+                    order_id, user_ids[skewed(rng, len(user_ids), options["user_skew"])], money(total),
+                    money(delivery), money(tax), grand_total, status, min(moment, self.now),
+                ))
+
+                payment_status = PAYMENT_STATUSES.get(status, "SUCCESS")
+                paid = payment_status == "SUCCESS"
+                payment_rows.append((
+                    first[Payment] + n, order_id, f"order_load{order_id}",
+                    f"pay_load{order_id}" if paid else None,
+                    f"{rng.getrandbits(256):064x}" if paid else None,
+                    grand_total, "INR", payment_status, placed,
+                ))
+
+            with transaction.atomic():
+                orders.write(order_rows)
+                items.write(item_rows)
+                tracking.write(tracking_rows)
+                payments.write(payment_rows)
+            self.report(orders, items, tracking, payments)
@@ -0,0 +1,35 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:33
+
+from django.db import migrations, models
+from django.db.models import Min
+
+
+def delete_duplicate_tracking(apps, schema_editor):
+    # Racing confirmations left repeated (order, status) rows; keep the first.
+    OrderTracking = apps.get_model("orders", "OrderTracking")
+    keep = (
+        OrderTracking.objects.values("order", "status")
+        .annotate(first=Min("id"))
+        .values("first")
+    )
+    OrderTracking.objects.exclude(id__in=keep).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0008_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='payment',
+            name='razorpay_order_id',
+            field=models.CharField(db_index=True, max_length=200),
+        ),
+        migrations.RunPython(delete_duplicate_tracking, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='ordertracking',
+            constraint=models.UniqueConstraint(fields=('order', 'status'), name='orders_tracking_order_status_uniq'),
+        ),
+    ]
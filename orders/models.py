@@ -1,6 +1,7 @@
 from django.db import models
 from store.models import Product
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 # Create your models here.
 
 class Order(models.Model):
@@ -20,6 +21,14 @@ class Order(models.Model):
         ],
         default="PENDING_PAYMENT"
     )
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # my-orders pages and the checkout's pending-order lookup
+            models.Index(fields=["user", "-id"], name="orders_order_user_idx"),
+            models.Index(fields=["user", "status", "-id"], name="orders_order_user_status_idx"),
+        ]
 
     def __str__(self):
         return f"Order #{self.id} - {self.user.email}"
@@ -40,13 +49,18 @@ class OrderTracking(models.Model):
     status = models.CharField(max_length=50)
     time = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["order", "status"], name="orders_tracking_order_status_uniq"),
+        ]
+
     def __str__(self):
         return f"{self.order} - {self.status}"
 
 
 class Payment(models.Model):
     order = models.OneToOneField(Order, on_delete=models.CASCADE, related_name="payment")
-    razorpay_order_id = models.CharField(max_length=200)
+    razorpay_order_id = models.CharField(max_length=200, db_index=True)
     razorpay_payment_id = models.CharField(max_length=200, null=True, blank=True)
     razorpay_signature = models.CharField(max_length=500, null=True, blank=True)
 
@@ -60,4 +74,79 @@ class Payment(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
-        return f"{self.order.id} - {self.status}"
\ No newline at end of file
+        return f"{self.order_id} - {self.status}"
+
+
+class StockReservation(models.Model):
+    order = models.ForeignKey(Order, related_name="reservations", on_delete=models.CASCADE)
+    product = models.ForeignKey(Product, on_delete=models.CASCADE)
+    quantity = models.PositiveIntegerField()
+    status = models.CharField(max_length=20, choices=[
+        ("HELD", "Held"),
+        ("COMMITTED", "Committed"),
+        ("RELEASED", "Released"),
+    ], default="HELD")
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "expires_at"], name="orders_reservation_expiry_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.order_id} - {self.product_id} X {self.quantity} ({self.status})"
+
+class WebhookEvent(models.Model):
+    # Inbox for Razorpay webhooks: the view only verifies and stores the event,
+    # orders.webhooks drains it. event_id is unique so retried deliveries
+    # collapse into one row.
+    event_id = models.CharField(max_length=100, unique=True)
+    event = models.CharField(max_length=50)
+    razorpay_order_id = models.CharField(max_length=200, blank=True)
+    payload = models.JSONField()
+    status = models.CharField(max_length=20, choices=[
+        ("PENDING", "Pending"),
+        ("PROCESSING", "Processing"),
+        ("PROCESSED", "Processed"),
+        ("FAILED", "Failed"),
+    ], default="PENDING")
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    claim_token = models.UUIDField(null=True, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "id"], name="orders_webhook_status_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.event} {self.event_id} ({self.status})"
+
+
+class IdempotencyKey(models.Model):
+    # One row per Idempotency-Key a user sent to an endpoint. While the first
+    # request runs, response_status is null and retries get a 409; afterwards
+    # they get the stored response until expires_at.
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    key = models.CharField(max_length=255)
+    endpoint = models.CharField(max_length=100)
+    request_hash = models.CharField(max_length=64)
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "key", "endpoint"], name="orders_idempotency_key_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=["expires_at"], name="orders_idempotency_expiry_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.endpoint} {self.key} ({self.response_status or 'in progress'})"
@@ -0,0 +1,9 @@
+from rest_framework.pagination import PageNumberPagination
+
+from ebazaar.pagination import AsyncPageNumberMixin
+
+
+class OrderPagination(AsyncPageNumberMixin, PageNumberPagination):
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 50
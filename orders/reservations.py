@@ -0,0 +1,128 @@
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, F, PositiveIntegerField, Value, When
+from django.db.models.functions import Now
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from store.cache import bump_catalog_version
+from store.models import Product
+from .models import StockReservation
+
+logger = logging.getLogger(__name__)
+
+
+class OutOfStock(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = "Insufficient stock"
+    default_code = "out_of_stock"
+
+    def __init__(self, product=None):
+        super().__init__({"error": self.default_detail, "product": product})
+
+
+def _needed(quantities):
+    return Case(
+        *[When(pk=pk, then=Value(quantity)) for pk, quantity in quantities.items()],
+        output_field=PositiveIntegerField(),
+    )
+
+
+def _take(quantities):
+    # Lock the rows in primary key order so concurrent multi-line checkouts
+    # can't deadlock, then decrement everything in one conditional UPDATE;
+    # the WHERE clause is what guarantees stock never goes below zero.
+    locked = Product.objects.select_for_update().filter(pk__in=quantities).order_by("pk")
+    for pk, stock in locked.values_list("pk", "stock"):
+        if stock < quantities[pk]:
+            raise OutOfStock(pk)
+
+    needed = _needed(quantities)
+    updated = Product.objects.filter(pk__in=quantities, stock__gte=needed).update(
+        stock=F("stock") - needed, updated_at=Now(),
+    )
+    if updated != len(quantities):
+        # Only reachable without row locks (SQLite): someone got there first.
+        raise OutOfStock()
+
+
+def _give_back(product_id, quantity):
+    Product.objects.filter(pk=product_id).update(
+        stock=F("stock") + quantity, updated_at=Now(),
+    )
+
+
+def _release(reservations):
+    released = 0
+    for reservation in reservations:
+        # Flip the status first so a reservation is only ever restocked once.
+        if StockReservation.objects.filter(pk=reservation.pk, status="HELD").update(status="RELEASED"):
+            _give_back(reservation.product_id, reservation.quantity)
+            released += 1
+    return released
+
+
+@transaction.atomic
+def reserve_stock(order, lines):
+    # A retried checkout replaces the previous cart's reservations.
+    _release(order.reservations.filter(status="HELD"))
+    order.reservations.all().delete()
+
+    _take({product.pk: quantity for product, quantity in lines})
+
+    expires_at = timezone.now() + settings.STOCK_RESERVATION_TTL
+    reservations = StockReservation.objects.bulk_create([
+        StockReservation(order=order, product=product, quantity=quantity, expires_at=expires_at)
+        for product, quantity in lines
+    ])
+    transaction.on_commit(bump_catalog_version)
+    return reservations
+
+
+@transaction.atomic
+def release_reservations(order):
+    released = _release(order.reservations.filter(status="HELD"))
+    if released:
+        transaction.on_commit(bump_catalog_version)
+    return released
+
+
+@transaction.atomic
+def commit_reservations(order):
+    order.reservations.filter(status="HELD").update(status="COMMITTED")
+
+    # Razorpay lets a customer retry after payment.failed, and a capture can
+    # arrive after expiry; take the stock again for anything released meanwhile.
+    retaken = 0
+    for reservation in order.reservations.filter(status="RELEASED"):
+        try:
+            with transaction.atomic():
+                _take({reservation.product_id: reservation.quantity})
+        except OutOfStock:
+            logger.warning(
+                "Order %s paid but product %s is out of stock (%s requested)",
+                order.pk, reservation.product_id, reservation.quantity,
+            )
+            continue
+        StockReservation.objects.filter(pk=reservation.pk).update(status="COMMITTED")
+        retaken += 1
+    if retaken:
+        transaction.on_commit(bump_catalog_version)
+
+
+def release_expired_reservations(now=None):
+    expired = StockReservation.objects.filter(
+        status="HELD",
+        expires_at__lte=now or timezone.now(),
+        order__status="PENDING_PAYMENT",
+    )
+    released = 0
+    for reservation in expired.iterator():
+        with transaction.atomic():
+            released += _release([reservation])
+    if released:
+        bump_catalog_version()
+    return released
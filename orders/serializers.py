@@ -1,5 +1,6 @@
 from rest_framework import serializers
 
+from ebazaar.serializers import SparseFieldsetMixin
 from .models import Order, OrderItem, OrderTracking
 
 class OrderItemSerializer(serializers.ModelSerializer):
@@ -14,10 +15,20 @@ class TrackingSerializer(serializers.ModelSerializer):
         fields = ["status", "time"]
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     items = OrderItemSerializer(many=True, read_only=True)
     tracking_updates = TrackingSerializer(many=True, read_only=True)
 
     class Meta:
         model = Order
-        fields = "__all__"
\ No newline at end of file
+        fields = "__all__"
+
+class CartItemSerializer(serializers.Serializer):
+    product = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=1)
+
+
+class CheckoutSerializer(serializers.Serializer):
+    items = CartItemSerializer(many=True, allow_empty=False)
+    delivery_charges = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0)
+    tax = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0)
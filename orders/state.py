@@ -0,0 +1,64 @@
+from django.db import transaction
+from django.db.models.functions import Now
+
+from .models import Order, OrderTracking, Payment
+from .reservations import commit_reservations
+
+# Allowed status changes. A failed payment can still be captured later
+# (Razorpay lets the customer retry), but nothing leaves SUCCESS.
+ORDER_TRANSITIONS = {
+    "PENDING_PAYMENT": {"CONFIRMED", "CANCELLED"},
+    "CONFIRMED": {"SHIPPED", "CANCELLED"},
+    "SHIPPED": {"DELIVERED"},
+    "DELIVERED": set(),
+    "CANCELLED": set(),
+}
+PAYMENT_TRANSITIONS = {
+    "CREATED": {"SUCCESS", "FAILED"},
+    "FAILED": {"SUCCESS"},
+    "SUCCESS": set(),
+}
+
+TRACKING_LABELS = dict(Order._meta.get_field("status").choices)
+
+
+def _sources(transitions, target):
+    return [source for source, targets in transitions.items() if target in targets]
+
+
+def move_order(order_id, target):
+    # The WHERE clause does the checking, so of several concurrent callers
+    # exactly one sees True; no read-then-write window.
+    return bool(Order.objects.filter(
+        pk=order_id, status__in=_sources(ORDER_TRANSITIONS, target),
+    ).update(status=target, updated_at=Now()))
+
+
+def move_payment(payment_id, target, **fields):
+    return bool(Payment.objects.filter(
+        pk=payment_id, status__in=_sources(PAYMENT_TRANSITIONS, target),
+    ).update(status=target, **fields))
+
+
+def track(order, status):
+    # (order, status) is unique, so a duplicate is silently dropped.
+    OrderTracking.objects.bulk_create(
+        [OrderTracking(order=order, status=TRACKING_LABELS.get(status, status))],
+        ignore_conflicts=True,
+    )
+
+
+@transaction.atomic
+def confirm_payment(payment, **fields):
+    # Returns False when the payment had already succeeded.
+    if not move_payment(payment.pk, "SUCCESS", **fields):
+        return False
+    if move_order(payment.order_id, "CONFIRMED"):
+        commit_reservations(payment.order)
+        track(payment.order, "CONFIRMED")
+    return True
+
+
+def fail_payment(payment):
+    # A late failure from an earlier attempt can't undo a capture.
+    return move_payment(payment.pk, "FAILED")
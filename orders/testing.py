@@ -0,0 +1,101 @@
+import itertools
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients that time out hang up mid-response; that's expected here.
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class FakeRazorpay:
+    # Local stand-in for the Razorpay orders API, for tests and benchmarks.
+    # Point RAZORPAY_BASE_URL (or GatewayClient(base_url=...)) at `url`, then
+    # tune `latency` and `error_rate`, or queue failures with fail().
+    #
+    #     with FakeRazorpay(latency=0.2) as fake:
+    #         client = GatewayClient(base_url=fake.url, ...)
+
+    def __init__(self, latency=0, error_rate=0, seed=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._ids = itertools.count(1)
+        self._failures = []
+        self._lock = threading.Lock()
+        self._server = None
+
+    def fail(self, count=1, status=500):
+        with self._lock:
+            self._failures.extend([status] * count)
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                fake.respond(self, self.path, json.loads(body or b"{}"))
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = _Server(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def respond(self, handler, path, data):
+        with self._lock:
+            self.requests += 1
+            status = self._failures.pop(0) if self._failures else None
+            if status is None and self._random.random() < self.error_rate:
+                status = 502
+
+        if self.latency:
+            time.sleep(self.latency)
+
+        if path.rstrip("/") != "/v1/orders":
+            status, payload = 404, {"error": {"code": "BAD_REQUEST_ERROR", "description": "Not found"}}
+        elif status is not None:
+            payload = {"error": {"code": "SERVER_ERROR", "description": "Injected failure"}}
+        else:
+            status, payload = 200, {
+                "id": f"order_fake{next(self._ids)}",
+                "entity": "order",
+                "amount": data.get("amount"),
+                "currency": data.get("currency", "INR"),
+                "status": "created",
+            }
+
+        content = json.dumps(payload).encode()
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(content)))
+        handler.end_headers()
+        handler.wfile.write(content)
@@ -1,3 +1,1136 @@
-from django.test import TestCase
+import asyncio
+import hashlib
+import hmac
+import io
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connection
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
+from razorpay.errors import BadRequestError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory, APITestCase, force_authenticate
+
+from ebazaar import metrics
+from ebazaar.db_routers import ReplicaRouter, read_from_primary, replica_pinning_middleware, routing_scope
+from store.models import Product
+from .async_views import AsyncCreateOrderPaymentView, AsyncOrderDetailView, AsyncUserOrdersView
+from .gateway import AsyncGatewayClient, CircuitBreaker, GatewayClient, GatewayUnavailable
+from .idempotency import delete_expired
+from .models import IdempotencyKey, Order, OrderItem, OrderTracking, Payment, StockReservation, WebhookEvent
+from .reservations import OutOfStock, reserve_stock
+from .serializers import OrderSerializer
+from .state import confirm_payment, fail_payment, move_order, track
+from .testing import FakeRazorpay
+from .webhooks import MAX_ATTEMPTS, process_pending
+
+User = get_user_model()
+
+
+def create_order(user, products, status="PENDING_PAYMENT"):
+    order = Order.objects.create(
+        user=user,
+        total=Decimal("100.00"),
+        delivery_charges=Decimal("0.00"),
+        tax=Decimal("18.00"),
+        grand_total=Decimal("118.00"),
+        status=status,
+    )
+    OrderItem.objects.bulk_create([
+        OrderItem(order=order, product=product, quantity=1, price=product.price)
+        for product in products
+    ])
+    OrderTracking.objects.create(order=order, status="Pending Payment")
+    return order
+
+
+class OrdersTestCase(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email="buyer@example.com", password="password123", name="Buyer",
+        )
+        self.products = Product.objects.bulk_create([
+            Product(
+                title=f"Product {i}",
+                description="",
+                price=Decimal("50.00"),
+                image="https://example.com/p.png",
+                stock=100,
+            )
+            for i in range(3)
+        ])
+        self.client.force_authenticate(self.user)
+
+
+class OrderConditionalGetTests(OrdersTestCase):
+    def setUp(self):
+        super().setUp()
+        self.order = create_order(self.user, self.products[:2])
+
+    def test_my_orders_not_modified(self):
+        etag = self.client.get("/api/orders/my-orders/")["ETag"]
+
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/orders/my-orders/", HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_tracking_update_changes_etag(self):
+        url = f"/api/orders/{self.order.pk}/"
+        etag = self.client.get(url)["ETag"]
+
+        OrderTracking.objects.create(order=self.order, status="Shipped")
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data["tracking_updates"]), 2)
+
+    def test_if_modified_since_is_ignored(self):
+        url = f"/api/orders/{self.order.pk}/"
+        self.assertNotIn("Last-Modified", self.client.get(url))
+
+        OrderTracking.objects.create(order=self.order, status="Shipped")
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60))
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_etag_is_per_user(self):
+        etag = self.client.get("/api/orders/my-orders/")["ETag"]
+        other = User.objects.create_user(email="other@example.com", password="x" * 8, name="O")
+        create_order(other, self.products[:2])
+
+        self.client.force_authenticate(other)
+        response = self.client.get("/api/orders/my-orders/", HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+
+
+class OrderQueryCountTests(OrdersTestCase):
+    def assertConstantQueries(self, url, create):
+        create()
+        with CaptureQueriesContext(connection) as few:
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+        for _ in range(5):
+            create()
+        with CaptureQueriesContext(connection) as many:
+            self.assertEqual(self.client.get(url).status_code, 200)
+
+        self.assertEqual(len(few), len(many))
+
+    def test_my_orders_query_count_is_constant(self):
+        self.assertConstantQueries(
+            "/api/orders/my-orders/",
+            lambda: create_order(self.user, self.products),
+        )
+
+    def test_order_detail_query_count_is_constant(self):
+        order = create_order(self.user, self.products[:1])
+        updates = iter(range(10))
+
+        def add_lines():
+            OrderItem.objects.create(
+                order=order, product=self.products[2], quantity=1, price=Decimal("1.00"),
+            )
+            OrderTracking.objects.create(order=order, status=f"Update {next(updates)}")
+
+        self.assertConstantQueries(f"/api/orders/{order.pk}/", add_lines)
+
+    def test_order_detail_does_not_load_products(self):
+        order = create_order(self.user, self.products)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"/api/orders/{order.pk}/")
+
+        self.assertEqual([item["product"] for item in response.data["items"]], [p.pk for p in self.products])
+        self.assertFalse(any('FROM "store_product"' in query["sql"] for query in queries))
+
+    def test_my_orders_is_paginated(self):
+        for _ in range(12):
+            create_order(self.user, self.products[:1])
+
+        response = self.client.get("/api/orders/my-orders/")
+
+        self.assertEqual(response.data["count"], 12)
+        self.assertEqual(len(response.data["results"]), 10)
+        self.assertIsNotNone(response.data["next"])
+
+    def test_other_users_order_is_404(self):
+        other = User.objects.create_user(email="other@example.com", password="x" * 8, name="O")
+        order = create_order(other, self.products[:1])
+
+        response = self.client.get(f"/api/orders/{order.pk}/")
+
+        self.assertEqual(response.status_code, 404)
+
+
+@mock.patch("orders.views.client")
+class CheckoutTests(OrdersTestCase):
+    url = "/api/orders/payment/create/"
+
+    def checkout(self, items, **extra):
+        payload = {"items": items, "delivery_charges": "40.00", "tax": "9.00", **extra}
+        return self.client.post(self.url, payload, format="json")
+
+    def test_totals_are_computed_from_products(self, gateway):
+        gateway.order.create.return_value = {"id": "order_1"}
+
+        response = self.checkout(
+            [{"product": self.products[0].pk, "quantity": 2, "price": "0.01"}],
+            total="0.01",
+            grand_total="0.01",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        order = Order.objects.get(pk=response.data["order_id"])
+        self.assertEqual(order.total, Decimal("100.00"))
+        self.assertEqual(order.grand_total, Decimal("149.00"))
+        self.assertEqual(order.items.get().price, Decimal("50.00"))
+        self.assertEqual(response.data["amount"], 14900)
+        gateway.order.create.assert_called_once_with(
+            {"amount": 14900, "currency": "INR", "payment_capture": 1},
+        )
+
+    def test_unknown_product_is_rejected(self, gateway):
+        response = self.checkout([{"product": 999999, "quantity": 1}])
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Order.objects.exists())
+        gateway.order.create.assert_not_called()
+
+    def test_query_count_does_not_grow_with_cart(self, gateway):
+        gateway.order.create.return_value = {"id": "order_1"}
+        extra = Product.objects.bulk_create([
+            Product(title="", description="", price=Decimal("1.00"), image="https://e.com", stock=5)
+            for _ in range(20)
+        ])
+
+        with CaptureQueriesContext(connection) as small:
+            self.checkout([{"product": self.products[0].pk, "quantity": 1}])
+        Order.objects.all().delete()
+        with CaptureQueriesContext(connection) as large:
+            self.checkout([{"product": p.pk, "quantity": 1} for p in extra])
+
+        self.assertEqual(len(small), len(large))
+
+    def test_retry_reuses_gateway_order_until_cart_changes(self, gateway):
+        gateway.order.create.side_effect = [{"id": "order_1"}, {"id": "order_2"}]
+        items = [{"product": self.products[0].pk, "quantity": 1}]
+
+        first = self.checkout(items)
+        second = self.checkout(items)
+        changed = self.checkout(items + [{"product": self.products[1].pk, "quantity": 1}])
+
+        self.assertEqual(first.data["razorpay_order_id"], "order_1")
+        self.assertEqual(second.data["razorpay_order_id"], "order_1")
+        self.assertEqual(changed.data["razorpay_order_id"], "order_2")
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(Payment.objects.get().amount, Decimal("149.00"))
+
+
+def sign(payload, secret="whsec"):
+    return hmac.new(secret.encode(), payload, hashlib.sha256).hexdigest()
+
+
+@override_settings(RAZORPAY_WEBHOOK_SECRET="whsec")
+@mock.patch("orders.views.client")
+class StockReservationTests(OrdersTestCase):
+    def setUp(self):
+        super().setUp()
+        self.product = self.products[0]
+        Product.objects.filter(pk=self.product.pk).update(stock=3)
+
+    def checkout(self, quantity):
+        return self.client.post("/api/orders/payment/create/", {
+            "items": [{"product": self.product.pk, "quantity": quantity}],
+            "delivery_charges": "0.00",
+            "tax": "0.00",
+        }, format="json")
+
+    def webhook(self, event, razorpay_order_id):
+        payload = json.dumps({
+            "event": event,
+            "payload": {"payment": {"entity": {"order_id": razorpay_order_id}}},
+        }).encode()
+        response = self.client.generic(
+            "POST", "/api/orders/payment/webhook/", payload,
+            content_type="application/json", HTTP_X_RAZORPAY_SIGNATURE=sign(payload),
+        )
+        process_pending()
+        return response
+
+    def stock(self):
+        return Product.objects.values_list("stock", flat=True).get(pk=self.product.pk)
+
+    def test_checkout_reserves_stock(self, gateway):
+        gateway.order.create.return_value = {"id": "order_1"}
+
+        self.assertEqual(self.checkout(2).status_code, 200)
+
+        self.assertEqual(self.stock(), 1)
+        self.assertEqual(StockReservation.objects.get().status, "HELD")
+
+    def test_oversell_is_rejected_and_rolled_back(self, gateway):
+        response = self.checkout(4)
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(self.stock(), 3)
+        self.assertFalse(Order.objects.exists())
+        gateway.order.create.assert_not_called()
+
+    def test_retry_replaces_previous_reservation(self, gateway):
+        gateway.order.create.side_effect = [{"id": "order_1"}, {"id": "order_2"}]
+
+        self.checkout(2)
+        self.checkout(3)
+
+        self.assertEqual(self.stock(), 0)
+        self.assertEqual(StockReservation.objects.get().quantity, 3)
+
+    def test_failed_payment_releases_once(self, gateway):
+        gateway.order.create.return_value = {"id": "order_1"}
+        self.checkout(2)
+
+        self.assertEqual(self.webhook("payment.failed", "order_1").status_code, 200)
+        self.webhook("payment.failed", "order_1")
+
+        self.assertEqual(self.stock(), 3)
+        self.assertEqual(StockReservation.objects.get().status, "RELEASED")
+
+    def test_capture_commits_reservation(self, gateway):
+        gateway.order.create.return_value = {"id": "order_1"}
+        self.checkout(2)
+
+        self.webhook("payment.captured", "order_1")
+
+        self.assertEqual(self.stock(), 1)
+        self.assertEqual(StockReservation.objects.get().status, "COMMITTED")
+
+    def test_capture_after_failure_takes_stock_again(self, gateway):
+        gateway.order.create.return_value = {"id": "order_1"}
+        self.checkout(2)
+
+        self.webhook("payment.failed", "order_1")
+        self.webhook("payment.captured", "order_1")
+
+        self.assertEqual(self.stock(), 1)
+        self.assertEqual(StockReservation.objects.get().status, "COMMITTED")
+
+    def test_expired_reservations_are_released(self, gateway):
+        gateway.order.create.return_value = {"id": "order_1"}
+        self.checkout(2)
+        StockReservation.objects.update(expires_at=timezone.now() - timedelta(minutes=1))
+
+        call_command("release_expired_reservations", stdout=io.StringIO())
+
+        self.assertEqual(self.stock(), 3)
+
+
+class ConcurrentReservationTests(TransactionTestCase):
+    def test_concurrent_buyers_never_oversell(self):
+        user = User.objects.create_user(email="buyer@example.com", password="x" * 8, name="B")
+        product = Product.objects.create(
+            title="Hot item", description="", price=Decimal("1.00"),
+            image="https://example.com/p.png", stock=20,
+        )
+        orders = [
+            Order.objects.create(user=user, total=1, delivery_charges=0, tax=0, grand_total=1)
+            for _ in range(50)
+        ]
+        outcomes = []
+
+        def buy(order):
+            try:
+                while True:
+                    try:
+                        reserve_stock(order, [(product, 1)])
+                        outcomes.append("ok")
+                        return
+                    except OutOfStock:
+                        outcomes.append("sold out")
+                        return
+                    except OperationalError:
+                        # SQLite reports lock contention instead of waiting.
+                        time.sleep(0.001)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=10) as pool:
+            list(pool.map(buy, orders))
+
+        product.refresh_from_db()
+        self.assertEqual(outcomes.count("ok"), 20)
+        self.assertEqual(outcomes.count("sold out"), 30)
+        self.assertEqual(product.stock, 0)
+        self.assertEqual(StockReservation.objects.filter(status="HELD").count(), 20)
+
+
+class OrderSparseFieldsetTests(OrdersTestCase):
+    def setUp(self):
+        super().setUp()
+        self.order = create_order(self.user, self.products)
+
+    def test_fields_skip_nested_prefetches(self):
+        with CaptureQueriesContext(connection) as full:
+            self.client.get("/api/orders/my-orders/")
+        with CaptureQueriesContext(connection) as sparse:
+            response = self.client.get("/api/orders/my-orders/", {"fields": "id,status,grand_total"})
+
+        self.assertEqual(
+            response.data["results"][0],
+            {"id": self.order.pk, "status": "PENDING_PAYMENT", "grand_total": "118.00"},
+        )
+        self.assertEqual(len(full) - len(sparse), 2)
+
+    def test_detail_with_items_only(self):
+        response = self.client.get(f"/api/orders/{self.order.pk}/", {"fields": "id,items"})
+
+        self.assertEqual(set(response.data), {"id", "items"})
+        self.assertEqual(len(response.data["items"]), 3)
+
+
+class OrderValuesSerializerTests(OrdersTestCase):
+    def setUp(self):
+        super().setUp()
+        create_order(self.user, self.products)
+        create_order(self.user, self.products[:1], status="CONFIRMED")
+        create_order(self.user, [])
+        self.orders = Order.objects.filter(user=self.user).order_by("-id")
+
+    def assertSameOutput(self, fields=None):
+        serializer = OrderSerializer.values_serializer(fields)
+        expected = OrderSerializer(
+            self.orders.prefetch_related("items", "tracking_updates"), many=True, fields=fields,
+        ).data
+        actual = serializer.serialize(self.orders.values(*serializer.columns))
+        self.assertEqual(JSONRenderer().render(actual), JSONRenderer().render(expected))
+
+    def test_matches_drf_output(self):
+        self.assertSameOutput()
+        self.assertSameOutput(["id", "tracking_updates", "grand_total"])
+
+    def test_list_fetches_each_relation_once(self):
+        # Conditional-GET aggregate, count, page, then one query per nested relation.
+        with self.assertNumQueries(5):
+            response = self.client.get("/api/orders/my-orders/")
+
+        self.assertEqual([len(order["items"]) for order in response.data["results"]], [0, 1, 3])
+
+
+@override_settings(RAZORPAY_WEBHOOK_SECRET="whsec")
+class WebhookInboxTests(OrdersTestCase):
+    def setUp(self):
+        super().setUp()
+        self.order = create_order(self.user, self.products[:1])
+        self.payment = Payment.objects.create(
+            order=self.order, razorpay_order_id="order_1", amount=self.order.grand_total,
+        )
+
+    def post(self, event, razorpay_order_id="order_1", event_id=None, signature=None):
+        payload = json.dumps({
+            "event": event,
+            "payload": {"payment": {"entity": {"order_id": razorpay_order_id}}},
+        }).encode()
+        headers = {"HTTP_X_RAZORPAY_SIGNATURE": signature or sign(payload)}
+        if event_id:
+            headers["HTTP_X_RAZORPAY_EVENT_ID"] = event_id
+        return self.client.generic(
+            "POST", "/api/orders/payment/webhook/", payload,
+            content_type="application/json", **headers,
+        )
+
+    def test_event_is_stored_and_applied_later(self):
+        with self.assertNumQueries(1):
+            response = self.post("payment.captured", event_id="evt_1")
+
+        self.assertEqual(response.status_code, 200)
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, "CREATED")
+
+        self.assertEqual(process_pending(), 1)
+
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, "SUCCESS")
+        self.assertEqual(WebhookEvent.objects.get().status, "PROCESSED")
+
+    def test_redelivery_is_stored_once(self):
+        self.post("payment.captured", event_id="evt_1")
+        self.post("payment.captured", event_id="evt_1")
+        self.post("payment.captured")
+        self.post("payment.captured")
+
+        self.assertEqual(WebhookEvent.objects.count(), 2)
+
+    def test_bad_signature_is_rejected(self):
+        response = self.post("payment.captured", signature="0" * 64)
+
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(WebhookEvent.objects.exists())
+
+    def test_outcomes_are_counted(self):
+        metrics.reset()
+        self.post("payment.captured", event_id="evt_1")
+        self.post("payment.captured", razorpay_order_id="order_missing")
+        self.post("payment.captured", signature="0" * 64)
+        with self.assertLogs("orders.webhooks", "ERROR"):
+            process_pending()
+
+        events = metrics.WEBHOOK_EVENTS
+        self.assertEqual(events.value("received", "accepted"), 2)
+        self.assertEqual(events.value("received", "invalid_signature"), 1)
+        self.assertEqual(events.value("processed", "ok"), 1)
+        self.assertEqual(events.value("processed", "retry"), 1)
+
+    def test_late_failure_does_not_undo_capture(self):
+        self.post("payment.captured", event_id="evt_1")
+        self.post("payment.failed", event_id="evt_2")
+        process_pending()
+
+        self.payment.refresh_from_db()
+        self.assertEqual(self.payment.status, "SUCCESS")
+
+    def test_unknown_payment_is_retried_then_failed(self):
+        self.post("payment.captured", razorpay_order_id="order_missing")
+
+        for _ in range(MAX_ATTEMPTS):
+            # Skip the retry delay.
+            WebhookEvent.objects.update(claimed_at=None)
+            self.assertEqual(process_pending(), 1)
+
+        event = WebhookEvent.objects.get()
+        self.assertEqual(event.status, "FAILED")
+        self.assertEqual(event.attempts, MAX_ATTEMPTS)
+        self.assertIn("PaymentNotFound", event.last_error)
+        self.assertEqual(process_pending(), 0)
+
+
+class WebhookDrainTests(TransactionTestCase):
+    def test_workers_process_every_event_once(self):
+        user = User.objects.create_user(email="buyer@example.com", password="password123", name="B")
+        for i in range(20):
+            order = create_order(user, [])
+            Payment.objects.create(order=order, razorpay_order_id=f"order_{i}", amount=order.grand_total)
+            for event in ("payment.failed", "payment.captured"):
+                data = {"event": event, "payload": {"payment": {"entity": {"order_id": f"order_{i}"}}}}
+                WebhookEvent.objects.create(
+                    event_id=f"evt_{i}_{event}", event=event,
+                    razorpay_order_id=f"order_{i}", payload=data,
+                )
+
+        out = io.StringIO()
+        with mock.patch("orders.webhooks.logger"):
+            call_command("process_webhooks", workers=4, batch_size=15, stdout=out)
+        self.assertIn("Handled 40", out.getvalue())
+
+        # SQLite reports lock contention instead of waiting; whatever lost a
+        # race is left for a retry, which must not apply anything twice.
+        WebhookEvent.objects.exclude(status="PROCESSED").update(status="PENDING", claimed_at=None)
+        process_pending()
+
+        self.assertEqual(WebhookEvent.objects.filter(status="PROCESSED").count(), 40)
+        self.assertEqual(Payment.objects.filter(status="SUCCESS").count(), 20)
+        self.assertEqual(OrderTracking.objects.filter(status="Confirmed").count(), 20)
+
+
+class CircuitBreakerTests(SimpleTestCase):
+    def setUp(self):
+        self.now = 0
+        self.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=lambda: self.now)
+
+    def test_opens_after_threshold_and_half_opens_after_timeout(self):
+        self.breaker.record_failure()
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_failure()
+        self.assertFalse(self.breaker.allow())
+
+        self.now = 10
+        self.assertTrue(self.breaker.allow())
+        # Only one trial request while half-open.
+        self.assertFalse(self.breaker.allow())
+
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, "closed")
+
+    def test_failed_trial_reopens(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+        self.now = 10
+        self.breaker.allow()
+
+        self.breaker.record_failure()
+
+        self.assertEqual(self.breaker.state, "open")
+        self.assertFalse(self.breaker.allow())
+
+
+class GatewayClientTests(SimpleTestCase):
+    def setUp(self):
+        self.fake = FakeRazorpay().start()
+        self.addCleanup(self.fake.stop)
+
+    def gateway(self, **options):
+        options.setdefault("timeout", (1, 1))
+        options.setdefault("retry_base_delay", 0)
+        return GatewayClient(auth=("key", "secret"), base_url=self.fake.url, **options)
+
+    def create(self, client):
+        return client.order.create({"amount": 100, "currency": "INR", "payment_capture": 1})
+
+    def test_creates_order(self):
+        self.assertEqual(self.create(self.gateway())["amount"], 100)
+
+    def test_transient_errors_are_retried(self):
+        self.fake.fail(2)
+
+        with self.assertLogs("orders.gateway", "WARNING"):
+            self.assertEqual(self.create(self.gateway(max_retries=2))["status"], "created")
+        self.assertEqual(self.fake.requests, 3)
+
+    def test_slow_gateway_times_out(self):
+        self.fake.latency = 0.3
+
+        with self.assertLogs("orders.gateway", "WARNING"), self.assertRaises(GatewayUnavailable):
+            self.create(self.gateway(timeout=(1, 0.05), max_retries=1))
+        self.assertEqual(self.fake.requests, 2)
+
+    def test_open_circuit_fails_fast(self):
+        self.fake.fail(10)
+        client = self.gateway(max_retries=5, breaker=CircuitBreaker(failure_threshold=2))
+
+        with self.assertLogs("orders.gateway", "WARNING") as logs:
+            with self.assertRaises(GatewayUnavailable):
+                self.create(client)
+            with self.assertRaises(GatewayUnavailable):
+                self.create(client)
+
+        self.assertTrue(any("circuit opened" in line for line in logs.output))
+
+        self.assertEqual(self.fake.requests, 2)
+
+    def test_attempts_are_timed(self):
+        metrics.reset()
+        self.fake.fail(1)
+
+        with self.assertLogs("orders.gateway", "WARNING"):
+            self.create(self.gateway(max_retries=1))
+
+        self.assertEqual(metrics.RAZORPAY_LATENCY.value("orders", "error")["count"], 1)
+        self.assertEqual(metrics.RAZORPAY_LATENCY.value("orders", "ok")["count"], 1)
+
+    def test_bad_request_is_not_retried(self):
+        with self.assertRaises(BadRequestError):
+            self.gateway().post("/v1/unknown", {})
+        self.assertEqual(self.fake.requests, 1)
+
+    def test_unexpected_error_ends_half_open_trial(self):
+        now = [0]
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+        breaker.record_failure()
+        now[0] = 10
+        client = self.gateway(breaker=breaker)
+
+        with mock.patch.object(client, "_send", side_effect=KeyError("error")), self.assertRaises(KeyError):
+            self.create(client)
+
+        self.assertEqual(breaker.state, "open")
+        now[0] = 20
+        self.assertEqual(self.create(client)["amount"], 100)
+        self.assertEqual(breaker.state, "closed")
+
+
+class GatewayOutageTests(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="buyer@example.com", password="password123", name="B")
+        self.product = Product.objects.create(
+            title="P", description="", price=Decimal("50.00"), image="https://example.com/p.png", stock=5,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def checkout(self):
+        return self.client.post("/api/orders/payment/create/", {
+            "items": [{"product": self.product.pk, "quantity": 2}],
+            "delivery_charges": "0.00",
+            "tax": "0.00",
+        }, format="json")
+
+    @mock.patch("orders.views.client")
+    def test_gateway_is_called_outside_the_transaction(self, gateway):
+        def create(data):
+            self.assertFalse(connection.in_atomic_block)
+            return {"id": "order_1"}
+        gateway.order.create.side_effect = create
+
+        self.assertEqual(self.checkout().status_code, 200)
+
+    @mock.patch("orders.views.client")
+    def test_outage_releases_stock(self, gateway):
+        gateway.order.create.side_effect = GatewayUnavailable()
+
+        response = self.checkout()
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(Product.objects.get().stock, 5)
+        self.assertEqual(StockReservation.objects.get().status, "RELEASED")
+        self.assertFalse(Payment.objects.exists())
+
+    @mock.patch("orders.views.client")
+    def test_rejected_order_releases_stock(self, gateway):
+        gateway.order.create.side_effect = BadRequestError("The amount must be at least INR 1.00")
+
+        with self.assertLogs("orders.views", "WARNING"):
+            response = self.checkout()
+
+        self.assertEqual(response.status_code, 502)
+        self.assertEqual(response.data["detail"].code, "gateway_rejected")
+        self.assertEqual(Product.objects.get().stock, 5)
+        self.assertEqual(StockReservation.objects.get().status, "RELEASED")
+        self.assertFalse(Payment.objects.exists())
+
+
+class AsyncOrderViewTests(OrdersTestCase):
+    def setUp(self):
+        super().setUp()
+        self.order = create_order(self.user, self.products)
+        create_order(self.user, self.products[:1])
+
+    def call(self, view, path, method="get", data=None, user=None, **kwargs):
+        factory = APIRequestFactory()
+        request = getattr(factory, method)(path, data, format="json" if method == "post" else None)
+        force_authenticate(request, user or self.user)
+        response = async_to_sync(view.as_view())(request, **kwargs)
+        return response.render()
+
+    def test_reads_match_sync_views(self):
+        for view, path, kwargs in (
+            (AsyncUserOrdersView, "/api/orders/my-orders/", {}),
+            (AsyncOrderDetailView, f"/api/orders/{self.order.pk}/", {"pk": self.order.pk}),
+        ):
+            expected = self.client.get(path)
+            response = self.call(view, path, **kwargs)
+
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.content, expected.content)
+            self.assertEqual(response["ETag"], expected["ETag"])
+
+    def test_other_users_order_is_404(self):
+        other = User.objects.create_user(email="other@example.com", password="x" * 8, name="O")
+        path = f"/api/orders/{self.order.pk}/"
+
+        self.assertEqual(self.call(AsyncOrderDetailView, path, user=other, pk=self.order.pk).status_code, 404)
+
+    @mock.patch("orders.async_views.async_client")
+    def test_checkout(self, gateway):
+        gateway.create_order = mock.AsyncMock(return_value={"id": "order_async"})
+        items = {
+            "items": [{"product": self.products[0].pk, "quantity": 2}],
+            "delivery_charges": "0.00",
+            "tax": "0.00",
+        }
+
+        response = self.call(AsyncCreateOrderPaymentView, "/api/orders/payment/create/", "post", items)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["razorpay_order_id"], "order_async")
+        self.assertEqual(response.data["amount"], 10000)
+        self.assertEqual(Payment.objects.get().razorpay_order_id, "order_async")
+        self.assertEqual(Product.objects.get(pk=self.products[0].pk).stock, 98)
+
+        gateway.create_order.side_effect = GatewayUnavailable()
+        items["items"][0]["quantity"] = 3
+        response = self.call(AsyncCreateOrderPaymentView, "/api/orders/payment/create/", "post", items)
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(Product.objects.get(pk=self.products[0].pk).stock, 100)
+
+        gateway.create_order.side_effect = BadRequestError("The amount must be at least INR 1.00")
+        with self.assertLogs("orders.async_views", "WARNING"):
+            response = self.call(AsyncCreateOrderPaymentView, "/api/orders/payment/create/", "post", items)
+
+        self.assertEqual(response.status_code, 502)
+        self.assertEqual(Product.objects.get(pk=self.products[0].pk).stock, 100)
+
+
+class AsyncGatewayClientTests(SimpleTestCase):
+    def test_retries_then_creates_order(self):
+        with FakeRazorpay() as fake:
+            fake.fail(1)
+            client = AsyncGatewayClient(GatewayClient(
+                auth=("key", "secret"), base_url=fake.url, timeout=(1, 1), retry_base_delay=0,
+            ))
+
+            with self.assertLogs("orders.gateway", "WARNING"):
+                order = async_to_sync(client.create_order)({"amount": 100, "currency": "INR"})
+
+        self.assertEqual(order["amount"], 100)
+        self.assertEqual(fake.requests, 2)
+
+    def test_cancelled_trial_releases_breaker(self):
+        now = [0]
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=10, clock=lambda: now[0])
+        breaker.record_failure()
+        now[0] = 10
+        client = AsyncGatewayClient(GatewayClient(auth=("key", "secret"), timeout=(1, 1), breaker=breaker))
+        http = mock.Mock(request=mock.AsyncMock(side_effect=asyncio.CancelledError))
+
+        with mock.patch.object(client, "_http", return_value=http), self.assertRaises(asyncio.CancelledError):
+            async_to_sync(client.request)("POST", "/v1/orders", json={})
+
+        self.assertEqual(breaker.state, "open")
+        now[0] = 20
+        self.assertTrue(breaker.allow())
+
+    def test_warns_without_httpx(self):
+        with mock.patch("orders.gateway.httpx", None), self.assertLogs("orders.gateway", "WARNING") as logs:
+            AsyncGatewayClient(GatewayClient(auth=("key", "secret"), timeout=(1, 1)))
+
+        self.assertIn("httpx is not installed", logs.output[0])
+
+
+@mock.patch("orders.views.client")
+class IdempotencyKeyTests(OrdersTestCase):
+    url = "/api/orders/payment/create/"
+
+    def checkout(self, key, quantity=1):
+        return self.client.post(self.url, {
+            "items": [{"product": self.products[0].pk, "quantity": quantity}],
+            "delivery_charges": "0.00",
+            "tax": "0.00",
+        }, format="json", HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_replays_stored_response(self, gateway):
+        gateway.order.create.side_effect = [{"id": "order_1"}, {"id": "order_2"}]
+
+        first = self.checkout("k1")
+        with CaptureQueriesContext(connection) as queries:
+            retry = self.checkout("k1")
+
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertFalse([q for q in queries.captured_queries if "orders_order" in q["sql"]])
+        gateway.order.create.assert_called_once()
+        self.assertEqual(Product.objects.get(pk=self.products[0].pk).stock, 99)
+
+    def test_key_is_scoped_to_user(self, gateway):
+        gateway.order.create.side_effect = [{"id": "order_1"}, {"id": "order_2"}]
+        self.checkout("k1")
+        self.client.force_authenticate(
+            User.objects.create_user(email="other@example.com", password="x" * 8, name="O"),
+        )
+
+        self.assertEqual(self.checkout("k1").data["razorpay_order_id"], "order_2")
+
+    def test_reusing_key_for_different_request_is_rejected(self, gateway):
+        gateway.order.create.return_value = {"id": "order_1"}
+        self.checkout("k1")
+
+        self.assertEqual(self.checkout("k1", quantity=2).status_code, 422)
+
+    def test_failures_free_the_key(self, gateway):
+        gateway.order.create.side_effect = [GatewayUnavailable(), {"id": "order_1"}]
+
+        self.assertEqual(self.checkout("k1").status_code, 503)
+        self.assertEqual(self.checkout("k1").status_code, 200)
+        self.assertEqual(IdempotencyKey.objects.get().response_status, 200)
+
+    def test_expired_key_runs_again(self, gateway):
+        gateway.order.create.side_effect = [{"id": "order_1"}, {"id": "order_2"}]
+        self.checkout("k1")
+        IdempotencyKey.objects.update(expires_at=timezone.now())
+
+        response = self.checkout("k1")
+
+        self.assertNotIn("Idempotent-Replayed", response)
+        self.assertEqual(gateway.order.create.call_count, 1)  # same cart, payment reused
+        self.assertEqual(delete_expired(timezone.now() + timedelta(days=2)), 1)
+
+    @mock.patch("orders.views.client.utility")
+    def test_verify_replays_outcome(self, utility, gateway):
+        gateway.order.create.return_value = {"id": "order_1"}
+        self.checkout("k1")
+        data = {"razorpay_order_id": "order_1", "razorpay_payment_id": "pay_1", "razorpay_signature": "sig"}
+
+        first = self.client.post("/api/orders/payment/verify/", data, format="json", HTTP_IDEMPOTENCY_KEY="v1")
+        Payment.objects.update(status="CREATED")
+        retry = self.client.post("/api/orders/payment/verify/", data, format="json", HTTP_IDEMPOTENCY_KEY="v1")
+
+        self.assertEqual(first.data, {"message": "Payment verified successfully"})
+        self.assertEqual(retry.json(), first.json())
+        self.assertEqual(Payment.objects.get().status, "CREATED")
+
+
+class ConcurrentIdempotencyTests(TransactionTestCase):
+    def test_parallel_duplicates_run_once(self):
+        user = User.objects.create_user(email="buyer@example.com", password="x" * 8, name="B")
+        product = Product.objects.create(
+            title="P", description="", price=Decimal("50.00"), image="https://example.com/p.png", stock=100,
+        )
+        payload = {"items": [{"product": product.pk, "quantity": 1}], "delivery_charges": "0.00", "tax": "0.00"}
+
+        def create(data):
+            time.sleep(0.2)
+            return {"id": "order_1"}
+
+        def post(_):
+            client = APIClient()
+            client.force_authenticate(user)
+            try:
+                while True:
+                    try:
+                        return client.post(
+                            "/api/orders/payment/create/", payload, format="json", HTTP_IDEMPOTENCY_KEY="double-click",
+                        )
+                    except OperationalError:
+                        # SQLite reports lock contention instead of waiting.
+                        time.sleep(0.001)
+            finally:
+                connection.close()
+
+        with mock.patch("orders.views.client") as gateway:
+            gateway.order.create.side_effect = create
+            with ThreadPoolExecutor(max_workers=8) as pool:
+                responses = list(pool.map(post, range(8)))
+            retry = post(None)
+
+        codes = sorted(response.status_code for response in responses)
+        self.assertEqual(codes, [200] + [409] * 7)
+        self.assertEqual(gateway.order.create.call_count, 1)
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(Payment.objects.count(), 1)
+        self.assertEqual(Product.objects.get().stock, 99)
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+
+
+class OrderStateTests(OrdersTestCase):
+    def setUp(self):
+        super().setUp()
+        self.order = create_order(self.user, self.products[:1])
+        self.payment = Payment.objects.create(order=self.order, razorpay_order_id="order_1", amount=Decimal("118.00"))
+
+    def test_confirm_runs_once(self):
+        self.assertTrue(confirm_payment(self.payment, razorpay_payment_id="pay_1"))
+        self.assertFalse(confirm_payment(self.payment, razorpay_payment_id="pay_2"))
+
+        self.payment.refresh_from_db()
+        self.assertEqual((self.payment.status, self.payment.razorpay_payment_id), ("SUCCESS", "pay_1"))
+        self.assertEqual(Order.objects.get().status, "CONFIRMED")
+        self.assertEqual(self.order.tracking_updates.filter(status="Confirmed").count(), 1)
+
+    def test_failure_cannot_undo_success(self):
+        self.assertTrue(fail_payment(self.payment))
+        self.assertTrue(confirm_payment(self.payment))
+        self.assertFalse(fail_payment(self.payment))
+        self.assertEqual(Payment.objects.get().status, "SUCCESS")
+
+    def test_invalid_order_transition_is_refused(self):
+        self.assertFalse(move_order(self.order.pk, "DELIVERED"))
+        self.assertEqual(Order.objects.get().status, "PENDING_PAYMENT")
+
+    def test_confirm_bumps_updated_at(self):
+        before = self.order.updated_at
+        confirm_payment(self.payment)
+        self.assertGreater(Order.objects.get().updated_at, before)
+
+    def test_duplicate_tracking_is_ignored(self):
+        track(self.order, "PENDING_PAYMENT")
+        self.assertEqual(self.order.tracking_updates.count(), 1)
+
+
+class ConcurrentTransitionTests(TransactionTestCase):
+    def test_racing_confirmations_apply_once(self):
+        user = User.objects.create_user(email="buyer@example.com", password="x" * 8, name="B")
+        product = Product.objects.create(
+            title="P", description="", price=Decimal("50.00"), image="https://example.com/p.png", stock=10,
+        )
+        order = create_order(user, [product])
+        reserve_stock(order, [(product, 2)])
+        payment = Payment.objects.create(order=order, razorpay_order_id="order_1", amount=Decimal("118.00"))
+        outcomes = []
+
+        def confirm(i):
+            try:
+                while True:
+                    try:
+                        outcomes.append(confirm_payment(payment, razorpay_payment_id=f"pay_{i}"))
+                        return
+                    except OperationalError:
+                        # SQLite reports lock contention instead of waiting.
+                        time.sleep(0.001)
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(confirm, range(16)))
+
+        self.assertEqual(outcomes.count(True), 1)
+        self.assertEqual(outcomes.count(False), 15)
+        self.assertEqual(Order.objects.get().status, "CONFIRMED")
+        self.assertEqual(OrderTracking.objects.filter(status="Confirmed").count(), 1)
+        self.assertEqual(StockReservation.objects.get().status, "COMMITTED")
+        self.assertEqual(Product.objects.get().stock, 8)
+
+
+class HotQueryIndexTests(TestCase):
+    def test_hot_queries_use_indexes(self):
+        out = io.StringIO()
+        call_command("explain_hot_queries", stdout=out)
+        self.assertIn("All hot queries use an index", out.getvalue())
+
+    def test_sequential_scan_is_flagged(self):
+        module = "orders.management.commands.explain_hot_queries"
+        with mock.patch(f"{module}.hot_queries", return_value={"by total": Order.objects.filter(total=1)}):
+            with self.assertRaisesMessage(CommandError, "1 hot query(ies)"):
+                call_command("explain_hot_queries", stdout=io.StringIO())
+
+    def test_plan_parsing(self):
+        from orders.management.commands.explain_hot_queries import sequential_scans
+
+        self.assertEqual(sequential_scans("Seq Scan on orders_order  (cost=0.00..1.01)"), ["orders_order"])
+        self.assertEqual(sequential_scans("2 0 0 SCAN orders_payment"), ["orders_payment"])
+        self.assertEqual(sequential_scans("SEARCH orders_order USING INDEX orders_order_user_idx"), [])
+        self.assertEqual(sequential_scans("Index Scan using orders_order_user_idx on orders_order"), [])
+
+
+REPLICA_DATABASES = {"default": {}, "replica": {}}
+
+
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        self.router = ReplicaRouter()
+
+    @override_settings(DATABASES={"default": {}})
+    def test_without_replica_everything_uses_default(self):
+        self.assertEqual(self.router.db_for_read(Product), "default")
+        self.assertEqual(self.router.db_for_read(Order), "default")
+
+    @override_settings(DATABASES=REPLICA_DATABASES)
+    def test_catalog_and_order_history_reads_use_replica(self):
+        with routing_scope():
+            for model in (Product, Order, OrderItem, OrderTracking):
+                self.assertEqual(self.router.db_for_read(model), "replica")
+            for model in (Payment, StockReservation, WebhookEvent, IdempotencyKey, User):
+                self.assertEqual(self.router.db_for_read(model), "default")
+
+    @override_settings(DATABASES=REPLICA_DATABASES)
+    def test_reads_after_a_write_stay_on_primary(self):
+        with routing_scope():
+            self.assertEqual(self.router.db_for_write(Order), "default")
+            self.assertEqual(self.router.db_for_read(Product), "default")
+        with routing_scope():
+            self.assertEqual(self.router.db_for_read(Product), "replica")
+
+    @override_settings(DATABASES=REPLICA_DATABASES)
+    def test_middleware_pins_unsafe_requests(self):
+        seen = []
+
+        def view(request):
+            seen.append(self.router.db_for_read(Product))
+            if request.GET.get("write"):
+                self.router.db_for_write(Product)
+                seen.append(self.router.db_for_read(Product))
+            return None
+
+        middleware = replica_pinning_middleware(view)
+        factory = RequestFactory()
+        middleware(factory.get("/"))
+        middleware(factory.post("/"))
+        middleware(factory.get("/", {"write": 1}))
+        middleware(factory.get("/"))
+
+        self.assertEqual(seen, ["replica", "default", "replica", "default", "replica"])
+
+    @override_settings(DATABASES=REPLICA_DATABASES)
+    def test_read_from_primary(self):
+        changed = mock.Mock(return_value=True)
+
+        @read_from_primary(changed)
+        def view():
+            return self.router.db_for_read(User), self.router.db_for_read(Product)
+
+        @read_from_primary(changed)
+        def async_view():
+            async def handler():
+                return self.router.db_for_read(Product)
+            return handler()
+
+        with routing_scope():
+            self.assertEqual(view(), ("default", "default"))
+            self.assertEqual(async_to_sync(async_view)(), "default")
+            self.assertEqual(self.router.db_for_read(Product), "replica")
+            # Only asked once a read could go to the replica, once per request.
+            self.assertEqual(changed.call_count, 2)
+            changed.return_value = False
+            self.assertEqual(view(), ("default", "replica"))
+
+    def test_replica_is_never_migrated(self):
+        self.assertFalse(self.router.allow_migrate("replica", "store"))
+        self.assertTrue(self.router.allow_migrate("default", "store"))
+
+
+class SeedLoadDataTests(TestCase):
+    def seed(self, *args):
+        call_command(
+            "seed_load_data", "--users", "20", "--products", "30", "--orders", "200", "--batch-size", "64", *args,
+            stdout=io.StringIO(),
+        )
+
+    def snapshot(self):
+        return (
+            list(Order.objects.order_by("pk").values_list("user_id", "status", "grand_total")),
+            list(OrderItem.objects.order_by("pk").values_list("order_id", "product_id", "quantity", "price")),
+            list(Product.objects.order_by("pk").values_list("sku", "price", "stock")),
+        )
+
+    def test_generates_consistent_orders(self):
+        self.seed()
+
+        self.assertEqual(User.objects.count(), 20)
+        self.assertEqual(Product.objects.count(), 30)
+        self.assertEqual(Order.objects.count(), 200)
+        self.assertEqual(Payment.objects.count(), 200)
+        for order in Order.objects.prefetch_related("items", "tracking_updates").select_related("payment")[:50]:
+            total = sum(item.price * item.quantity for item in order.items.all())
+            self.assertEqual(order.total, total)
+            self.assertEqual(order.grand_total, order.total + order.delivery_charges + order.tax)
+            self.assertEqual(order.payment.amount, order.grand_total)
+            self.assertEqual(order.payment.status == "SUCCESS", order.status not in ("PENDING_PAYMENT", "CANCELLED"))
+            self.assertEqual(order.tracking_updates.all()[0].status, "Pending Payment")
+        self.assertTrue(User.objects.first().check_password("loadtest-password"))
+
+    def test_same_seed_same_data(self):
+        self.seed("--seed", "7")
+        first = self.snapshot()
+        for model in (Order, Product, User):
+            model.objects.all().delete()
+        self.seed("--seed", "7")
+
+        self.assertEqual(self.snapshot(), first)
+
+    def test_appends_to_existing_data(self):
+        self.seed()
+        self.seed("--users", "0", "--products", "0")
+
+        self.assertEqual(Order.objects.count(), 400)
+        self.assertEqual(User.objects.count(), 20)
+        order = Order.objects.create(user=User.objects.first(), total=1, delivery_charges=0, tax=0, grand_total=1)
+        self.assertEqual(order.pk, 401)
+
+    def test_status_weights(self):
+        self.seed("--statuses", "CANCELLED=1")
+        self.assertEqual(set(Order.objects.values_list("status", flat=True)), {"CANCELLED"})
+        self.assertFalse(Payment.objects.exclude(status="FAILED").exists())
+
+        with self.assertRaisesMessage(CommandError, "Unknown order status"):
+            self.seed("--statuses", "LOST=1")
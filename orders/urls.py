@@ -1,10 +1,16 @@
+from django.conf import settings
 from django.urls import path
 from .views import UserOrdersView, OrderDetailView, CreateOrderPaymentView, VerifyPaymentView, razorpay_webhook_view
 
+if settings.ASYNC_API:
+    from .async_views import AsyncCreateOrderPaymentView as CreateOrderPaymentView
+    from .async_views import AsyncOrderDetailView as OrderDetailView
+    from .async_views import AsyncUserOrdersView as UserOrdersView
+
 urlpatterns = [
     path("payment/create/", CreateOrderPaymentView.as_view()),
     path("my-orders/", UserOrdersView.as_view()),
     path("<int:pk>/", OrderDetailView.as_view()),
     path("payment/verify/", VerifyPaymentView.as_view()),
     path("payment/webhook/", razorpay_webhook_view),
-]
\ No newline at end of file
+]
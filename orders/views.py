@@ -1,124 +1,130 @@
 from django.views.decorators.csrf import csrf_exempt
 from django.http import JsonResponse
 from django.conf import settings
-from django.db import transaction
 from django.shortcuts import get_object_or_404
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
-from rest_framework import status
-import razorpay
 import hmac
 import hashlib
 import json
-
-from store.models import Product
-from .models import Order, OrderItem, OrderTracking, Payment
-from .serializers import OrderSerializer
+import logging
+
+from razorpay.errors import BadRequestError
+
+from ebazaar.metrics import WEBHOOK_EVENTS
+
+from . import webhooks
+from .checkout import place_order
+from .etags import (
+    order_detail_etag,
+    user_orders_etag,
+)
+from .gateway import GatewayRejected, GatewayUnavailable, build_client
+from .idempotency import idempotent
+from .models import Order, Payment
+from .pagination import OrderPagination
+from .reservations import release_reservations
+from .serializers import CheckoutSerializer, OrderSerializer
+from .state import confirm_payment, fail_payment
 # Create your views here.   
 
+logger = logging.getLogger(__name__)
+
+
+def order_queryset(request, fields):
+    orders = Order.objects.filter(user=request.user).only(*OrderSerializer.only_columns(fields))
+    # OrderItemSerializer renders product as a pk, so items alone is enough.
+    related = [field for field in ("items", "tracking_updates") if fields is None or field in fields]
+    return orders.prefetch_related(*related)
+
+
 class UserOrdersView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @method_decorator(condition(
+        etag_func=user_orders_etag,
+    ))
     def get(self, request):
-        orders = Order.objects.filter(user=request.user).order_by("-id")
-        serializer = OrderSerializer(orders, many=True)
-        return Response(serializer.data)
+        fields = OrderSerializer.requested_fields(request)
+        serializer = OrderSerializer.values_serializer(fields)
+        orders = Order.objects.filter(user=request.user).order_by("-id").values(*serializer.columns)
+        paginator = OrderPagination()
+        result_page = paginator.paginate_queryset(orders, request)
+        return paginator.get_paginated_response(serializer.serialize(result_page))
     
 
 class OrderDetailView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @method_decorator(condition(
+        etag_func=order_detail_etag,
+    ))
     def get(self, request, pk):
-        order = Order.objects.get(pk=pk, user=request.user)
-        serializer = OrderSerializer(order)
+        fields = OrderSerializer.requested_fields(request)
+        order = get_object_or_404(order_queryset(request, fields), pk=pk)
+        serializer = OrderSerializer(order, fields=fields)
         return Response(serializer.data)
     
 
-client = razorpay.Client(auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET))
+client = build_client()
+
+def payment_response(order, payment):
+    return {
+        "razorpay_order_id": payment.razorpay_order_id,
+        "amount": int(order.grand_total * 100),
+        "key": settings.RAZORPAY_KEY_ID,
+        "order_id": order.id
+    }
+
 
 class CreateOrderPaymentView(APIView):
     permission_classes = [IsAuthenticated]
 
-    @transaction.atomic
+    @idempotent("payment-create")
     def post(self, request):
-        data = request.data
-        items = data["items"]
-
-        # Check for existing pending order
-        order = Order.objects.filter(
-            user=request.user,
-            status="PENDING_PAYMENT"
-        ).last()
-
-        if not order:
-            order = Order.objects.create(
-                user=request.user,
-                total=data["total"],
-                delivery_charges=data["delivery_charges"],
-                tax=data["tax"],
-                grand_total=data["grand_total"],
-            )
-        else:
-            #IMPORTANT: Update total on retry
-            order.total=data["total"]
-            order.delivery_charges=data["delivery_charges"]
-            order.tax=data["tax"]
-            order.grand_total=data["grand_total"]
-            order.save()
-
-        OrderItem.objects.filter(order=order).delete()
-
-        for item in items:
-            product = Product.objects.get(id=item["product"])
-            OrderItem.objects.create(
-                order=order, 
-                product=product,
-                quantity=item["quantity"],
-                price=item["price"],
-            )
-
-        # Add initial tracking update
-        if not OrderTracking.objects.filter(order=order).exists():
-            OrderTracking.objects.create(order=order, status="Pending Payment")
+        serializer = CheckoutSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
 
+        order, payment = place_order(request.user, serializer.validated_data)
         amount = int(order.grand_total * 100) #Razorpay works in paise
 
-        # Check if any PENDING payment already exists
-        payment = Payment.objects.filter(order=order, status="CREATED").first()
-
         #3. Create Razorpay order
-        if not payment:
-            razorpay_order = client.order.create({
-                "amount": amount,
-                "currency": "INR",
-                "payment_capture": 1
-            })
+        if payment is None:
+            try:
+                razorpay_order = client.order.create({
+                    "amount": amount,
+                    "currency": "INR",
+                    "payment_capture": 1
+                })
+            except (GatewayUnavailable, BadRequestError) as exc:
+                # Don't keep stock held for a checkout that can't be paid.
+                release_reservations(order)
+                if isinstance(exc, BadRequestError):
+                    logger.warning("Razorpay rejected order %s: %s", order.pk, exc)
+                    raise GatewayRejected() from exc
+                raise
 
             #4. Create Payment entry
-            payment = Payment.objects.create(
+            payment, _ = Payment.objects.update_or_create(
                 order=order,
-                razorpay_order_id=razorpay_order["id"],
-                amount=order.grand_total,
-                status="CREATED"
+                defaults={
+                    "razorpay_order_id": razorpay_order["id"],
+                    "amount": order.grand_total,
+                    "status": "CREATED",
+                },
             )
-        else:
-            razorpay_order = {
-                "id": payment.razorpay_order_id
-            }
 
         #5. Send to frontend
-        return Response({
-            "razorpay_order_id": razorpay_order["id"],
-            "amount": amount,
-            "key": settings.RAZORPAY_KEY_ID,
-            "order_id": order.id
-        })
+        return Response(payment_response(order, payment))
     
 
 class VerifyPaymentView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @idempotent("payment-verify")
     def post(self, request):
         data = request.data
 
@@ -129,25 +135,14 @@ class VerifyPaymentView(APIView):
                 'razorpay_signature': data['razorpay_signature']
             })
 
-            payment = Payment.objects.get(razorpay_order_id=data['razorpay_order_id'])
+            payment = Payment.objects.select_related("order").get(razorpay_order_id=data['razorpay_order_id'])
             # Already processed? Skip
-            if payment.status == "SUCCESS":
+            if not confirm_payment(
+                payment,
+                razorpay_payment_id=data['razorpay_payment_id'],
+                razorpay_signature=data['razorpay_signature'],
+            ):
                 return Response({"message": "Payment already verified"})
-            
-            payment.razorpay_payment_id = data['razorpay_payment_id']
-            payment.razorpay_signature = data['razorpay_signature']
-            payment.status = "SUCCESS"
-            payment.save()
-
-            order = payment.order
-            order.status = "CONFIRMED"
-            order.save()
-
-            if not OrderTracking.objects.filter(
-                order=order,
-                status="Confirmed"
-            ).exists():
-                OrderTracking.objects.create(order=order, status="Confirmed")
 
             return Response({"message": "Payment verified successfully"})
         
@@ -156,15 +151,14 @@ class VerifyPaymentView(APIView):
                 razorpay_order_id=data.get("razorpay_order_id")
             ).first()
             if payment:
-                payment.status = "FAILED"
-                payment.save()
+                fail_payment(payment)
             return Response({"error": "Payment verification failed"}, status=400)
         
 
 @csrf_exempt
 def razorpay_webhook_view(request):
     payload = request.body
-    signature = request.headers.get("X-Razorpay-Signature")
+    signature = request.headers.get("X-Razorpay-Signature", "")
 
     secret = settings.RAZORPAY_WEBHOOK_SECRET
 
@@ -174,47 +168,19 @@ def razorpay_webhook_view(request):
         hashlib.sha256
     ).hexdigest()
 
-    if expected_signature != signature:
+    if not hmac.compare_digest(expected_signature.encode(), signature.encode()):
+        WEBHOOK_EVENTS.inc("received", "invalid_signature")
         return JsonResponse({"status": "Invalid signature"}, status=400)
-    
-    data = json.loads(payload)
-
-    razorpay_order_id = (
-        data.get("payload", {})
-        .get("payment", {})
-        .get("entity", {})
-        .get("order_id")
-    )
-
-    payment = Payment.objects.filter(
-        razorpay_order_id=razorpay_order_id
-    ).first()
-
-    if not payment:
-        return JsonResponse({"status": "payment not found"}, status=404)
-
-    if data["event"] == "payment.captured":
-        # Prevent double update
-        if payment.status != "SUCCESS":
-            payment.status = "SUCCESS"
-            payment.save()
-
-            order = payment.order
-            order.status = "CONFIRMED"
-            order.save()
-
-            if not OrderTracking.objects.filter(
-                order=order,
-                status="Confirmed"
-            ).exists():
-                OrderTracking.objects.create(order=payment.order, status="Confirmed")
-
-    elif data["event"] == "payment.failed":
-        if payment.status != "FAILED": 
-            payment.status = "FAILED"
-            payment.save()
-
-            payment.order.status = "PENDING_PAYMENT"
-            payment.order.save()
 
-    return JsonResponse({"status": "ok"})
\ No newline at end of file
+    try:
+        data = json.loads(payload)
+    except ValueError:
+        data = None
+    if not isinstance(data, dict):
+        WEBHOOK_EVENTS.inc("received", "invalid_payload")
+        return JsonResponse({"status": "Invalid payload"}, status=400)
+
+    # Acknowledge straight away; `manage.py process_webhooks` applies the event.
+    webhooks.enqueue(data, payload, request.headers.get("X-Razorpay-Event-Id"))
+    WEBHOOK_EVENTS.inc("received", "accepted")
+    return JsonResponse({"status": "ok"})
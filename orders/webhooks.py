@@ -0,0 +1,138 @@
+import hashlib
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from ebazaar.metrics import WEBHOOK_EVENTS
+
+from .models import Payment, WebhookEvent
+from .reservations import release_reservations
+from .state import confirm_payment, fail_payment
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+RETRY_DELAY = timedelta(seconds=30)
+# A claim older than this belongs to a worker that died mid-batch.
+CLAIM_TIMEOUT = timedelta(minutes=5)
+
+
+class PaymentNotFound(Exception):
+    pass
+
+
+def razorpay_order_id(data):
+    return (
+        data.get("payload", {})
+        .get("payment", {})
+        .get("entity", {})
+        .get("order_id")
+    ) or ""
+
+
+def enqueue(data, payload, event_id=None):
+    # Razorpay sends X-Razorpay-Event-Id on every delivery; hashing the body
+    # is the fallback so identical retries still deduplicate.
+    WebhookEvent.objects.bulk_create([
+        WebhookEvent(
+            event_id=event_id or hashlib.sha256(payload).hexdigest(),
+            event=str(data.get("event", ""))[:50],
+            razorpay_order_id=razorpay_order_id(data)[:200],
+            payload=data,
+        )
+    ], ignore_conflicts=True)
+
+
+@transaction.atomic
+def handle_event(data):
+    payment = Payment.objects.select_related("order").filter(
+        razorpay_order_id=razorpay_order_id(data)
+    ).first()
+
+    if not payment:
+        raise PaymentNotFound(razorpay_order_id(data))
+
+    if data["event"] == "payment.captured":
+        confirm_payment(payment)
+
+    elif data["event"] == "payment.failed":
+        if fail_payment(payment):
+            release_reservations(payment.order)
+
+
+def claim(batch_size):
+    # The UPDATE only matches rows nobody else has claimed, so concurrent
+    # drainers each get a disjoint batch without relying on SELECT ... FOR UPDATE.
+    now = timezone.now()
+    claimable = WebhookEvent.objects.filter(
+        Q(status="PENDING", claimed_at__isnull=True)
+        | Q(status="PENDING", claimed_at__lt=now - RETRY_DELAY)
+        | Q(status="PROCESSING", claimed_at__lt=now - CLAIM_TIMEOUT)
+    )
+    ids = list(claimable.order_by("pk").values_list("pk", flat=True)[:batch_size])
+    if not ids:
+        return []
+
+    token = uuid.uuid4()
+    claimable.filter(pk__in=ids).update(
+        status="PROCESSING",
+        claim_token=token,
+        claimed_at=now,
+        attempts=F("attempts") + 1,
+    )
+    return list(WebhookEvent.objects.filter(claim_token=token).order_by("pk"))
+
+
+def _finish(event, **fields):
+    try:
+        WebhookEvent.objects.filter(pk=event.pk, claim_token=event.claim_token).update(**fields)
+    except DatabaseError:
+        # Left PROCESSING; the event is reclaimed after CLAIM_TIMEOUT and
+        # handle_event() is safe to run again.
+        logger.exception("Could not record the outcome of webhook %s", event.event_id)
+
+
+def process(event):
+    try:
+        handle_event(event.payload)
+    except Exception as exc:
+        logger.exception("Webhook %s failed (attempt %s)", event.event_id, event.attempts)
+        outcome = "failed" if event.attempts >= MAX_ATTEMPTS else "retry"
+        WEBHOOK_EVENTS.inc("processed", outcome)
+        _finish(event, status="FAILED" if outcome == "failed" else "PENDING", last_error=repr(exc))
+        return
+
+    WEBHOOK_EVENTS.inc("processed", "ok")
+    _finish(event, status="PROCESSED", processed_at=timezone.now(), last_error="")
+
+
+def _process_group(events):
+    try:
+        for event in events:
+            process(event)
+    finally:
+        connection.close()
+
+
+def process_pending(batch_size=100, workers=1):
+    # Returns how many events were claimed; failures are retried after RETRY_DELAY.
+    events = claim(batch_size)
+
+    # Events for the same Razorpay order stay on one worker, in arrival order,
+    # so a failure and a later capture are never applied out of sequence.
+    groups = {}
+    for event in events:
+        groups.setdefault(event.razorpay_order_id, []).append(event)
+
+    if workers <= 1 or len(groups) <= 1:
+        for event in events:
+            process(event)
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(_process_group, groups.values()))
+    return len(events)
@@ -0,0 +1,88 @@
+from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.urls import path, reverse
+from django.utils.html import format_html, format_html_join
+
+from . import profilers
+from .models import RequestProfile
+
+# Register your models here.
+
+@admin.register(RequestProfile)
+class RequestProfileAdmin(admin.ModelAdmin):
+    list_display = ["created_at", "method", "path", "status_code", "duration_ms", "profiler", "user"]
+    list_filter = ["profiler", "method", "status_code"]
+    list_select_related = ["user"]
+    search_fields = ["path", "view"]
+    date_hierarchy = "created_at"
+    fields = [
+        "created_at", "user", "method", "path", "view", "status_code", "duration_ms", "profiler", "samples",
+        "downloads", "report",
+    ]
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_queryset(self, request):
+        # The changelist doesn't need the (large) profile bodies.
+        queryset = super().get_queryset(request)
+        if request.resolver_match and request.resolver_match.url_name.endswith("_changelist"):
+            queryset = queryset.defer("stats", "collapsed")
+        return queryset
+
+    def get_urls(self):
+        return [
+            path(
+                "<path:object_id>/pstats/",
+                self.admin_site.admin_view(self.download_stats),
+                name="profiling_requestprofile_pstats",
+            ),
+            path(
+                "<path:object_id>/collapsed/",
+                self.admin_site.admin_view(self.download_collapsed),
+                name="profiling_requestprofile_collapsed",
+            ),
+            *super().get_urls(),
+        ]
+
+    def _profile(self, request, object_id, queryset=RequestProfile.objects):
+        if not self.has_view_permission(request):
+            raise PermissionDenied
+        return get_object_or_404(queryset, pk=object_id)
+
+    def download_stats(self, request, object_id):
+        # Loads with pstats.Stats(path), snakeviz or gprof2dot -f pstats.
+        profile = self._profile(request, object_id, RequestProfile.objects.exclude(stats=None))
+        response = HttpResponse(bytes(profile.stats), content_type="application/octet-stream")
+        response["Content-Disposition"] = f'attachment; filename="profile-{profile.pk}.pstats"'
+        return response
+
+    def download_collapsed(self, request, object_id):
+        # flamegraph.pl, speedscope and inferno all read collapsed stacks.
+        profile = self._profile(request, object_id)
+        response = HttpResponse(profile.collapsed + "\n", content_type="text/plain; charset=utf-8")
+        response["Content-Disposition"] = f'attachment; filename="profile-{profile.pk}.collapsed.txt"'
+        return response
+
+    @admin.display(description="Downloads")
+    def downloads(self, obj):
+        links = [(reverse("admin:profiling_requestprofile_collapsed", args=[obj.pk]), "collapsed stacks")]
+        if obj.stats is not None:
+            links.insert(0, (reverse("admin:profiling_requestprofile_pstats", args=[obj.pk]), "pstats"))
+        return format_html_join(" | ", '<a href="{}">{}</a>', links)
+
+    @admin.display(description="Report")
+    def report(self, obj):
+        if obj.stats is not None:
+            text = profilers.report(bytes(obj.stats))
+        else:
+            rows = [f"{'self':>10} {'total':>10}  frame (samples)"]
+            rows += [f"{own:>10} {total:>10}  {frame}" for frame, own, total in profilers.top_frames(obj.collapsed)]
+            text = "\n".join(rows)
+        return format_html('<pre style="white-space: pre; overflow-x: auto;">{}</pre>', text)
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from profiling.models import delete_expired
+
+
+class Command(BaseCommand):
+    help = "Delete request profiles older than PROFILING_RETENTION."
+
+    def handle(self, *args, **options):
+        deleted = delete_expired()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired request profile(s)"))
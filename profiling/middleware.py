@@ -0,0 +1,113 @@
+import sys
+import threading
+import time
+from inspect import iscoroutinefunction
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.decorators import sync_and_async_middleware
+from rest_framework.exceptions import APIException
+
+from accounts.authentication import ClaimsJWTAuthentication
+
+from . import profilers
+from .models import RequestProfile
+
+
+def requested_profiler(request):
+    # Header and raw query string lookups only, so requests that don't ask
+    # for a profile never parse request.GET.
+    value = request.META.get("HTTP_X_PROFILE")
+    if value is None:
+        if "profile=" not in request.META.get("QUERY_STRING", ""):
+            return None
+        value = request.GET.get("profile")
+        if value is None:
+            return None
+    value = value.strip().lower()
+    if value in ("0", "false", "off"):
+        return None
+    return value if value in profilers.PROFILERS else "cprofile"
+
+
+def staff_user(request):
+    # DRF authenticates in the view, after this middleware has to decide, so
+    # the bearer token is checked here; the session covers the browsable API.
+    try:
+        authenticated = ClaimsJWTAuthentication().authenticate(request)
+    except APIException:
+        return None
+    user = authenticated[0] if authenticated else getattr(request, "user", None)
+    return user if user is not None and user.is_active and user.is_staff else None
+
+
+def staff_user_and_sync_thread(request):
+    # Called through sync_to_async, so it runs on the thread Django sends all
+    # of this request's sync code to; the sampler also follows that thread,
+    # from the asgiref function that calls in (this frame's caller).
+    return staff_user(request), (threading.get_ident(), sys._getframe(1).f_code)
+
+
+def record(request, response, profiler, user, duration):
+    stats, collapsed = profiler.result()
+    match = request.resolver_match
+    profile = RequestProfile.objects.create(
+        user_id=user.pk,
+        method=request.method,
+        path=request.get_full_path()[:500],
+        view=match.route if match else "",
+        status_code=response.status_code,
+        duration_ms=duration * 1000,
+        profiler=profiler.name,
+        samples=profiler.samples,
+        stats=stats,
+        collapsed=collapsed,
+    )
+    response["X-Profile-Id"] = str(profile.pk)
+    return response
+
+
+@sync_and_async_middleware
+def request_profiling_middleware(get_response):
+    # Profiles requests from staff users that send `X-Profile: cprofile` or
+    # `?profile=sampling` (any other value means cProfile) and stores the
+    # result as a RequestProfile, browsable in the admin.
+    if not settings.PROFILING_ENABLED:
+        raise MiddlewareNotUsed
+
+    if iscoroutinefunction(get_response):
+        async def middleware(request):
+            name = requested_profiler(request)
+            if name is None:
+                return await get_response(request)
+            user, sync_thread = await sync_to_async(staff_user_and_sync_thread)(request)
+            if user is None:
+                return await get_response(request)
+            # cProfile on the event loop also sees whatever other requests ran
+            # meanwhile and, before Python 3.12, nothing that ran in the sync
+            # thread; prefer sampling under ASGI.
+            start = time.perf_counter()
+            profiler = profilers.start(name, sys._getframe(), sync_thread)
+            try:
+                response = await get_response(request)
+            finally:
+                profiler.stop()
+            duration = time.perf_counter() - start
+            return await sync_to_async(record)(request, response, profiler, user, duration)
+    else:
+        def middleware(request):
+            name = requested_profiler(request)
+            if name is None:
+                return get_response(request)
+            user = staff_user(request)
+            if user is None:
+                return get_response(request)
+            start = time.perf_counter()
+            profiler = profilers.start(name, sys._getframe())
+            try:
+                response = get_response(request)
+            finally:
+                profiler.stop()
+            return record(request, response, profiler, user, time.perf_counter() - start)
+    return middleware
@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.db import models
+from django.utils import timezone
+
+
+class RequestProfile(models.Model):
+    # One profiled request. stats is cProfile output in pstats' marshal
+    # format (what Stats.dump_stats writes); collapsed is one
+    # "frame;frame;frame weight" line per stack, for flamegraph.pl/speedscope.
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, on_delete=models.SET_NULL)
+    method = models.CharField(max_length=10)
+    path = models.CharField(max_length=500)
+    view = models.CharField(max_length=200, blank=True)
+    status_code = models.PositiveSmallIntegerField()
+    duration_ms = models.FloatField()
+    profiler = models.CharField(max_length=20, choices=[
+        ("cprofile", "cProfile"),
+        ("sampling", "Sampling"),
+    ])
+    samples = models.PositiveIntegerField(default=0)
+    stats = models.BinaryField(null=True, blank=True)
+    collapsed = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-id"]
+
+    def __str__(self):
+        return f"{self.method} {self.path} ({self.profiler}, {self.duration_ms:.0f} ms)"
+
+
+def delete_expired(now=None):
+    cutoff = (now or timezone.now()) - settings.PROFILING_RETENTION
+    deleted, _ = RequestProfile.objects.filter(created_at__lte=cutoff).delete()
+    return deleted
@@ -0,0 +1,184 @@
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import sys
+import sysconfig
+import threading
+from collections import Counter, defaultdict
+from functools import cache
+
+from django.conf import settings
+
+# Frames below this share of the request are left out of collapsed cProfile
+# output; walking every call path of a Django request otherwise explodes.
+MIN_SHARE = 0.001
+MAX_DEPTH = 200
+
+
+@cache
+def _prefixes():
+    paths = sysconfig.get_paths()
+    prefixes = [str(settings.BASE_DIR), paths["purelib"], paths["platlib"], paths["stdlib"]]
+    return sorted({os.path.join(prefix, "") for prefix in prefixes}, key=len, reverse=True)
+
+
+def short_path(filename):
+    for prefix in _prefixes():
+        if filename.startswith(prefix):
+            return filename[len(prefix):]
+    return filename
+
+
+def label(filename, lineno, name):
+    # ";" separates frames and the last space the weight in collapsed output.
+    if filename == "~":
+        text = name
+    else:
+        text = f"{name} ({short_path(filename)}:{lineno})"
+    return text.replace(";", ",")
+
+
+def collapse_stats(stats, min_share=MIN_SHARE):
+    # cProfile only records caller -> callee edges, not whole stacks, so a
+    # function's time is split across its callers in proportion to the
+    # cumulative time each edge accounts for. Weights are microseconds.
+    callees = defaultdict(dict)
+    for func, (_, _, _, _, callers) in stats.items():
+        for caller, edge in callers.items():
+            callees[caller][func] = edge[3]
+    roots = [func for func, entry in stats.items() if not entry[4]]
+    floor = sum(stats[func][3] for func in roots) * min_share
+    lines = Counter()
+
+    def walk(func, stack, share, seen):
+        tottime = stats[func][2]
+        stack = (*stack, label(*func))
+        lines[";".join(stack)] += tottime * share
+        if len(stack) >= MAX_DEPTH:
+            return
+        for callee, edge_time in callees[func].items():
+            callee_time = stats[callee][3]
+            if callee in seen or not callee_time or edge_time * share < floor:
+                continue
+            walk(callee, stack, share * edge_time / callee_time, seen | {callee})
+
+    for root in roots:
+        walk(root, (), 1.0, {root})
+    weights = ((stack, round(seconds * 1_000_000)) for stack, seconds in lines.items())
+    return "\n".join(f"{stack} {weight}" for stack, weight in weights if weight > 0)
+
+
+class _Loaded:
+    # pstats.Stats accepts anything with create_stats() and a stats dict.
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+def load_stats(data):
+    return pstats.Stats(_Loaded(marshal.loads(data)))
+
+
+def report(data, sort="cumulative", limit=40):
+    stream = io.StringIO()
+    stats = load_stats(data)
+    stats.stream = stream
+    stats.sort_stats(sort).print_stats(limit)
+    return stream.getvalue()
+
+
+def top_frames(collapsed, limit=40):
+    # (frame, self weight, total weight) from collapsed stacks, heaviest first.
+    own, total = Counter(), Counter()
+    for line in collapsed.splitlines():
+        stack, _, weight = line.rpartition(" ")
+        frames = stack.split(";")
+        own[frames[-1]] += int(weight)
+        for frame in set(frames):
+            total[frame] += int(weight)
+    return [(frame, own[frame], weight) for frame, weight in total.most_common(limit)]
+
+
+class CProfiler:
+    name = "cprofile"
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+        self.samples = 0
+
+    def start(self):
+        self.profile.enable()
+
+    def stop(self):
+        self.profile.disable()
+
+    def result(self):
+        self.profile.create_stats()
+        return marshal.dumps(self.profile.stats), collapse_stats(self.profile.stats)
+
+
+class Sampler:
+    # Samples the profiled request's threads from a background thread: the
+    # one the middleware runs on and, under ASGI, the thread its sync code
+    # (sync views, the ORM) is sent to. Only frames called from each thread's
+    # anchor are kept (the middleware's frame, or the asgiref function that
+    # calls into sync code), and samples taken while the anchor isn't on the
+    # stack are dropped: the event loop thread spends that time on other
+    # requests, the sync thread waiting for work.
+    name = "sampling"
+
+    def __init__(self, frame, interval, sync_thread=None):
+        # sync_thread is (thread id, code object) from the middleware.
+        self.anchors = dict([sync_thread] if sync_thread else [])
+        self.anchors[threading.get_ident()] = frame
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            for thread_id, anchor in self.anchors.items():
+                frame = frames.get(thread_id)
+                stack = []
+                while frame is not None and frame is not anchor and frame.f_code is not anchor:
+                    code = frame.f_code
+                    stack.append(label(code.co_filename, code.co_firstlineno, code.co_qualname))
+                    frame = frame.f_back
+                if frame is not None and stack:
+                    self.stacks[";".join(reversed(stack))] += 1
+                    self.samples += 1
+
+    def result(self):
+        return None, "\n".join(f"{stack} {count}" for stack, count in self.stacks.items())
+
+
+PROFILERS = ("cprofile", "sampling")
+
+
+def start(name, frame, sync_thread=None):
+    if name == "sampling":
+        profiler = Sampler(frame, settings.PROFILING_SAMPLE_INTERVAL, sync_thread)
+    else:
+        profiler = CProfiler()
+    try:
+        profiler.start()
+    except ValueError:
+        # Python 3.12+ allows one cProfile at a time per process; a concurrent
+        # profiled request gets sampled instead.
+        profiler = Sampler(frame, settings.PROFILING_SAMPLE_INTERVAL, sync_thread)
+        profiler.start()
+    return profiler
@@ -0,0 +1,221 @@
+import io
+import marshal
+import pstats
+import time
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from accounts.authentication import UserClaimsRefreshToken
+from orders.models import Order
+from . import profilers
+from .middleware import request_profiling_middleware, requested_profiler
+from .models import RequestProfile, delete_expired
+
+User = get_user_model()
+
+
+def bearer(user):
+    return {"HTTP_AUTHORIZATION": f"Bearer {UserClaimsRefreshToken.for_user(user).access_token}"}
+
+
+class RequestProfilingTests(APITestCase):
+    def setUp(self):
+        self.staff = User.objects.create_user(email="staff@example.com", password="x" * 8, name="Staff", is_staff=True)
+        self.buyer = User.objects.create_user(email="buyer@example.com", password="x" * 8, name="Buyer")
+        Order.objects.create(
+            user=self.staff, total=Decimal("10.00"), delivery_charges=0, tax=0, grand_total=Decimal("10.00"),
+        )
+
+    def test_not_triggered(self):
+        with mock.patch("profiling.profilers.start") as start:
+            response = self.client.get("/api/orders/my-orders/", **bearer(self.staff))
+        self.assertEqual(response.status_code, 200)
+        start.assert_not_called()
+        self.assertNotIn("X-Profile-Id", response)
+        self.assertFalse(RequestProfile.objects.exists())
+
+    def test_cprofile_from_header(self):
+        response = self.client.get("/api/orders/my-orders/", HTTP_X_PROFILE="1", **bearer(self.staff))
+
+        self.assertEqual(response.status_code, 200)
+        profile = RequestProfile.objects.get(pk=response["X-Profile-Id"])
+        self.assertEqual(profile.user, self.staff)
+        self.assertEqual((profile.method, profile.path, profile.status_code), ("GET", "/api/orders/my-orders/", 200))
+        self.assertEqual(profile.view, "api/orders/my-orders/")
+        self.assertEqual(profile.profiler, "cprofile")
+        self.assertGreater(profile.duration_ms, 0)
+
+        stats = profilers.load_stats(bytes(profile.stats))
+        self.assertTrue(any(name == "get" and file.endswith("orders/views.py") for file, _, name in stats.stats))
+        self.assertIn(";get (orders/views.py:", profile.collapsed)
+        for line in profile.collapsed.splitlines():
+            self.assertGreater(int(line.rsplit(" ", 1)[1]), 0)
+
+    def test_sampling_from_query(self):
+        def slow_get(view, request):
+            time.sleep(0.05)
+            return HttpResponse()
+
+        with mock.patch("orders.views.UserOrdersView.get", slow_get):
+            response = self.client.get("/api/orders/my-orders/?profile=sampling", **bearer(self.staff))
+
+        profile = RequestProfile.objects.get(pk=response["X-Profile-Id"])
+        self.assertEqual(profile.profiler, "sampling")
+        self.assertIsNone(profile.stats)
+        self.assertEqual(profile.path, "/api/orders/my-orders/?profile=sampling")
+        self.assertGreater(profile.samples, 0)
+        self.assertIn("RequestProfilingTests.test_sampling_from_query.<locals>.slow_get", profile.collapsed)
+        # Stacks start below the middleware, not at the test runner.
+        self.assertNotIn("unittest", profile.collapsed)
+
+    def test_only_staff(self):
+        self.client.get("/api/orders/my-orders/", HTTP_X_PROFILE="1", **bearer(self.buyer))
+        self.client.get("/api/store/?profile=1")
+        response = self.client.get("/api/orders/my-orders/", HTTP_X_PROFILE="1", HTTP_AUTHORIZATION="Bearer nope")
+
+        self.assertEqual(response.status_code, 401)
+        self.assertFalse(RequestProfile.objects.exists())
+
+    def test_staff_session(self):
+        self.client.force_login(self.staff)
+        response = self.client.get("/api/store/?profile=cprofile")
+        self.assertEqual(RequestProfile.objects.get(pk=response["X-Profile-Id"]).user, self.staff)
+
+    def test_async(self):
+        def query():
+            time.sleep(0.05)
+
+        async def view(request):
+            # Runs in the sync thread, not on the event loop the middleware is on.
+            await sync_to_async(query)()
+            return HttpResponse()
+
+        request = RequestFactory().get("/api/orders/my-orders/", HTTP_X_PROFILE="sampling", **bearer(self.staff))
+        response = async_to_sync(request_profiling_middleware(view))(request)
+
+        profile = RequestProfile.objects.get(pk=response["X-Profile-Id"])
+        self.assertEqual((profile.user, profile.profiler), (self.staff, "sampling"))
+        self.assertGreater(profile.samples, 0)
+        self.assertIn("RequestProfilingTests.test_async.<locals>.query", profile.collapsed)
+        self.assertNotIn("unittest", profile.collapsed)
+
+    def test_admin(self):
+        admin = User.objects.create_superuser(email="admin@example.com", password="x" * 8, name="Admin")
+        self.client.force_login(admin)
+        cprofile = RequestProfile.objects.get(
+            pk=self.client.get("/api/orders/my-orders/", HTTP_X_PROFILE="1", **bearer(self.staff))["X-Profile-Id"]
+        )
+        sampled = RequestProfile.objects.create(
+            method="GET", path="/api/store/", status_code=200, duration_ms=5, profiler="sampling", samples=3,
+            collapsed="a (x.py:1);b (x.py:2) 2\na (x.py:1) 1",
+        )
+
+        self.assertContains(self.client.get("/admin/profiling/requestprofile/"), "/api/orders/my-orders/")
+        page = self.client.get(f"/admin/profiling/requestprofile/{cprofile.pk}/change/")
+        self.assertContains(page, "function calls")
+        self.assertContains(page, f"/admin/profiling/requestprofile/{cprofile.pk}/pstats/")
+        self.assertContains(self.client.get(f"/admin/profiling/requestprofile/{sampled.pk}/change/"), "b (x.py:2)")
+
+        download = self.client.get(f"/admin/profiling/requestprofile/{cprofile.pk}/pstats/")
+        self.assertEqual(marshal.loads(download.content), marshal.loads(bytes(cprofile.stats)))
+        download = self.client.get(f"/admin/profiling/requestprofile/{sampled.pk}/collapsed/")
+        self.assertEqual(download.content.decode(), sampled.collapsed + "\n")
+        self.assertEqual(self.client.get(f"/admin/profiling/requestprofile/{sampled.pk}/pstats/").status_code, 404)
+
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get(f"/admin/profiling/requestprofile/{sampled.pk}/collapsed/").status_code, 403)
+
+    @override_settings(PROFILING_ENABLED=False)
+    def test_disabled(self):
+        from django.core.exceptions import MiddlewareNotUsed
+
+        with self.assertRaises(MiddlewareNotUsed):
+            request_profiling_middleware(lambda request: HttpResponse())
+
+
+class ProfilerTests(SimpleTestCase):
+    def test_requested_profiler(self):
+        factory = RequestFactory()
+        self.assertIsNone(requested_profiler(factory.get("/")))
+        self.assertIsNone(requested_profiler(factory.get("/?page=2")))
+        self.assertIsNone(requested_profiler(factory.get("/?profile=off")))
+        self.assertEqual(requested_profiler(factory.get("/?profile=sampling")), "sampling")
+        self.assertEqual(requested_profiler(factory.get("/?profile=")), "cprofile")
+        self.assertEqual(requested_profiler(factory.get("/", HTTP_X_PROFILE="CPROFILE")), "cprofile")
+        self.assertEqual(requested_profiler(factory.get("/", HTTP_X_PROFILE="yes")), "cprofile")
+
+    def test_collapse_stats(self):
+        # root (1s self) calls shared twice via a and b; shared's 4s split 3:1.
+        root, a, b, shared = ("app.py", 1, "root"), ("app.py", 5, "a"), ("app.py", 9, "b"), ("~", 0, "<built-in>")
+        stats = {
+            root: (1, 1, 1.0, 10.0, {}),
+            a: (1, 1, 2.0, 5.0, {root: (1, 1, 2.0, 5.0)}),
+            b: (1, 1, 1.0, 2.0, {root: (1, 1, 1.0, 2.0)}),
+            shared: (2, 2, 4.0, 4.0, {a: (1, 1, 3.0, 3.0), b: (1, 1, 1.0, 1.0)}),
+        }
+        lines = dict(line.rsplit(" ", 1) for line in profilers.collapse_stats(stats).splitlines())
+        self.assertEqual(lines, {
+            "root (app.py:1)": "1000000",
+            "root (app.py:1);a (app.py:5)": "2000000",
+            "root (app.py:1);a (app.py:5);<built-in>": "3000000",
+            "root (app.py:1);b (app.py:9)": "1000000",
+            "root (app.py:1);b (app.py:9);<built-in>": "1000000",
+        })
+
+    def test_collapse_stats_recursion(self):
+        root, f = ("app.py", 1, "root"), ("app.py", 2, "f")
+        stats = {
+            root: (1, 1, 0.5, 1.5, {}),
+            f: (3, 1, 1.0, 1.0, {root: (1, 1, 0.5, 1.0), f: (2, 2, 0.5, 0.5)}),
+        }
+        self.assertEqual(profilers.collapse_stats(stats), "root (app.py:1) 500000\nroot (app.py:1);f (app.py:2) 1000000")
+
+    def test_top_frames(self):
+        rows = profilers.top_frames("a;b 3\na;c 1\na 2")
+        self.assertEqual(rows, [("a", 2, 6), ("b", 3, 3), ("c", 1, 1)])
+
+    def test_report(self):
+        stats = {("app.py", 1, "root"): (1, 1, 0.25, 0.25, {})}
+        self.assertIn("root", profilers.report(marshal.dumps(stats)))
+        self.assertIsInstance(profilers.load_stats(marshal.dumps(stats)), pstats.Stats)
+
+
+class ProfilingOverheadTests(TestCase):
+    def test_untriggered_request_does_no_work(self):
+        get_response = mock.Mock(return_value=HttpResponse())
+        middleware = request_profiling_middleware(get_response)
+        request = RequestFactory().get("/api/store/", {"page": 2})
+        with mock.patch("profiling.middleware.staff_user") as staff_user:
+            middleware(request)
+        staff_user.assert_not_called()
+        self.assertNotIn("GET", request.__dict__)
+
+
+class ProfileRetentionTests(TestCase):
+    def profile(self, age):
+        profile = RequestProfile.objects.create(method="GET", path="/", status_code=200, duration_ms=1)
+        RequestProfile.objects.filter(pk=profile.pk).update(created_at=timezone.now() - age)
+        return profile
+
+    @override_settings(PROFILING_RETENTION=timedelta(days=7))
+    def test_deletes_only_expired_profiles(self):
+        self.profile(timedelta(days=8))
+        kept = self.profile(timedelta(days=6))
+
+        self.assertEqual(delete_expired(), 1)
+        self.assertEqual(list(RequestProfile.objects.all()), [kept])
+
+    def test_prune_command(self):
+        self.profile(timedelta(days=365))
+        out = io.StringIO()
+        call_command("prune_request_profiles", stdout=out)
+        self.assertIn("Deleted 1 expired request profile(s)", out.getvalue())
@@ -0,0 +1,83 @@
+from asgiref.sync import sync_to_async
+from django.shortcuts import aget_object_or_404
+from django.utils.decorators import method_decorator
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+
+from ebazaar.async_views import AsyncAPIView, async_condition
+from ebazaar.db_routers import read_from_primary
+from ebazaar.pagination import AsyncPageNumberPagination
+from .cache import catalog_cache_key, catalog_recently_changed, get_cached, set_cached
+from .etags import (
+    product_detail_etag,
+    product_list_etag,
+)
+from .filters import ProductFilterSerializer, filter_products
+from .models import Product
+from .pagination import KeysetPagination
+from .serializers import ProductListSerializer, ProductSerializer
+
+# Async twins of the read views in store.views, routed instead of them when
+# settings.ASYNC_API is on. Responses are identical.
+
+
+def _cached(name, request, *parts):
+    cache_key = catalog_cache_key(name, request, *parts)
+    return cache_key, get_cached(cache_key)
+
+
+class AsyncProductListView(AsyncAPIView):
+    permission_classes = [AllowAny]
+
+    @read_from_primary(catalog_recently_changed)
+    @method_decorator(async_condition(
+        etag_func=product_list_etag,
+    ))
+    async def get(self, request):
+        cache_key, data = await sync_to_async(_cached)("list", request)
+        if data is not None:
+            return Response(data, headers={"X-Cache": "HIT"})
+
+        filters = ProductFilterSerializer(data=request.query_params)
+        filters.is_valid(raise_exception=True)
+        products, ordering = filter_products(Product.objects.all(), filters.validated_data)
+
+        serializer_class = (
+            ProductListSerializer if request.query_params.get("view") == "compact" else ProductSerializer
+        )
+        fields = serializer_class.requested_fields(request)
+        serializer = serializer_class.values_serializer(fields)
+        products = products.values(
+            *dict.fromkeys([*serializer.columns, *(field.lstrip("-") for field in ordering)]),
+        )
+
+        if KeysetPagination.is_requested(request):
+            paginator = KeysetPagination()
+            paginator.ordering = ordering
+        else:
+            paginator = AsyncPageNumberPagination()
+            paginator.page_size = 12
+        result_page = await paginator.apaginate_queryset(products, request)
+        response = paginator.get_paginated_response(await serializer.aserialize(result_page))
+        await sync_to_async(set_cached)(cache_key, response.data)
+        response["X-Cache"] = "MISS"
+        return response
+
+
+class AsyncProductDetailView(AsyncAPIView):
+    @read_from_primary(catalog_recently_changed)
+    @method_decorator(async_condition(
+        etag_func=product_detail_etag,
+    ))
+    async def get(self, request, pk):
+        cache_key, data = await sync_to_async(_cached)("detail", request, pk)
+        if data is not None:
+            return Response(data, headers={"X-Cache": "HIT"})
+
+        fields = ProductSerializer.requested_fields(request)
+        product = await aget_object_or_404(
+            Product.objects.only(*ProductSerializer.only_columns(fields)), pk=pk,
+        )
+        serializer = ProductSerializer(product, fields=fields)
+        await sync_to_async(set_cached)(cache_key, serializer.data)
+        return Response(serializer.data, headers={"X-Cache": "MISS"})
@@ -0,0 +1,70 @@
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+
+from ebazaar.metrics import CATALOG_CACHE_REQUESTS
+
+VERSION_KEY = "store:catalog:version"
+CHANGED_KEY = "store:catalog:changed"
+
+
+def _incr(key, initial):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Key missing or evicted: seed it, then retry in case another worker won the race.
+        if cache.add(key, initial, timeout=None):
+            return initial
+        return cache.incr(key)
+
+
+def get_catalog_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Seed from the clock so an evicted counter never reuses an old version.
+        cache.add(VERSION_KEY, time.time_ns() // 1000, timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def bump_catalog_version():
+    # Marks the catalogue as just changed until a replica has caught up.
+    cache.set(CHANGED_KEY, True, settings.CATALOG_REPLICA_LAG)
+    return _incr(VERSION_KEY, time.time_ns() // 1000)
+
+
+def catalog_recently_changed():
+    return cache.get(CHANGED_KEY) is not None
+
+
+def catalog_cache_key(name, request, *parts):
+    query = urlencode(sorted(request.query_params.lists()), doseq=True)
+    raw = "|".join([request.build_absolute_uri(request.path), query, *map(str, parts)])
+    digest = hashlib.md5(raw.encode(), usedforsecurity=False).hexdigest()
+    return f"store:{name}:v{get_catalog_version()}:{digest}"
+
+
+def get_cached(key):
+    data = cache.get(key)
+    CATALOG_CACHE_REQUESTS.inc("hit" if data is not None else "miss")
+    return data
+
+
+def set_cached(key, data):
+    cache.set(key, data, settings.CATALOG_CACHE_TIMEOUT)
+
+
+def catalog_cache_stats():
+    # Counted per process, or across workers with PROMETHEUS_MULTIPROC_DIR.
+    hits = int(CATALOG_CACHE_REQUESTS.value("hit"))
+    misses = int(CATALOG_CACHE_REQUESTS.value("miss"))
+    total = hits + misses
+    return {
+        "version": get_catalog_version(),
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / total if total else 0.0,
+    }
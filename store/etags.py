@@ -0,0 +1,31 @@
+import hashlib
+
+from .cache import get_catalog_version
+from .models import Product
+
+
+def make_etag(request, *parts):
+    # The representation depends on the full URL and the negotiated format.
+    raw = "|".join([
+        request.get_full_path(),
+        request.META.get("HTTP_ACCEPT", ""),
+        *map(str, parts),
+    ])
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def product_list_etag(request):
+    # The catalog version changes on every product write, delete, import and
+    # stock movement, so list validation costs a cache read, not a query.
+    # There's no list Last-Modified: deletes would never move it forward.
+    return make_etag(request, get_catalog_version())
+
+
+def product_detail_etag(request, pk):
+    # No Last-Modified: updated_at has sub-second precision but the header
+    # only has whole seconds, so a second change within the same second
+    # would still be answered with 304.
+    modified = Product.objects.filter(pk=pk).values_list("updated_at", flat=True).first()
+    if modified is None:
+        return None
+    return make_etag(request, pk, modified)
@@ -0,0 +1,40 @@
+from rest_framework import serializers
+
+# Only these orderings are accepted; each one is backed by an index on
+# store.Product and ends in "id" so keyset cursors stay unambiguous.
+SORT_ORDERINGS = {
+    "-created": ("-created_at", "-id"),
+    "created": ("created_at", "id"),
+    "price": ("price", "id"),
+    "-price": ("-price", "-id"),
+    "title": ("title", "id"),
+    "-title": ("-title", "-id"),
+}
+
+
+class ProductFilterSerializer(serializers.Serializer):
+    min_price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0, required=False)
+    max_price = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0, required=False)
+    in_stock = serializers.BooleanField(required=False, default=False)
+    sort = serializers.ChoiceField(choices=list(SORT_ORDERINGS), required=False, default="-created")
+
+    def validate(self, data):
+        if (
+            data.get("min_price") is not None
+            and data.get("max_price") is not None
+            and data["min_price"] > data["max_price"]
+        ):
+            raise serializers.ValidationError("min_price can't be greater than max_price")
+        return data
+
+
+def filter_products(queryset, filters):
+    if filters.get("min_price") is not None:
+        queryset = queryset.filter(price__gte=filters["min_price"])
+    if filters.get("max_price") is not None:
+        queryset = queryset.filter(price__lte=filters["max_price"])
+    if filters.get("in_stock"):
+        queryset = queryset.filter(stock__gt=0)
+
+    ordering = SORT_ORDERINGS[filters.get("sort", "-created")]
+    return queryset.order_by(*ordering), ordering
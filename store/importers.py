@@ -0,0 +1,151 @@
+import csv
+import json
+import re
+from decimal import Decimal
+from pathlib import Path
+
+from django.core.exceptions import ValidationError
+
+from .cache import bump_catalog_version
+from .models import Product
+from .search import product_index
+
+FORMATS = ("json", "ndjson", "csv")
+SUFFIXES = {".json": "json", ".ndjson": "ndjson", ".jsonl": "ndjson", ".csv": "csv"}
+IMPORT_FIELDS = ("sku", "title", "description", "price", "image", "stock")
+UPDATE_FIELDS = ("title", "description", "price", "image", "stock", "updated_at")
+CHUNK_SIZE = 1 << 16
+
+WHITESPACE_RE = re.compile(r"\s*")
+decoder = json.JSONDecoder(parse_float=Decimal)
+
+
+def detect_format(path):
+    try:
+        return SUFFIXES[Path(path).suffix.lower()]
+    except KeyError:
+        raise ValueError(f"Can't tell the format of {path}; pass one of {', '.join(FORMATS)}") from None
+
+
+def read_json(stream):
+    # Yields the items of a top-level array one at a time, so only the
+    # current CHUNK_SIZE window of the file is held in memory.
+    buffer, pos, eof = "", 0, False
+
+    def skip(expected):
+        nonlocal buffer, pos, eof
+        while True:
+            pos = WHITESPACE_RE.match(buffer, pos).end()
+            if pos < len(buffer) or eof:
+                break
+            buffer, pos = stream.read(CHUNK_SIZE), 0
+            eof = not buffer
+        if buffer[pos:pos + 1] not in expected:
+            raise ValueError(f"Expected one of {' '.join(expected)} in JSON array, got {buffer[pos:pos + 20]!r}")
+        return buffer[pos:pos + 1]
+
+    skip("[")
+    pos += 1
+    if skip("]{") == "]":
+        return
+    while True:
+        try:
+            item, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            chunk = stream.read(CHUNK_SIZE)
+            buffer, pos, eof = buffer[pos:] + chunk, 0, not chunk
+            continue
+        yield item
+        pos = end
+        if skip(",]") == "]":
+            return
+        pos += 1
+        skip("{")
+
+
+def read_ndjson(stream):
+    for line in stream:
+        if line.strip():
+            yield decoder.decode(line)
+
+
+def read_csv(stream):
+    yield from csv.DictReader(stream)
+
+
+READERS = {"json": read_json, "ndjson": read_ndjson, "csv": read_csv}
+
+
+def read_rows(stream, format):
+    for row in READERS[format](stream):
+        # Accept Django fixtures too, e.g. store/fixtures/products.json.
+        if isinstance(row, dict) and isinstance(row.get("fields"), dict):
+            row = row["fields"]
+        yield row
+
+
+def clean_row(row):
+    if not isinstance(row, dict):
+        raise ValidationError("Expected an object")
+
+    values, errors = {}, {}
+    for name in IMPORT_FIELDS:
+        field = Product._meta.get_field(name)
+        value = row.get(name)
+        if value in (None, "") and name != "sku" and field.has_default():
+            values[name] = field.get_default()
+            continue
+        if isinstance(value, str):
+            value = value.strip()
+        try:
+            values[name] = field.clean(value, None)
+        except ValidationError as e:
+            errors[name] = e.messages
+    if errors:
+        raise ValidationError(errors)
+    return values
+
+
+def upsert_products(products):
+    return len(Product.objects.bulk_create(
+        products,
+        update_conflicts=True,
+        unique_fields=["sku"],
+        update_fields=UPDATE_FIELDS,
+    ))
+
+
+def import_products(rows, batch_size=1000, on_error=None, on_batch=None):
+    # Upserts on sku in batches of batch_size. bulk_create skips the
+    # post_save signals, so the catalogue cache and this process's search
+    # index are invalidated once at the end instead of once per product.
+    imported = invalid = 0
+    batch = {}
+    try:
+        for number, row in enumerate(rows, start=1):
+            try:
+                product = Product(**clean_row(row))
+            except ValidationError as e:
+                invalid += 1
+                if on_error:
+                    on_error(number, e)
+                continue
+
+            # Later rows win; PostgreSQL refuses to upsert one row twice in a statement.
+            batch[product.sku] = product
+            if len(batch) >= batch_size:
+                imported += upsert_products(list(batch.values()))
+                batch.clear()
+                if on_batch:
+                    on_batch(imported, invalid)
+        if batch:
+            imported += upsert_products(list(batch.values()))
+            if on_batch:
+                on_batch(imported, invalid)
+    finally:
+        if imported:
+            bump_catalog_version()
+            product_index.reset()
+    return imported, invalid
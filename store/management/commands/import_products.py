@@ -0,0 +1,62 @@
+import csv
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from store.importers import FORMATS, detect_format, import_products, read_rows
+
+
+class Command(BaseCommand):
+    help = "Stream products from a JSON, NDJSON or CSV file and upsert them by SKU in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="File to import, or - for stdin (needs --format).")
+        parser.add_argument("--format", choices=FORMATS, help="Defaults to the file extension.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--progress", type=int, default=50000, help="Report every N rows; 0 to disable.")
+        parser.add_argument("--strict", action="store_true", help="Stop at the first invalid row.")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        try:
+            format = options["format"] or detect_format(path)
+        except ValueError as e:
+            raise CommandError(e) from e
+
+        start = time.perf_counter()
+        reported = 0
+
+        def on_error(number, error):
+            if options["strict"]:
+                raise CommandError(f"Row {number}: {error}")
+            self.stderr.write(f"Skipping row {number}: {error}")
+
+        def on_batch(imported, invalid):
+            nonlocal reported
+            every = options["progress"]
+            if every and (imported + invalid) // every > reported // every:
+                reported = imported + invalid
+                rate = reported / (time.perf_counter() - start)
+                self.stdout.write(f"{reported:,} rows read ({rate:,.0f} rows/s)")
+
+        try:
+            stream = sys.stdin if path == "-" else open(path, newline="", encoding="utf-8-sig")
+        except OSError as e:
+            raise CommandError(e) from e
+
+        try:
+            imported, invalid = import_products(
+                read_rows(stream, format), options["batch_size"], on_error, on_batch,
+            )
+        except (ValueError, OSError, csv.Error) as e:
+            raise CommandError(f"Can't read {path}: {e}") from e
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {imported:,} product(s), skipped {invalid:,} invalid row(s) "
+            f"in {elapsed:.1f}s ({imported / elapsed if elapsed else 0:,.0f} rows/s)"
+        ))
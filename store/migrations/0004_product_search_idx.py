@@ -0,0 +1,36 @@
+# Generated by Django 6.0.1 on 2026-10-18 12:20
+
+from django.db import migrations
+
+# Matches the SearchVector built in store.search.search_products_postgres so
+# the planner can answer @@ queries from the GIN index.
+SEARCH_VECTOR = (
+    "(setweight(to_tsvector('english'::regconfig, COALESCE(title, '')), 'A')"
+    " || setweight(to_tsvector('english'::regconfig, COALESCE(description, '')), 'B'))"
+)
+
+
+def create_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute(
+        f"CREATE INDEX IF NOT EXISTS store_product_search_idx "
+        f"ON store_product USING gin ({SEARCH_VECTOR})"
+    )
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS store_product_search_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0003_product_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
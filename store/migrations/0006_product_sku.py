@@ -0,0 +1,34 @@
+# Generated by Django 6.0.1 on 2026-10-18 14:02
+
+from django.db import migrations, models
+
+import store.models
+
+
+def backfill_skus(apps, schema_editor):
+    Product = apps.get_model("store", "Product")
+    manager = Product.objects.using(schema_editor.connection.alias)
+    ids = list(manager.filter(sku__isnull=True).values_list("id", flat=True))
+    for start in range(0, len(ids), 2000):
+        manager.bulk_update([Product(id=pk, sku=f"SKU-{pk:08d}") for pk in ids[start:start + 2000]], ["sku"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('store', '0005_product_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='product',
+            name='sku',
+            field=models.CharField(max_length=64, null=True),
+        ),
+        migrations.RunPython(backfill_skus, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='product',
+            name='sku',
+            field=models.CharField(default=store.models.generate_sku, max_length=64, unique=True),
+        ),
+    ]
@@ -1,14 +1,32 @@
+import uuid
+
 from django.db import models
 
 # Create your models here.
 
+def generate_sku():
+    return f"SKU-{uuid.uuid4().hex[:12].upper()}"
+
+
 class Product(models.Model):
+    # Natural key used by import_products to upsert catalogue feeds.
+    sku = models.CharField(max_length=64, unique=True, default=generate_sku)
     title = models.CharField(max_length=200)
     description = models.TextField()
     price = models.DecimalField(max_digits=10, decimal_places=2)
     image = models.URLField()
     stock = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["-created_at", "-id"], name="store_product_created_idx"),
+            models.Index(fields=["updated_at"], name="store_product_updated_idx"),
+            models.Index(fields=["price", "id"], name="store_product_price_idx"),
+            models.Index(fields=["title", "id"], name="store_product_title_idx"),
+            models.Index(fields=["stock"], name="store_product_stock_idx"),
+        ]
 
     def __str__(self):
         return self.title
\ No newline at end of file
@@ -0,0 +1,137 @@
+from functools import partial
+
+from django.core import signing
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+# Cursor pagination keyed on the ordering columns instead of an OFFSET: every
+# page is a range scan from the last row seen and no COUNT(*) is issued.
+# Cursors are signed so clients can't forge positions or swap the ordering.
+class KeysetPagination(BasePagination):
+    page_size = 12
+    cursor_query_param = "cursor"
+    ordering = ("-created_at", "-id")
+    salt = "store.pagination.keyset"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self._page_queryset(queryset, request)
+        return self._set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        queryset = self._page_queryset(queryset, request)
+        return self._set_page([row async for row in queryset])
+
+    def _page_queryset(self, queryset, request):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.model = queryset.model
+
+        self.position, self.reverse = self.decode_cursor(request)
+
+        ordering = self.ordering
+        if self.reverse:
+            ordering = tuple(self._flip(field) for field in ordering)
+
+        queryset = queryset.order_by(*ordering)
+        if self.position is not None:
+            queryset = queryset.filter(self._after(ordering, self.position))
+        return queryset[:self.page_size + 1]
+
+    def _set_page(self, rows):
+        position, reverse = self.position, self.reverse
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        if reverse:
+            rows.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        return Response({
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        })
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def encode_cursor(self, row, reverse):
+        # Rows are model instances or, on the fast serializer path, .values() dicts.
+        get = row.get if isinstance(row, dict) else partial(getattr, row)
+        position = [str(get(self._name(field))) for field in self.ordering]
+        token = signing.dumps(
+            {"o": list(self.ordering), "p": position, "r": int(reverse)},
+            salt=self.salt,
+            compress=True,
+        )
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None, False
+
+        try:
+            data = signing.loads(token, salt=self.salt)
+            if tuple(data["o"]) != tuple(self.ordering):
+                raise ValueError("cursor ordering mismatch")
+            position = [
+                self.model._meta.get_field(self._name(field)).to_python(value)
+                for field, value in zip(self.ordering, data["p"], strict=True)
+            ]
+            return position, bool(data["r"])
+        except (signing.BadSignature, KeyError, TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def _after(self, ordering, position):
+        # (a, b) "after" (x, y) is expanded as a <= x AND (a < x OR (a = x AND b < y)),
+        # which lets the planner range-scan the leading index column.
+        names = [self._name(field) for field in ordering]
+        ops = ["lt" if field.startswith("-") else "gt" for field in ordering]
+
+        condition = Q()
+        equal = Q()
+        for name, op, value in zip(names, ops, position):
+            condition |= equal & Q(**{f"{name}__{op}": value})
+            equal &= Q(**{name: value})
+
+        bound = Q(**{f"{names[0]}__{ops[0]}e": position[0]})
+        return bound & condition
+
+    @staticmethod
+    def _name(field):
+        return field.lstrip("-")
+
+    @staticmethod
+    def _flip(field):
+        return field[1:] if field.startswith("-") else f"-{field}"
+
+    @classmethod
+    def is_requested(cls, request):
+        return (
+            cls.cursor_query_param in request.query_params
+            or request.query_params.get("pagination") == "cursor"
+        )
@@ -0,0 +1,162 @@
+import bisect
+import itertools
+import math
+import re
+import threading
+from collections import Counter
+
+from django.db import DEFAULT_DB_ALIAS, connection
+
+from .models import Product
+
+TOKEN_RE = re.compile(r"[^\W_]+")
+TITLE_WEIGHT = 3
+
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or "").lower())
+
+
+class InvertedIndex:
+    # In-process fallback for databases without full-text search. Every query
+    # token is treated as a prefix, all tokens must match, and documents are
+    # ranked with a BM25-style score where title terms count TITLE_WEIGHT times.
+    # Each worker keeps its own copy: signals keep the writing worker's index
+    # current, other workers only see changes after reset() or a restart.
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._postings = {}
+            self._documents = {}
+            self._terms = []
+            self.built = False
+
+    def build(self, rows):
+        with self._lock:
+            self.reset()
+            for pk, title, description in rows:
+                self._add(pk, title, description)
+            self.built = True
+
+    def ensure_built(self):
+        if not self.built:
+            with self._lock:
+                if not self.built:
+                    # From the primary: the index lives as long as the process.
+                    rows = Product.objects.using(DEFAULT_DB_ALIAS).values_list("id", "title", "description")
+                    self.build(rows.iterator(chunk_size=2000))
+
+    def add(self, pk, title, description):
+        with self._lock:
+            if self.built:
+                self._remove(pk)
+                self._add(pk, title, description)
+
+    def remove(self, pk):
+        with self._lock:
+            if self.built:
+                self._remove(pk)
+
+    def _add(self, pk, title, description):
+        weights = Counter(tokenize(description))
+        for term in tokenize(title):
+            weights[term] += TITLE_WEIGHT
+
+        self._documents[pk] = tuple(weights)
+        for term, weight in weights.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                bisect.insort(self._terms, term)
+            postings[pk] = weight
+
+    def _remove(self, pk):
+        for term in self._documents.pop(pk, ()):
+            postings = self._postings[term]
+            del postings[pk]
+            if not postings:
+                del self._postings[term]
+                del self._terms[bisect.bisect_left(self._terms, term)]
+
+    def _expand(self, token):
+        # Every term with the prefix; capping them would silently drop matches.
+        start = bisect.bisect_left(self._terms, token)
+        for term in itertools.islice(self._terms, start, None):
+            if not term.startswith(token):
+                break
+            yield term
+
+    def search(self, query):
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        with self._lock:
+            total = len(self._documents)
+            scores = None
+            for token in dict.fromkeys(tokens):
+                token_scores = {}
+                for term in self._expand(token):
+                    # Whole-word hits outrank prefix-only hits.
+                    boost = 1.0 if term == token else 0.5
+                    for pk, weight in self._postings[term].items():
+                        score = boost * weight / (weight + 1.2)
+                        if score > token_scores.get(pk, 0):
+                            token_scores[pk] = score
+
+                matched = len(token_scores)
+                idf = math.log(1 + (total - matched + 0.5) / (matched + 0.5))
+                token_scores = {pk: score * idf for pk, score in token_scores.items()}
+
+                if scores is None:
+                    scores = token_scores
+                else:
+                    scores = {
+                        pk: score + token_scores[pk]
+                        for pk, score in scores.items()
+                        if pk in token_scores
+                    }
+                if not scores:
+                    return []
+
+        return sorted(scores, key=lambda pk: (-scores[pk], pk))
+
+
+product_index = InvertedIndex()
+
+
+def uses_postgres():
+    return connection.vendor == "postgresql"
+
+
+def search_products_postgres(query):
+    from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+
+    tokens = tokenize(query)
+    if not tokens:
+        return Product.objects.none()
+
+    # Must stay identical to the expression indexed in 0004_product_search_idx.
+    vector = (
+        SearchVector("title", weight="A", config="english")
+        + SearchVector("description", weight="B", config="english")
+    )
+    search_query = SearchQuery(
+        " & ".join(f"{token}:*" for token in dict.fromkeys(tokens)),
+        search_type="raw",
+        config="english",
+    )
+    return (
+        Product.objects.annotate(search=vector, rank=SearchRank(vector, search_query))
+        .filter(search=search_query)
+        .order_by("-rank", "id")
+    )
+
+
+def search_product_ids(query):
+    product_index.ensure_built()
+    return product_index.search(query)
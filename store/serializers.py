@@ -1,7 +1,16 @@
 from rest_framework import serializers
+
+from ebazaar.serializers import SparseFieldsetMixin
 from .models import Product
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Product
+        fields = "__all__"
+
+
+class ProductListSerializer(ProductSerializer):
+    # Card view used by the catalogue grid: skips the description TextField.
     class Meta:
         model = Product
-        fields = "__all__"
\ No newline at end of file
+        fields = ["id", "title", "price", "image", "stock"]
@@ -0,0 +1,26 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import bump_catalog_version
+from .models import Product
+from .search import product_index
+
+
+@receiver([post_save, post_delete], sender=Product)
+def invalidate_catalog_cache(sender, **kwargs):
+    # After commit: bumped earlier, a concurrent reader could cache the
+    # pre-commit rows under the new version.
+    transaction.on_commit(bump_catalog_version)
+
+
+@receiver(post_save, sender=Product)
+def index_product(sender, instance, **kwargs):
+    pk, title, description = instance.pk, instance.title, instance.description
+    transaction.on_commit(lambda: product_index.add(pk, title, description))
+
+
+@receiver(post_delete, sender=Product)
+def unindex_product(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: product_index.remove(pk))
@@ -1,3 +1,697 @@
-from django.test import TestCase
+import io
+import json
+import os
+import tempfile
+import time
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock, skipUnless
+from urllib.parse import parse_qs, urlsplit
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, connections
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory, APITestCase
+
+from ebazaar import metrics
+
+from .async_views import AsyncProductDetailView, AsyncProductListView
+from .cache import CHANGED_KEY, VERSION_KEY, bump_catalog_version, catalog_cache_stats, get_catalog_version
+from .filters import ProductFilterSerializer, filter_products
+from .importers import import_products, read_json, read_rows
+from .models import Product
+from .search import InvertedIndex, product_index
+from .serializers import ProductListSerializer, ProductSerializer
+
+
+def create_products(count, **fields):
+    now = timezone.now()
+    products = Product.objects.bulk_create([
+        Product(
+            title=f"Product {i}",
+            description=f"Description {i}",
+            price=Decimal("10.00") + i,
+            image=f"https://example.com/{i}.png",
+            stock=10,
+            **fields,
+        )
+        for i in range(count)
+    ])
+    # bulk_create stamps every row with the same time; spread them out and
+    # leave a tie so the id tie-breaker is exercised.
+    for i, product in enumerate(products):
+        product.created_at = now - timedelta(minutes=i // 2)
+    Product.objects.bulk_update(products, ["created_at"])
+    return products
+
+
+class ProductCursorPaginationTests(APITestCase):
+    url = "/api/store/"
+
+    def setUp(self):
+        cache.clear()
+        create_products(30)
+
+    def test_page_number_mode_is_default(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 30)
+        self.assertEqual(len(response.data["results"]), 12)
+
+    def test_cursor_walk_matches_ordering(self):
+        expected = list(
+            Product.objects.order_by("-created_at", "-id").values_list("id", flat=True)
+        )
+
+        seen = []
+        url = self.url + "?pagination=cursor"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn("count", response.data)
+            seen.extend(product["id"] for product in response.data["results"])
+            url = response.data["next"]
+
+        self.assertEqual(seen, expected)
+
+    def test_previous_link_returns_prior_page(self):
+        first = self.client.get(self.url + "?pagination=cursor").data
+        second = self.client.get(first["next"]).data
+        back = self.client.get(second["previous"]).data
+
+        self.assertEqual(
+            [p["id"] for p in back["results"]],
+            [p["id"] for p in first["results"]],
+        )
+
+    def test_tampered_cursor_is_rejected(self):
+        first = self.client.get(self.url + "?pagination=cursor").data
+        cursor = parse_qs(urlsplit(first["next"]).query)["cursor"][0]
+
+        self.assertEqual(self.client.get(self.url, {"cursor": cursor}).status_code, 200)
+        response = self.client.get(self.url, {"cursor": cursor[:-2] + "xx"})
+        self.assertEqual(response.status_code, 404)
+
+
+class CatalogCacheTests(APITestCase):
+    def setUp(self):
+        metrics.reset()
+        cache.clear()
+        self.product = create_products(3)[0]
+
+    def test_list_is_served_from_cache(self):
+        first = self.client.get("/api/store/")
+        second = self.client.get("/api/store/")
+
+        self.assertEqual(first["X-Cache"], "MISS")
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(first.data, second.data)
+        self.assertEqual(catalog_cache_stats()["hits"], 1)
+        self.assertEqual(catalog_cache_stats()["misses"], 1)
+        self.assertIn('ebazaar_catalog_cache_requests_total{result="hit"} 1.0', metrics.render())
+
+    def test_pages_are_cached_separately(self):
+        self.client.get("/api/store/")
+        response = self.client.get("/api/store/", {"pagination": "cursor"})
+
+        self.assertEqual(response["X-Cache"], "MISS")
+
+    def test_product_save_invalidates(self):
+        url = f"/api/store/{self.product.pk}/"
+        self.client.get(url)
+
+        self.product.title = "Renamed"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.save()
+        response = self.client.get(url)
+
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["title"], "Renamed")
+
+    def test_version_bumps_after_commit(self):
+        version = get_catalog_version()
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.product.save()
+            self.assertEqual(get_catalog_version(), version)
+
+        for callback in callbacks:
+            callback()
+        self.assertGreater(get_catalog_version(), version)
+
+    def test_product_delete_invalidates(self):
+        self.client.get("/api/store/")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.delete()
+        response = self.client.get("/api/store/")
+
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["count"], 2)
+
+    def test_file_based_cache(self):
+        with tempfile.TemporaryDirectory() as location:
+            with override_settings(CACHES={"default": {
+                "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+                "LOCATION": location,
+            }}):
+                url = f"/api/store/{self.product.pk}/"
+                self.assertEqual(self.client.get(url)["X-Cache"], "MISS")
+                self.assertEqual(self.client.get(url)["X-Cache"], "HIT")
+
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.product.save()
+                self.assertEqual(self.client.get(url)["X-Cache"], "MISS")
+
+
+class ProductConditionalGetTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.product = create_products(3)[0]
+        self.url = f"/api/store/{self.product.pk}/"
+
+    def test_detail_not_modified(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["ETag"], etag)
+
+    def test_detail_etag_changes_on_update(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        self.product.price = Decimal("1.00")
+        self.product.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_detail_ignores_if_modified_since(self):
+        self.assertNotIn("Last-Modified", self.client.get(self.url))
+
+        # Whole seconds can't tell apart two changes within the same second.
+        self.product.price = Decimal("1.00")
+        self.product.save()
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60))
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_missing_product_is_404(self):
+        response = self.client.get("/api/store/0/", HTTP_IF_NONE_MATCH='"anything"')
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_list_etag_varies_by_page_and_catalog(self):
+        etag = self.client.get("/api/store/")["ETag"]
+
+        self.assertEqual(
+            self.client.get("/api/store/", HTTP_IF_NONE_MATCH=etag).status_code, 304,
+        )
+        self.assertNotEqual(
+            self.client.get("/api/store/", {"pagination": "cursor"})["ETag"], etag,
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.delete()
+        self.assertEqual(
+            self.client.get("/api/store/", HTTP_IF_NONE_MATCH=etag).status_code, 200,
+        )
+
+    def test_list_validation_runs_no_queries(self):
+        response = self.client.get("/api/store/")
+        self.assertNotIn("Last-Modified", response)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get("/api/store/", HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+            self.assertEqual(self.client.get("/api/store/")["X-Cache"], "HIT")
+
+
+class CatalogReplicaTests(TransactionTestCase):
+    # A second, real connection to the test database stands in for the
+    # replica, as a mirror does when REPLICA_DATABASE_URL is set. It's added
+    # before the runner would need it, so "__all__" picks it up here only.
+    databases = "__all__"
+
+    @classmethod
+    def setUpClass(cls):
+        replica = {**connections["default"].settings_dict, "TEST": {"MIRROR": "default"}}
+        cls.enterClassContext(mock.patch.dict(settings.DATABASES, {"replica": replica}))
+        cls.addClassCleanup(connections.__delitem__, "replica")
+        cls.addClassCleanup(connections["replica"].close)
+        super().setUpClass()
+
+    def setUp(self):
+        self.product = create_products(15)[0]
+        # The replica has caught up with the writes above.
+        cache.clear()
+        self.client = APIClient()
+
+    def aliases(self, requests):
+        seen = []
+
+        def record(execute, sql, params, many, context):
+            seen.append(context["connection"].alias)
+            return execute(sql, params, many, context)
+
+        with connections["default"].execute_wrapper(record), connections["replica"].execute_wrapper(record):
+            requests()
+        return seen
+
+    def get_all(self):
+        self.assertContains(self.client.get("/api/store/"), "Product 0")
+        self.assertEqual(self.client.get(f"/api/store/{self.product.pk}/").status_code, 200)
+        request = APIRequestFactory().get("/api/store/", {"page": 2})
+        self.assertEqual(async_to_sync(AsyncProductListView.as_view())(request).status_code, 200)
+        request = APIRequestFactory().get(f"/api/store/{self.product.pk}/", {"fields": "id"})
+        self.assertEqual(async_to_sync(AsyncProductDetailView.as_view())(request, pk=self.product.pk).status_code, 200)
+
+    def test_catalog_reads_use_the_replica(self):
+        seen = self.aliases(self.get_all)
+
+        self.assertGreaterEqual(len(seen), 4)
+        self.assertEqual(set(seen), {"replica"})
+
+    def test_reads_right_after_a_change_use_the_primary(self):
+        # Cache fills and ETags must not come from a lagging replica.
+        Product.objects.filter(pk=self.product.pk).update(stock=5)
+        bump_catalog_version()
+
+        seen = self.aliases(self.get_all)
+
+        self.assertGreaterEqual(len(seen), 4)
+        self.assertEqual(set(seen), {"default"})
+
+    def test_cache_hits_skip_the_check(self):
+        self.client.get("/api/store/")
+        with mock.patch("store.cache.cache.get", wraps=cache.get) as get:
+            self.assertEqual(self.aliases(lambda: self.client.get("/api/store/")), [])
+        self.assertNotIn(mock.call(CHANGED_KEY), get.call_args_list)
+
+
+class InvertedIndexTests(SimpleTestCase):
+    def setUp(self):
+        self.index = InvertedIndex()
+        self.index.build([
+            (1, "Mens Cotton Jacket", "great outerwear jackets for spring"),
+            (2, "Womens Rain Jacket", "lightweight jacket with hood"),
+            (3, "Solid Gold Bracelet", "jacket not included"),
+            (4, "Cotton T-Shirt", "soft cotton"),
+        ])
+
+    def test_title_matches_rank_first(self):
+        self.assertEqual(self.index.search("jacket"), [2, 1, 3])
+
+    def test_all_tokens_must_match(self):
+        self.assertEqual(self.index.search("cotton jacket"), [1])
+
+    def test_prefix_matching(self):
+        self.assertEqual(self.index.search("brac"), [3])
+        self.assertEqual(self.index.search("cott jack"), [1])
+
+    def test_exact_word_beats_prefix(self):
+        self.index.add(5, "Jacket", "")
+        self.index.add(6, "Jackets", "")
+        results = self.index.search("jacket")
+        self.assertLess(results.index(5), results.index(6))
+
+    def test_remove(self):
+        self.index.remove(3)
+        self.assertEqual(self.index.search("bracelet"), [])
+
+    def test_empty_query(self):
+        self.assertEqual(self.index.search("  ?? "), [])
+
+    def test_short_prefix_matches_every_expansion(self):
+        self.index.build([(pk, f"item{pk:03d}", "") for pk in range(200)])
+
+        self.assertEqual(sorted(self.index.search("item")), list(range(200)))
+
+
+class ProductSearchViewTests(APITestCase):
+    def setUp(self):
+        product_index.reset()
+        create_products(3)
+        self.jacket = Product.objects.create(
+            title="Rain Jacket", description="Waterproof", price=Decimal("20.00"),
+            image="https://example.com/j.png", stock=1,
+        )
+
+    def test_search_finds_product(self):
+        response = self.client.get("/api/store/search/", {"q": "jack"})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([p["id"] for p in response.data["results"]], [self.jacket.pk])
+
+    def test_index_follows_saves_and_deletes(self):
+        self.client.get("/api/store/search/", {"q": "jacket"})
+
+        self.jacket.title = "Rain Coat"
+        with self.captureOnCommitCallbacks(execute=True):
+            self.jacket.save()
+        self.assertEqual(self.client.get("/api/store/search/", {"q": "jacket"}).data["count"], 0)
+        self.assertEqual(self.client.get("/api/store/search/", {"q": "coat"}).data["count"], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.jacket.delete()
+        self.assertEqual(self.client.get("/api/store/search/", {"q": "coat"}).data["count"], 0)
+
+    def test_index_waits_for_commit(self):
+        self.client.get("/api/store/search/", {"q": "jacket"})
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.jacket.title = "Rain Coat"
+            self.jacket.save()
+            self.assertEqual(self.client.get("/api/store/search/", {"q": "coat"}).data["count"], 0)
+        self.assertEqual(self.client.get("/api/store/search/", {"q": "coat"}).data["count"], 1)
+
+    def test_missing_query_returns_nothing(self):
+        response = self.client.get("/api/store/search/")
+
+        self.assertEqual(response.data["count"], 0)
+
+
+class ProductFilterTests(APITestCase):
+    url = "/api/store/"
+
+    def setUp(self):
+        cache.clear()
+        self.products = create_products(20)
+        Product.objects.filter(pk__in=[p.pk for p in self.products[:5]]).update(stock=0)
+
+    def ids(self, response):
+        return [product["id"] for product in response.data["results"]]
+
+    def test_price_range_and_in_stock(self):
+        response = self.client.get(self.url, {
+            "min_price": "12.00", "max_price": "20.00", "in_stock": "true", "sort": "price",
+        })
+
+        self.assertEqual(response.status_code, 200)
+        prices = [Decimal(p["price"]) for p in response.data["results"]]
+        self.assertEqual(prices, [Decimal(n) for n in range(15, 21)])
+
+    def test_sort_by_title_descending(self):
+        response = self.client.get(self.url, {"sort": "-title"})
+
+        titles = [p["title"] for p in response.data["results"]]
+        self.assertEqual(titles, sorted(titles, reverse=True))
+
+    def test_cursor_follows_sort(self):
+        seen = []
+        url = self.url + "?pagination=cursor&sort=-price"
+        while url:
+            response = self.client.get(url)
+            seen.extend(self.ids(response))
+            url = response.data["next"]
+
+        expected = Product.objects.order_by("-price", "-id").values_list("id", flat=True)
+        self.assertEqual(seen, list(expected))
+
+    def test_cursor_from_another_sort_is_rejected(self):
+        next_url = self.client.get(self.url, {"pagination": "cursor"}).data["next"]
+
+        response = self.client.get(next_url + "&sort=price")
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_invalid_filters_are_rejected(self):
+        for params in (
+            {"sort": "description"},
+            {"sort": "stock; DROP TABLE"},
+            {"min_price": "abc"},
+            {"min_price": "20", "max_price": "10"},
+        ):
+            with self.subTest(params=params):
+                self.assertEqual(self.client.get(self.url, params).status_code, 400)
+
+
+@skipUnless(connection.vendor == "postgresql", "EXPLAIN output checked on Postgres only")
+class ProductFilterIndexTests(APITestCase):
+    def setUp(self):
+        create_products(50)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE store_product")
+            # The test table is tiny, so make the planner show the index it would use.
+            cursor.execute("SET enable_seqscan = off")
+
+    def tearDown(self):
+        with connection.cursor() as cursor:
+            cursor.execute("RESET enable_seqscan")
+
+    def plan(self, **params):
+        serializer = ProductFilterSerializer(data=params)
+        serializer.is_valid(raise_exception=True)
+        queryset, _ = filter_products(Product.objects.all(), serializer.validated_data)
+        return queryset[:12].explain()
+
+    def test_common_filters_use_an_index(self):
+        cases = [
+            ({}, "store_product_created_idx"),
+            ({"sort": "created"}, "store_product_created_idx"),
+            ({"sort": "price"}, "store_product_price_idx"),
+            ({"sort": "-price", "min_price": "5", "max_price": "30"}, "store_product_price_idx"),
+            ({"sort": "title"}, "store_product_title_idx"),
+        ]
+        for params, index in cases:
+            with self.subTest(params=params):
+                plan = self.plan(**params)
+                self.assertIn(index, plan)
+                self.assertNotIn("Seq Scan", plan)
+
+    def test_in_stock_filter_uses_an_index(self):
+        self.assertNotIn("Seq Scan", self.plan(in_stock="true"))
+
+
+class ProductSparseFieldsetTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.product = create_products(3)[0]
+
+    def test_fields_limit_output_and_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/store/", {"fields": "id,title,price"})
+
+        self.assertEqual(set(response.data["results"][0]), {"id", "title", "price"})
+        self.assertNotIn("description", queries[-1]["sql"])
+
+    def test_compact_view(self):
+        response = self.client.get("/api/store/", {"view": "compact"})
+
+        self.assertEqual(
+            set(response.data["results"][0]), {"id", "title", "price", "image", "stock"},
+        )
+
+    def test_compact_cursor_page_loads_ordering_columns(self):
+        create_products(20)
+
+        # Just the page itself; deferred ordering columns would add a query
+        # per row when the cursor is encoded.
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/store/", {"view": "compact", "pagination": "cursor"})
+
+        self.assertIsNotNone(response.data["next"])
+
+    def test_detail_fields(self):
+        response = self.client.get(f"/api/store/{self.product.pk}/", {"fields": "title"})
+
+        self.assertEqual(response.data, {"title": self.product.title})
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get("/api/store/", {"fields": "id,secret"})
+
+        self.assertEqual(response.status_code, 400)
+
+
+class ProductValuesSerializerTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        create_products(5)
+        Product.objects.filter(pk=Product.objects.first().pk).update(price=Decimal("7"))
+        self.products = Product.objects.order_by("-created_at", "-id")
+
+    def assertSameOutput(self, serializer_class, fields=None):
+        serializer = serializer_class.values_serializer(fields)
+        expected = JSONRenderer().render(serializer_class(self.products, many=True, fields=fields).data)
+        actual = JSONRenderer().render(serializer.serialize(self.products.values(*serializer.columns)))
+        self.assertEqual(actual, expected)
+
+    def test_matches_drf_output(self):
+        self.assertSameOutput(ProductSerializer)
+        self.assertSameOutput(ProductListSerializer)
+        self.assertSameOutput(ProductSerializer, ["price", "id", "updated_at"])
+
+    def test_matches_drf_output_in_another_timezone(self):
+        with timezone.override("Asia/Kolkata"):
+            self.assertSameOutput(ProductSerializer)
+
+    def test_list_view_uses_values(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/api/store/")
+
+        self.assertEqual(
+            JSONRenderer().render(response.data["results"]),
+            JSONRenderer().render(ProductSerializer(self.products[:12], many=True).data),
+        )
+        self.assertEqual(len(queries), 2)
+
+
+class AsyncProductViewTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.products = create_products(15)
+
+    def call(self, view, path, params=None, **kwargs):
+        request = APIRequestFactory().get(path, params, **kwargs.pop("headers", {}))
+        response = async_to_sync(view.as_view())(request, **kwargs)
+        return response.render() if hasattr(response, "render") else response
+
+    def assertSameAsSync(self, view, path, params=None, **kwargs):
+        expected = self.client.get(path, params)
+        # Drop the cached pages but keep the catalog version the ETags depend on.
+        version = get_catalog_version()
+        cache.clear()
+        cache.set(VERSION_KEY, version, None)
+        response = self.call(view, path, params, **kwargs)
+
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(response.content, expected.content)
+        self.assertEqual(response["ETag"], expected["ETag"])
+        return response
+
+    def test_list_matches_sync_view(self):
+        self.assertSameAsSync(AsyncProductListView, "/api/store/")
+        self.assertSameAsSync(AsyncProductListView, "/api/store/", {"page": 2, "sort": "price"})
+        self.assertSameAsSync(AsyncProductListView, "/api/store/", {"pagination": "cursor", "view": "compact"})
+
+    def test_detail_matches_sync_view(self):
+        pk = self.products[0].pk
+        self.assertSameAsSync(AsyncProductDetailView, f"/api/store/{pk}/", {"fields": "id,price"}, pk=pk)
+
+    def test_conditional_get_and_errors(self):
+        etag = self.call(AsyncProductListView, "/api/store/")["ETag"]
+
+        response = self.call(AsyncProductListView, "/api/store/", headers={"HTTP_IF_NONE_MATCH": etag})
+        self.assertEqual(response.status_code, 304)
+
+        self.assertEqual(self.call(AsyncProductListView, "/api/store/", {"page": 9}).status_code, 404)
+        self.assertEqual(self.call(AsyncProductDetailView, "/api/store/0/", pk=0).status_code, 404)
+
+
+class ProductImportTests(TestCase):
+    rows = [
+        {"sku": "A-1", "title": "Kettle", "description": "Boils water", "price": "24.50", "image": "https://example.com/a.png", "stock": 3},
+        {"sku": "B-2", "title": "Teapot", "description": "Brews tea", "price": "18.00", "image": "https://example.com/b.png"},
+    ]
+
+    def setUp(self):
+        cache.clear()
+
+    def write(self, suffix, content):
+        tmp = tempfile.NamedTemporaryFile("w", suffix=suffix, delete=False, encoding="utf-8")
+        with tmp:
+            tmp.write(content)
+        self.addCleanup(os.unlink, tmp.name)
+        return tmp.name
+
+    def test_json_array_is_read_incrementally(self):
+        text = json.dumps([*self.rows, {"sku": "C-3", "title": "Cup [large], {blue}"}], indent=2)
+
+        with mock.patch("store.importers.CHUNK_SIZE", 7):
+            rows = list(read_json(io.StringIO(text)))
+
+        self.assertEqual(rows, json.loads(text))
+        self.assertEqual(list(read_json(io.StringIO(" [ ] "))), [])
+        with self.assertRaises(ValueError):
+            list(read_json(io.StringIO('[{"sku": "A-1"} {"sku": "B-2"}]')))
+
+    def test_upserts_by_sku(self):
+        self.assertEqual(import_products(self.rows), (2, 0))
+        kettle = Product.objects.get(sku="A-1")
+        self.assertEqual(Product.objects.get(sku="B-2").stock, 0)
+
+        changed = [{**self.rows[0], "price": "19.99", "stock": 7}]
+        self.assertEqual(import_products(changed), (1, 0))
+
+        updated = Product.objects.get(sku="A-1")
+        self.assertEqual(Product.objects.count(), 2)
+        self.assertEqual(updated.pk, kettle.pk)
+        self.assertEqual(updated.price, Decimal("19.99"))
+        self.assertEqual(updated.stock, 7)
+        self.assertEqual(updated.created_at, kettle.created_at)
+
+    def test_invalid_rows_are_skipped(self):
+        errors = []
+        rows = [
+            self.rows[0],
+            {**self.rows[1], "sku": ""},
+            {**self.rows[1], "price": "cheap", "image": "not a url"},
+            "not an object",
+        ]
+
+        self.assertEqual(import_products(rows, on_error=lambda number, e: errors.append((number, e))), (1, 3))
+
+        self.assertEqual([number for number, _ in errors], [2, 3, 4])
+        self.assertEqual(set(errors[1][1].message_dict), {"price", "image"})
+        self.assertEqual(list(Product.objects.values_list("sku", flat=True)), ["A-1"])
+
+    def test_last_duplicate_in_a_batch_wins(self):
+        rows = [self.rows[0], {**self.rows[0], "title": "Kettle v2"}, self.rows[1]]
+
+        self.assertEqual(import_products(rows, batch_size=2), (2, 0))
+
+        self.assertEqual(Product.objects.get(sku="A-1").title, "Kettle v2")
+
+    def test_import_invalidates_catalog_cache_and_search_index(self):
+        version = get_catalog_version()
+        product_index.build([])
+
+        import_products(self.rows)
+
+        self.assertNotEqual(get_catalog_version(), version)
+        self.assertFalse(product_index.built)
+
+    def test_command_reads_each_format(self):
+        ndjson = "\n".join(json.dumps(row) for row in self.rows) + "\n"
+        csv_text = "sku,title,description,price,image,stock\nA-1,Kettle,Boils water,21.00,https://example.com/a.png,4\n"
+        out = io.StringIO()
+
+        call_command("import_products", self.write(".json", json.dumps(self.rows)), stdout=out)
+        call_command("import_products", self.write(".ndjson", ndjson), stdout=out)
+        call_command("import_products", self.write(".csv", csv_text), "--progress", "1", stdout=out)
+
+        self.assertIn("Imported 2 product(s), skipped 0 invalid row(s)", out.getvalue())
+        self.assertIn("1 rows read", out.getvalue())
+        self.assertEqual(Product.objects.get(sku="A-1").price, Decimal("21.00"))
+        self.assertEqual(Product.objects.count(), 2)
+
+    def test_command_accepts_the_fixture(self):
+        call_command("import_products", "store/fixtures/products.json", stdout=io.StringIO())
+
+        self.assertEqual(Product.objects.count(), 20)
+        self.assertTrue(Product.objects.filter(sku="SKU-00000001").exists())
+
+    def test_command_errors(self):
+        path = self.write(".csv", "sku,title\nA-1,\n")
+
+        with self.assertRaisesMessage(CommandError, "Row 1"):
+            call_command("import_products", path, "--strict", stdout=io.StringIO())
+        with self.assertRaisesMessage(CommandError, "format"):
+            call_command("import_products", self.write(".txt", ""))
+        with self.assertRaises(CommandError):
+            call_command("import_products", self.write(".json", "{}"), stdout=io.StringIO())
+
+    def test_fixture_rows_read_as_fields(self):
+        rows = read_rows(io.StringIO(json.dumps([{"model": "store.product", "pk": 1, "fields": self.rows[0]}])), "json")
+
+        self.assertEqual(list(rows), [self.rows[0]])
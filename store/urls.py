@@ -1,8 +1,14 @@
+from django.conf import settings
 from django.urls import path
 
-from .views import ProductListView, ProductDetailView
+from .views import ProductListView, ProductDetailView, ProductSearchView
+
+if settings.ASYNC_API:
+    from .async_views import AsyncProductDetailView as ProductDetailView
+    from .async_views import AsyncProductListView as ProductListView
 
 urlpatterns = [
     path("", ProductListView.as_view(), name="products"),
+    path("search/", ProductSearchView.as_view(), name="products-search"),
     path("<int:pk>/", ProductDetailView.as_view(), name="products-detail"),
-]
\ No newline at end of file
+]
@@ -3,25 +3,95 @@ from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny
 from rest_framework.pagination import PageNumberPagination
 from django.shortcuts import get_object_or_404
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 
+from ebazaar.db_routers import read_from_primary
+from .cache import catalog_cache_key, catalog_recently_changed, get_cached, set_cached
+from .filters import ProductFilterSerializer, filter_products
+from .etags import (
+    product_detail_etag,
+    product_list_etag,
+)
 from .models import Product
-from .serializers import ProductSerializer
+from .pagination import KeysetPagination
+from .search import search_product_ids, search_products_postgres, uses_postgres
+from .serializers import ProductListSerializer, ProductSerializer
 # Create your views here.
 
 class ProductListView(APIView):
     permission_classes = [AllowAny]
 
+    @read_from_primary(catalog_recently_changed)
+    @method_decorator(condition(
+        etag_func=product_list_etag,
+    ))
     def get(self, request):
-        products = Product.objects.all().order_by("-created_at")
-        paginator = PageNumberPagination()
-        paginator.page_size = 12
+        cache_key = catalog_cache_key("list", request)
+        data = get_cached(cache_key)
+        if data is not None:
+            return Response(data, headers={"X-Cache": "HIT"})
+
+        filters = ProductFilterSerializer(data=request.query_params)
+        filters.is_valid(raise_exception=True)
+        products, ordering = filter_products(Product.objects.all(), filters.validated_data)
+
+        serializer_class = (
+            ProductListSerializer if request.query_params.get("view") == "compact" else ProductSerializer
+        )
+        fields = serializer_class.requested_fields(request)
+        serializer = serializer_class.values_serializer(fields)
+        products = products.values(
+            *dict.fromkeys([*serializer.columns, *(field.lstrip("-") for field in ordering)]),
+        )
+
+        if KeysetPagination.is_requested(request):
+            paginator = KeysetPagination()
+            paginator.ordering = ordering
+        else:
+            paginator = PageNumberPagination()
+            paginator.page_size = 12
         result_page = paginator.paginate_queryset(products, request)
-        serializer = ProductSerializer(result_page, many=True)
-        return paginator.get_paginated_response(serializer.data)  
+        response = paginator.get_paginated_response(serializer.serialize(result_page))
+        set_cached(cache_key, response.data)
+        response["X-Cache"] = "MISS"
+        return response
 
 
 class ProductDetailView(APIView):
+    @read_from_primary(catalog_recently_changed)
+    @method_decorator(condition(
+        etag_func=product_detail_etag,
+    ))
     def get(self, request, pk):
-        product = get_object_or_404(Product, pk=pk)
-        serializer = ProductSerializer(product)
-        return Response(serializer.data)
\ No newline at end of file
+        cache_key = catalog_cache_key("detail", request, pk)
+        data = get_cached(cache_key)
+        if data is not None:
+            return Response(data, headers={"X-Cache": "HIT"})
+
+        fields = ProductSerializer.requested_fields(request)
+        product = get_object_or_404(
+            Product.objects.only(*ProductSerializer.only_columns(fields)), pk=pk,
+        )
+        serializer = ProductSerializer(product, fields=fields)
+        set_cached(cache_key, serializer.data)
+        return Response(serializer.data, headers={"X-Cache": "MISS"})
+
+
+class ProductSearchView(APIView):
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        query = request.query_params.get("q", "").strip()[:200]
+        paginator = PageNumberPagination()
+        paginator.page_size = 12
+
+        if uses_postgres():
+            result_page = paginator.paginate_queryset(search_products_postgres(query), request)
+        else:
+            page_ids = paginator.paginate_queryset(search_product_ids(query), request)
+            products = Product.objects.in_bulk(page_ids)
+            result_page = [products[pk] for pk in page_ids if pk in products]
+
+        serializer = ProductSerializer(result_page, many=True)
+        return paginator.get_paginated_response(serializer.data)